@@ -0,0 +1,196 @@
+"""Compress backtest result details
+
+Revision ID: 3c7e2a9d41b5
+Revises: 9f1b038dde65
+Create Date: 2026-10-18 10:12:41.208315
+
+"""
+import zlib
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+from alembic import op
+import numpy as np
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c7e2a9d41b5'
+down_revision: Union[str, None] = '9f1b038dde65'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+DETAIL_COLUMNS = ('equity_curve', 'trades', 'monthly_returns')
+BATCH_SIZE = 500  # 한 번에 읽고 갱신하는 행 수
+
+
+# ---------------------------------------------------------------------------
+# 압축 형식 (형식 버전 1)
+# 이 리비전 시점의 app.services.result_codec 사본. 이후 코덱이 바뀌어도 마이그레이션 결과가 달라지지 않도록
+# 애플리케이션 코드를 가져오지 않습니다.
+# ---------------------------------------------------------------------------
+
+_HEADER = np.dtype([('version', '<u2'), ('kind', '<u2'), ('n', '<u4')])
+_VERSION = 1
+_KIND_CURVE = 1
+_KIND_TRADES = 2
+_COMPRESS_LEVEL = 6
+_TRADE_TYPES = {'buy': 1, 'sell': -1}
+_TRADE_NAMES = {code: name for name, code in _TRADE_TYPES.items()}
+
+
+def _shuffle(values: np.ndarray) -> bytes:
+    values = np.ascontiguousarray(values)
+    return values.view(np.uint8).reshape(len(values), values.itemsize).T.tobytes()
+
+
+def _unshuffle(body: memoryview, offset: int, n: int, dtype: np.dtype) -> np.ndarray:
+    dtype = np.dtype(dtype)
+    planes = np.frombuffer(body, dtype=np.uint8, count=n * dtype.itemsize, offset=offset)
+    return np.ascontiguousarray(planes.reshape(dtype.itemsize, n).T).view(dtype).ravel()
+
+
+def _encode_time(time: np.ndarray) -> bytes:
+    return _shuffle(np.diff(np.asarray(time, dtype=np.int64), prepend=np.int64(0)))
+
+
+def _decode_time(body: memoryview, offset: int, n: int) -> np.ndarray:
+    return np.cumsum(_unshuffle(body, offset, n, np.int64))
+
+
+def _pack(kind: int, n: int, columns: List[bytes]) -> bytes:
+    header = np.array([(_VERSION, kind, n)], dtype=_HEADER).tobytes()
+    return header + zlib.compress(b''.join(columns), _COMPRESS_LEVEL)
+
+
+def _unpack(blob: bytes, kind: int):
+    header = np.frombuffer(blob, dtype=_HEADER, count=1)[0]
+    if int(header['version']) != _VERSION or int(header['kind']) != kind:
+        raise ValueError('지원하지 않는 결과 데이터 형식입니다.')
+    body = memoryview(zlib.decompress(memoryview(blob)[_HEADER.itemsize:]))
+    return int(header['n']), body
+
+
+def encode_curve(curve: Optional[List[Dict[str, Any]]]) -> Optional[bytes]:
+    if curve is None:
+        return None
+    n = len(curve)
+    time = np.fromiter((point['time'] for point in curve), dtype=np.int64, count=n)
+    value = np.fromiter((point['value'] for point in curve), dtype=np.float64, count=n)
+    return _pack(_KIND_CURVE, n, [_encode_time(time), _shuffle(value)])
+
+
+def decode_curve(blob: Optional[bytes]) -> Optional[List[Dict[str, Any]]]:
+    if blob is None:
+        return None
+    n, body = _unpack(blob, _KIND_CURVE)
+    time = _decode_time(body, 0, n)
+    value = _unshuffle(body, n * 8, n, np.float64)
+    return [{'time': t, 'value': v} for t, v in zip(time.tolist(), value.tolist())]
+
+
+def encode_trades(trades: Optional[List[Dict[str, Any]]]) -> Optional[bytes]:
+    if trades is None:
+        return None
+    n = len(trades)
+    time = np.fromiter((t['time'] for t in trades), dtype=np.int64, count=n)
+    types = np.fromiter((_TRADE_TYPES[t['type']] for t in trades), dtype=np.int8, count=n)
+    price = np.fromiter((t['price'] for t in trades), dtype=np.float64, count=n)
+    quantity = np.fromiter((t['quantity'] for t in trades), dtype=np.float64, count=n)
+    return _pack(_KIND_TRADES, n, [_encode_time(time), types.tobytes(), _shuffle(price), _shuffle(quantity)])
+
+
+def decode_trades(blob: Optional[bytes]) -> Optional[List[Dict[str, Any]]]:
+    if blob is None:
+        return None
+    n, body = _unpack(blob, _KIND_TRADES)
+    time = _decode_time(body, 0, n)
+    types = np.frombuffer(body, dtype=np.int8, count=n, offset=n * 8)
+    price = _unshuffle(body, n * 9, n, np.float64)
+    quantity = _unshuffle(body, n * 17, n, np.float64)
+    return [
+        {'type': _TRADE_NAMES[code], 'time': t, 'price': p, 'quantity': q}
+        for code, t, p, q in zip(types.tolist(), time.tolist(), price.tolist(), quantity.tolist())
+    ]
+
+
+def _safe(encode, value):
+    # 형식이 맞지 않는 기존 JSON(예: 다른 키를 쓰는 예제 데이터)은 버림
+    try:
+        return encode(value)
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _detail_table() -> sa.Table:
+    return sa.table(
+        'backtest_results',
+        sa.column('id', sa.String()),
+        *(sa.column(name, sa.JSON()) for name in DETAIL_COLUMNS),
+        *(sa.column(f'{name}_data', sa.LargeBinary()) for name in DETAIL_COLUMNS),
+    )
+
+
+def _convert_rows(bind, table: sa.Table, columns, convert) -> None:
+    """
+    id 순으로 BATCH_SIZE행씩 읽어 convert(row)로 만든 값으로 갱신
+    읽은 결과를 모두 메모리에 올리지 않고, 갱신 중에 커서를 열어 두지 않도록 id 구간 단위로 조회합니다.
+    """
+    update = table.update().where(table.c.id == sa.bindparam('row_id'))
+    last_id = None
+    while True:
+        query = sa.select(table.c.id, *columns).order_by(table.c.id).limit(BATCH_SIZE)
+        if last_id is not None:
+            query = query.where(table.c.id > last_id)
+        rows = bind.execute(query).fetchall()
+        if not rows:
+            break
+        bind.execute(update, [{'row_id': row.id, **convert(row)} for row in rows])
+        last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    for name in DETAIL_COLUMNS:
+        op.add_column('backtest_results', sa.Column(f'{name}_data', sa.LargeBinary(), nullable=True))
+
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        # 이미 압축된 값이므로 TOAST 재압축을 건너뜀
+        for name in DETAIL_COLUMNS:
+            op.execute(f'ALTER TABLE backtest_results ALTER COLUMN {name}_data SET STORAGE EXTERNAL')
+
+    # 기존 JSON 데이터를 압축 바이너리로 변환
+    table = _detail_table()
+    _convert_rows(
+        bind,
+        table,
+        [table.c[name] for name in DETAIL_COLUMNS],
+        lambda row: {
+            'equity_curve_data': _safe(encode_curve, row.equity_curve),
+            'trades_data': _safe(encode_trades, row.trades),
+            'monthly_returns_data': _safe(encode_curve, row.monthly_returns),
+        },
+    )
+
+    for name in DETAIL_COLUMNS:
+        op.drop_column('backtest_results', name)
+
+
+def downgrade() -> None:
+    for name in DETAIL_COLUMNS:
+        op.add_column('backtest_results', sa.Column(name, sa.JSON(), nullable=True))
+
+    bind = op.get_bind()
+    table = _detail_table()
+    _convert_rows(
+        bind,
+        table,
+        [table.c[f'{name}_data'] for name in DETAIL_COLUMNS],
+        lambda row: {
+            'equity_curve': decode_curve(row.equity_curve_data),
+            'trades': decode_trades(row.trades_data),
+            'monthly_returns': decode_curve(row.monthly_returns_data),
+        },
+    )
+
+    for name in DETAIL_COLUMNS:
+        op.drop_column('backtest_results', f'{name}_data')
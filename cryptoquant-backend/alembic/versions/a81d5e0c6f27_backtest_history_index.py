@@ -0,0 +1,63 @@
+"""Backtest history columns and covering index
+
+Revision ID: a81d5e0c6f27
+Revises: 3c7e2a9d41b5
+Create Date: 2026-10-18 11:02:17.553920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a81d5e0c6f27'
+down_revision: Union[str, None] = '3c7e2a9d41b5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# 이력 목록 조회가 인덱스만 읽도록 INCLUDE하는 요약 컬럼
+HISTORY_INCLUDE = [
+    'symbol', 'interval', 'strategy_type', 'start_date', 'end_date',
+    'initial_capital', 'final_equity', 'total_return', 'total_trades',
+    'win_rate', 'max_drawdown', 'sharpe_ratio',
+]
+
+
+def upgrade() -> None:
+    op.add_column('backtest_results', sa.Column('symbol', sa.String(), nullable=True))
+    op.add_column('backtest_results', sa.Column('interval', sa.String(), nullable=True))
+    op.add_column('backtest_results', sa.Column('strategy_type', sa.String(), nullable=True))
+    op.add_column('backtest_results', sa.Column('parameters', sa.JSON(), nullable=True))
+    op.alter_column('backtest_results', 'strategy_id', existing_type=sa.String(), nullable=True)
+
+    # 기존 결과는 연결된 전략의 정보로 채움
+    op.execute(
+        'UPDATE backtest_results SET symbol = s.symbol, interval = s.interval, '
+        'strategy_type = s.strategy_type, parameters = s.parameters '
+        'FROM strategies AS s WHERE s.id = backtest_results.strategy_id'
+    )
+
+    # (user_id) 단일 인덱스는 새 인덱스의 선두 컬럼으로 대체
+    op.create_index(
+        'ix_backtest_results_user_history',
+        'backtest_results',
+        ['user_id', 'created_at', 'id'],
+        unique=False,
+        postgresql_include=HISTORY_INCLUDE,
+    )
+    op.drop_index(op.f('ix_backtest_results_user_id'), table_name='backtest_results')
+
+
+def downgrade() -> None:
+    op.create_index(op.f('ix_backtest_results_user_id'), 'backtest_results', ['user_id'], unique=False)
+    op.drop_index('ix_backtest_results_user_history', table_name='backtest_results')
+
+    # 전략 없이 저장된 결과는 이전 스키마(strategy_id NOT NULL)에 담을 수 없으므로 삭제
+    op.execute('DELETE FROM backtest_results WHERE strategy_id IS NULL')
+    op.alter_column('backtest_results', 'strategy_id', existing_type=sa.String(), nullable=False)
+    op.drop_column('backtest_results', 'parameters')
+    op.drop_column('backtest_results', 'strategy_type')
+    op.drop_column('backtest_results', 'interval')
+    op.drop_column('backtest_results', 'symbol')
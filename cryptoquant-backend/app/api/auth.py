@@ -7,11 +7,13 @@ import os
 from dotenv import load_dotenv
 import httpx
 from jose import JWTError, jwt
+from app.services.http_clients import get_http_client
 
 load_dotenv()
 
 router = APIRouter()
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
 # 환경 변수
 JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "your-secret-key-change-in-production")
@@ -44,22 +46,22 @@ async def verify_google_token(id_token: str) -> dict:
     Google ID 토큰 검증
     """
     try:
-        async with httpx.AsyncClient() as client:
-            # Google의 토큰 검증 엔드포인트 호출
-            response = await client.get(
-                f"https://oauth2.googleapis.com/tokeninfo?id_token={id_token}"
+        client = get_http_client("google_oauth")
+        # Google의 토큰 검증 엔드포인트 호출
+        response = await client.get(
+            f"https://oauth2.googleapis.com/tokeninfo?id_token={id_token}"
+        )
+        response.raise_for_status()
+        token_info = response.json()
+        
+        # 클라이언트 ID 검증
+        if GOOGLE_CLIENT_ID and token_info.get("aud") != GOOGLE_CLIENT_ID:
+            raise HTTPException(
+                status_code=401, 
+                detail="Invalid token audience"
             )
-            response.raise_for_status()
-            token_info = response.json()
-            
-            # 클라이언트 ID 검증
-            if GOOGLE_CLIENT_ID and token_info.get("aud") != GOOGLE_CLIENT_ID:
-                raise HTTPException(
-                    status_code=401, 
-                    detail="Invalid token audience"
-                )
-            
-            return token_info
+        
+        return token_info
     except httpx.HTTPStatusError as e:
         raise HTTPException(
             status_code=401, 
@@ -110,6 +112,17 @@ async def get_current_user_from_token(
     return payload
 
 
+async def get_optional_user_from_token(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)
+) -> Optional[dict]:
+    """
+    로그인한 경우에만 JWT 토큰에서 사용자 정보 추출 (토큰이 없으면 None, 잘못된 토큰은 401)
+    """
+    if credentials is None:
+        return None
+    return verify_jwt_token(credentials.credentials)
+
+
 @router.post("/login", response_model=LoginResponse)
 async def login(request: LoginRequest):
     """
@@ -1,9 +1,13 @@
+import asyncio
 from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
 from typing import Optional, List
 from app.services.binance import get_24h_ticker, get_klines, get_exchange_info, get_24h_tickers
+from app.services.candle_store import get_candle_store
+from app.services.candles import INTERVAL_SECONDS
 from app.services.coingecko import get_top_gainers, get_top_volume, get_new_listings
 from app.services.news import get_crypto_news
+from app.services.resample import base_interval
 from app.services.social import get_reddit_posts, get_twitter_posts
 
 router = APIRouter()
@@ -107,8 +111,32 @@ async def get_klines_endpoint(
         return {
             "symbol": symbol,
             "interval": interval,
-            "data": klines,
+            "data": klines.to_dicts(),
         }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/klines/store")
+async def get_klines_store_status(symbol: str, interval: str = "1d"):
+    """
+    로컬 캔들 저장소 현황
+    저장된 캔들 수, 첫 / 마지막 캔들 시각, 업스트림에서 받아 온 구간, 캔들이 빠진 구간을 반환합니다.
+    리샘플링으로 만드는 간격은 기준 간격(interval 응답 필드)의 저장 현황을 반환합니다.
+    """
+    store = get_candle_store()
+    if store is None:
+        raise HTTPException(status_code=404, detail="로컬 캔들 저장소를 사용하지 않습니다.")
+    try:
+        interval = base_interval(interval)
+        status = await asyncio.to_thread(
+            store.status, symbol.upper(), interval, INTERVAL_SECONDS[interval]
+        )
+        return {"symbol": symbol.upper(), "interval": interval, **status}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
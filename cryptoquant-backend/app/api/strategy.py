@@ -1,9 +1,30 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+import asyncio
+import json
+import time
+from contextlib import ExitStack
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, Field
 from typing import Optional, Dict, Any, List
 from datetime import datetime
-from app.services.backtest import BacktestEngine
-from app.services.binance import get_klines
+from sqlalchemy.orm import Session
+from app.api.auth import get_current_user_from_token, get_optional_user_from_token
+from app.database import get_db
+from app.services.backtest import BacktestEngine, serialize_result
+from app.services.binance import get_klines_range
+from app.services.candles import Candles
+from app.services.checkpoint import BacktestCheckpoint, get_checkpoint_store, run_incremental_task
+from app.services.downsample import downsample_result
+from app.services.history import MAX_PAGE_SIZE, get_history_detail, list_history, schedule_save
+from app.services.jobs import JOB_FAILED, JobCancelledError, JobQueueFullError, get_job_manager
+from app.services.monte_carlo import backtest_trades, run_monte_carlo
+from app.services.portfolio import run_portfolio_task
+from app.services.resample import candle_length, fixed_interval_seconds, interval_seconds as get_interval_seconds
+from app.services.result_cache import cache_key, forming_candle_expiry, get_result_cache
+from app.services.strategy_dsl import StrategyRuleError, compile_rules
+from app.services.sweep import METRIC_KEYS, expand_grid, rank_results, run_sweep
+from app.services.walk_forward import run_walk_forward
+from app.services.workers import SharedCandles, TaskResourceError
 
 router = APIRouter()
 
@@ -22,6 +43,11 @@ class BacktestRequest(BaseModel):
     strategyType: str
     parameters: Dict[str, Any]
     initialCapital: Optional[float] = 10000000.0  # 기본값 1천만원
+    # 차트 데이터 최대 점 수 (곡선은 LTTB, 캔들은 OHLC 구간 집계로 축소. 스트리밍 응답에는 미적용)
+    maxPoints: Optional[int] = Field(default=None, ge=3)
+    # 체결 방식: "close" (신호 봉 종가) 또는 "intrabar" (하위 봉으로 봉 중간 체결, 변동성 돌파 전략에 적용)
+    execution: Optional[str] = "close"
+    intrabarInterval: Optional[str] = "1m"  # intrabar 체결에 사용할 하위 봉 간격
 
 
 class BacktestResponse(BaseModel):
@@ -35,90 +61,827 @@ class BacktestResponse(BaseModel):
     winRate: float
     maxDrawdown: float
     sharpeRatio: float
+    sortinoRatio: float = 0.0
+    calmarRatio: float = 0.0
+    exposureTime: float = 0.0  # 포지션 보유 봉 비율 (%)
     chartData: Optional[List[Dict[str, Any]]] = None
     equityCurve: Optional[List[Dict[str, Any]]] = None
     cumulativeReturnCurve: Optional[List[Dict[str, Any]]] = None
+    drawdownCurve: Optional[List[Dict[str, Any]]] = None
     monthlyReturns: Optional[List[Dict[str, Any]]] = None
     tradeSignals: Optional[List[TradeSignal]] = None
 
 
+class BacktestJobStatus(BaseModel):
+    jobId: str
+    status: str  # queued, running, completed, failed, cancelled
+    progress: float  # 진행률 (%)
+    createdAt: float  # Unix timestamp (초)
+    startedAt: Optional[float] = None
+    finishedAt: Optional[float] = None
+    error: Optional[str] = None
+    request: Dict[str, Any]
+
+
+class IncrementalBacktestResponse(BaseModel):
+    initialCapital: float
+    totalReturn: float
+    totalProfit: float
+    dailyAverageReturn: float
+    cagr: float
+    totalTrades: int
+    winRate: float
+    maxDrawdown: float
+    sharpeRatio: float
+    sortinoRatio: float
+    calmarRatio: float
+    exposureTime: float
+    monthlyReturns: List[Dict[str, Any]]
+    resumed: bool  # 이전 체크포인트에서 이어서 계산했는지 여부
+    processedCandles: int  # 이번 요청에서 처리한 캔들 수
+    totalCandles: int  # 전체 기간 캔들 수
+
+
+class HistoryItem(BaseModel):
+    id: str
+    symbol: Optional[str] = None
+    interval: Optional[str] = None
+    strategyType: Optional[str] = None
+    startDate: str
+    endDate: str
+    initialCapital: float
+    finalEquity: float
+    totalReturn: float
+    totalTrades: int
+    winRate: float
+    maxDrawdown: float
+    sharpeRatio: Optional[float] = None
+    createdAt: Optional[str] = None
+
+
+class HistoryPage(BaseModel):
+    history: List[HistoryItem]
+    nextCursor: Optional[str] = None  # 다음 페이지 커서 (마지막 페이지면 None)
+
+
+class HistoryDetail(HistoryItem):
+    parameters: Optional[Dict[str, Any]] = None
+    winningTrades: int
+    losingTrades: int
+    equityCurve: Optional[List[Dict[str, Any]]] = None
+    trades: Optional[List[Dict[str, Any]]] = None
+    monthlyReturns: Optional[List[Dict[str, Any]]] = None
+
+
+class SweepRequest(BaseModel):
+    symbol: str
+    interval: str
+    startDate: str
+    endDate: str
+    strategyType: str
+    # 파라미터별 값 목록([5, 10, 20]) 또는 범위({"start": 5, "stop": 30, "step": 5})
+    parameterRanges: Dict[str, Any]
+    initialCapital: Optional[float] = 10000000.0
+    sortBy: Optional[str] = "totalReturn"
+    top: Optional[int] = 50
+
+
+class SweepResult(BaseModel):
+    rank: int
+    parameters: Dict[str, Any]
+    totalReturn: float
+    totalProfit: float
+    dailyAverageReturn: float
+    cagr: float
+    totalTrades: int
+    winRate: float
+    maxDrawdown: float
+    sharpeRatio: float
+    sortinoRatio: float = 0.0
+    calmarRatio: float = 0.0
+    exposureTime: float = 0.0  # 포지션 보유 봉 비율 (%)
+
+
+class SweepResponse(BaseModel):
+    strategyType: str
+    sortBy: str
+    totalCombinations: int
+    results: List[SweepResult]
+
+
+class WalkForwardRequest(BaseModel):
+    symbol: str
+    interval: str
+    startDate: str
+    endDate: str
+    strategyType: str
+    parameterRanges: Dict[str, Any]
+    inSampleBars: int  # 최적화 구간 캔들 수
+    outOfSampleBars: int  # 검증 구간 캔들 수
+    stepBars: Optional[int] = None  # 구간 이동 캔들 수 (기본값: outOfSampleBars)
+    objective: Optional[str] = "totalReturn"  # in-sample 최적화 기준 지표
+    initialCapital: Optional[float] = 10000000.0
+    maxPoints: Optional[int] = Field(default=None, ge=3)  # 차트 데이터 최대 점 수
+
+
+class WalkForwardWindow(BaseModel):
+    inSampleStart: int
+    inSampleEnd: int
+    outOfSampleStart: int
+    outOfSampleEnd: int
+    parameters: Dict[str, Any]
+    inSample: Dict[str, Any]
+    outOfSample: Dict[str, Any]
+
+
+class WalkForwardResponse(BacktestResponse):
+    windows: List[WalkForwardWindow]
+
+
+class MonteCarloRequest(BacktestRequest):
+    simulations: Optional[int] = 1000  # 시뮬레이션 경로 수
+    method: Optional[str] = "bootstrap"  # "bootstrap" (복원 추출) 또는 "shuffle" (순서 섞기)
+    percentiles: Optional[List[float]] = None  # 신뢰 구간 백분위 (기본값: 5, 25, 50, 75, 95)
+    seed: Optional[int] = None  # 난수 시드 (재현용)
+
+
+class MonteCarloDistribution(BaseModel):
+    mean: float
+    percentiles: Dict[str, float]
+
+
+class MonteCarloResponse(BaseModel):
+    simulations: int
+    method: str
+    tradeCount: int
+    backtest: Dict[str, Any]  # 원본 백테스트 지표
+    finalEquity: MonteCarloDistribution
+    maxDrawdown: MonteCarloDistribution
+    sharpeRatio: MonteCarloDistribution
+    probabilityOfLoss: float  # 최종 자산이 초기 자본보다 작은 경로 비율 (%)
+
+
+class PortfolioBacktestRequest(BaseModel):
+    symbols: List[str]
+    interval: str
+    startDate: str
+    endDate: str
+    strategyType: str
+    parameters: Dict[str, Any]
+    weights: Optional[Dict[str, float]] = None  # 심볼별 목표 비중 (기본값: 동일 비중)
+    rebalanceEvery: Optional[int] = 0  # 리밸런싱 주기 (캔들 수, 0이면 리밸런싱 없음)
+    initialCapital: Optional[float] = 10000000.0
+    maxPoints: Optional[int] = Field(default=None, ge=3)  # 차트 데이터 최대 점 수
+
+
+class PortfolioAsset(BaseModel):
+    symbol: str
+    weight: float  # 목표 비중 (%)
+    profit: float  # 포트폴리오 손익 기여 금액
+    contribution: float  # 포트폴리오 수익률 기여도 (%p)
+    strategyReturn: float  # 해당 심볼 단독 전략 수익률 (%)
+    totalTrades: int
+    winRate: float
+
+
+class PortfolioBacktestResponse(BaseModel):
+    initialCapital: float
+    totalReturn: float
+    totalProfit: float
+    dailyAverageReturn: float
+    cumulativeReturn: float
+    cagr: float
+    totalTrades: int
+    winRate: float
+    maxDrawdown: float
+    sharpeRatio: float
+    sortinoRatio: float = 0.0
+    calmarRatio: float = 0.0
+    exposureTime: float = 0.0  # 포지션 보유 봉 비율 (%)
+    symbols: List[str]
+    failedSymbols: List[str] = []  # 데이터를 가져오지 못해 제외된 심볼
+    equityCurve: Optional[List[Dict[str, Any]]] = None
+    cumulativeReturnCurve: Optional[List[Dict[str, Any]]] = None
+    drawdownCurve: Optional[List[Dict[str, Any]]] = None
+    monthlyReturns: Optional[List[Dict[str, Any]]] = None
+    assets: List[PortfolioAsset]
+
+
+MAX_PORTFOLIO_SYMBOLS = 100
+QUEUE_RETRY_AFTER = "5"  # 대기열이 가득 찼을 때 재시도 권장 간격 (초)
+PORTFOLIO_FETCH_CONCURRENCY = 8
+
+
+async def _fetch_backtest_candles(
+    symbol: str,
+    interval: str,
+    start_date: datetime,
+    end_date: datetime,
+) -> Candles:
+    """
+    백테스트 기간의 캔들 조회
+    기간 전체를 1000개 단위 구간으로 나눠 동시에 조회합니다 (get_klines_range).
+    형식이 잘못된 간격은 400, 데이터가 없으면 404 HTTPException을 발생시킵니다.
+    """
+    _interval_seconds(interval)
+    start_timestamp = int(start_date.timestamp())
+    end_timestamp = int(end_date.timestamp())
+    
+    # Binance에서 과거 데이터 가져오기 (시간순 정렬, 중복 제거됨)
+    klines = await get_klines_range(
+        symbol=symbol,
+        interval=interval,
+        start_time=start_timestamp,
+        end_time=end_timestamp,
+    )
+    
+    if not klines:
+        raise HTTPException(
+            status_code=404,
+            detail="선택한 기간에 해당하는 데이터가 없습니다. 심볼과 기간을 확인해주세요."
+        )
+    
+    return klines
+
+
+def _interval_seconds(interval: str) -> int:
+    """캔들 간격 길이 (초, 월 단위는 31일). 형식이 잘못된 간격은 400 HTTPException"""
+    try:
+        return get_interval_seconds(interval)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _validate_strategy(strategy_type: str, parameters: Dict[str, Any]) -> None:
+    """사용자 정의 규칙 전략(custom)은 캔들 조회/작업 등록 전에 컴파일해 규칙 오류를 400으로 반환"""
+    if strategy_type != "custom":
+        return
+    try:
+        compile_rules(parameters.get("rules", ""), parameters)
+    except StrategyRuleError as e:
+        raise HTTPException(status_code=400, detail=f"전략 규칙 오류: {str(e)}")
+
+
+def _submit_backtest_job(request: BacktestRequest, user: Optional[dict] = None):
+    """
+    백테스트 작업 등록
+    캔들 조회와 엔진 실행은 작업 안에서 진행되며, 같은 요청의 결과가 캐시에 있으면 바로 완료됩니다.
+    user(JWT 페이로드)가 주어지면 완료된 결과를 실행 이력으로 저장합니다.
+    """
+    _validate_strategy(request.strategyType, request.parameters)
+    
+    # 날짜 범위 계산
+    start_date = datetime.fromisoformat(request.startDate)
+    end_date = datetime.fromisoformat(request.endDate)
+    initial_capital = request.initialCapital if request.initialCapital else 10000000.0
+    interval_seconds = _interval_seconds(request.interval)
+    
+    async def load_candles() -> Candles:
+        return await _fetch_backtest_candles(
+            request.symbol, request.interval, start_date, end_date
+        )
+    
+    load_intrabar = None
+    execution = request.execution or "close"
+    if execution not in ("close", "intrabar"):
+        raise HTTPException(status_code=400, detail=f"지원하지 않는 체결 방식입니다: {execution}")
+    if execution == "intrabar":
+        intrabar_interval = request.intrabarInterval or "1m"
+        try:
+            intrabar_seconds = fixed_interval_seconds(intrabar_interval)
+        except ValueError:
+            intrabar_seconds = None
+        # 월 단위처럼 길이가 일정하지 않은 간격은 봉 내부 체결을 지원하지 않음
+        if (
+            not intrabar_seconds
+            or fixed_interval_seconds(request.interval) is None
+            or intrabar_seconds >= interval_seconds
+            or interval_seconds % intrabar_seconds
+        ):
+            raise HTTPException(
+                status_code=400,
+                detail=f"하위 봉 간격({intrabar_interval})은 캔들 간격({request.interval})을 나누어떨어지게 하는 더 작은 간격이어야 합니다."
+            )
+        
+        async def load_intrabar() -> Candles:
+            # 마지막 신호 봉 내부까지 포함하도록 봉 길이만큼 더 조회
+            return await get_klines_range(
+                request.symbol,
+                intrabar_interval,
+                int(start_date.timestamp()),
+                int(end_date.timestamp()) + interval_seconds - 1,
+            )
+    
+    return get_job_manager().submit(
+        load_candles,
+        request=request.model_dump(),
+        strategy_type=request.strategyType,
+        parameters=request.parameters,
+        initial_capital=initial_capital,
+        commission=0.001,
+        max_points=request.maxPoints,
+        cache_key=cache_key("backtest", {**request.model_dump(), "commission": 0.001}),
+        # 아직 마감되지 않은 마지막 캔들이 포함된 결과는 그 캔들이 마감될 때 만료
+        expiry=lambda candles: forming_candle_expiry(
+            int(candles.time[-1]), candle_length(int(candles.time[-1]), request.interval)
+        ),
+        load_intrabar=load_intrabar,
+        bar_seconds=interval_seconds,
+        with_record=user is not None,
+        on_complete=(lambda job: schedule_save(user, job.request, job.record)) if user is not None else None,
+    )
+
+
 @router.post("/backtest", response_model=BacktestResponse)
-async def run_backtest(request: BacktestRequest):
+async def run_backtest(
+    request: BacktestRequest,
+    http_request: Request,
+    current_user: Optional[dict] = Depends(get_optional_user_from_token),
+):
     """
     백테스트 실행
     과거 데이터를 기반으로 전략의 성과를 시뮬레이션합니다.
+    엔진은 작업 큐의 전용 프로세스 풀에서 실행되며, 같은 요청의 결과는 캐시에서 직렬화된 응답 그대로 반환합니다.
+    클라이언트가 연결을 끊으면 작업을 취소하고, 대기열이 가득 차면 429를 반환합니다.
+    로그인한 경우 결과를 실행 이력(GET /history)에 저장합니다.
     """
     try:
-        # 날짜 범위 계산
+        manager = get_job_manager()
+        job = _submit_backtest_job(request, current_user)
+        body = await manager.wait(job, disconnected=http_request.is_disconnected)
+        return Response(content=body, media_type="application/json")
+    except HTTPException:
+        raise
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": QUEUE_RETRY_AFTER})
+    except TaskResourceError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except JobCancelledError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"백테스트 실행 중 오류 발생: {str(e)}")
+
+
+@router.post("/jobs", response_model=BacktestJobStatus, status_code=202)
+async def submit_backtest_job(
+    request: BacktestRequest,
+    current_user: Optional[dict] = Depends(get_optional_user_from_token),
+):
+    """
+    백테스트 작업 등록
+    작업 ID를 즉시 반환하며, 상태/진행률은 GET /jobs/{jobId}, 결과는 GET /jobs/{jobId}/result로 조회합니다.
+    로그인한 경우 완료된 결과를 실행 이력에 저장합니다.
+    """
+    try:
+        job = _submit_backtest_job(request, current_user)
+        return BacktestJobStatus(**job.to_dict())
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": QUEUE_RETRY_AFTER})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _get_job_or_404(job_id: str):
+    job = get_job_manager().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다.")
+    return job
+
+
+@router.get("/jobs/{job_id}", response_model=BacktestJobStatus)
+async def get_backtest_job(job_id: str):
+    """백테스트 작업 상태/진행률 조회"""
+    return BacktestJobStatus(**_get_job_or_404(job_id).to_dict())
+
+
+@router.get("/jobs/{job_id}/result", response_model=BacktestResponse)
+async def get_backtest_job_result(job_id: str):
+    """완료된 백테스트 작업 결과 조회"""
+    job = _get_job_or_404(job_id)
+    if job.status == JOB_FAILED:
+        raise HTTPException(status_code=422, detail=f"백테스트 실행 중 오류 발생: {job.error}")
+    if job.result is None:
+        raise HTTPException(status_code=409, detail=f"작업이 완료되지 않았습니다 (상태: {job.status}).")
+    return Response(content=job.result, media_type="application/json")
+
+
+@router.delete("/jobs/{job_id}", response_model=BacktestJobStatus)
+async def cancel_backtest_job(job_id: str):
+    """백테스트 작업 취소 (이미 끝난 작업은 그대로 반환)"""
+    _get_job_or_404(job_id)
+    return BacktestJobStatus(**get_job_manager().cancel(job_id).to_dict())
+
+
+@router.get("/backtest/cache")
+async def get_backtest_cache_stats():
+    """백테스트 결과 캐시 적중/실패 통계"""
+    return get_result_cache().info()
+
+
+STREAM_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
+
+
+@router.post("/backtest/incremental", response_model=IncrementalBacktestResponse)
+async def run_incremental_backtest(request: BacktestRequest):
+    """
+    증분 백테스트 (성과 지표 + 월간 수익률)
+    같은 설정(심볼/간격/시작일/전략/파라미터/초기 자본)의 이전 실행 체크포인트가 있으면
+    체크포인트 이후 캔들만 조회/처리하므로, 종료일만 늘어나는 반복 조회는 새 캔들 수에 비례하는 시간이 걸립니다.
+    마감된 캔들까지의 상태는 다시 체크포인트로 저장합니다.
+    """
+    _validate_strategy(request.strategyType, request.parameters)
+    try:
         start_date = datetime.fromisoformat(request.startDate)
         end_date = datetime.fromisoformat(request.endDate)
+        initial_capital = request.initialCapital if request.initialCapital else 10000000.0
+        interval_seconds = _interval_seconds(request.interval)
+        
+        # 체크포인트는 종료일과 무관한 설정 단위로 저장
+        store = get_checkpoint_store()
+        key = cache_key("checkpoint", {
+            "symbol": request.symbol,
+            "interval": request.interval,
+            "startDate": request.startDate,
+            "strategyType": request.strategyType,
+            "parameters": request.parameters,
+            "initialCapital": initial_capital,
+            "commission": 0.001,
+        })
+        body = await asyncio.to_thread(store.get, key)
+        checkpoint = await asyncio.to_thread(BacktestCheckpoint.from_bytes, body) if body is not None else None
         
-        # 기간에 따른 limit 계산 (대략적으로)
-        days_diff = (end_date - start_date).days
-        interval_map = {
-            "1m": 1440,  # 하루당 분 수
-            "5m": 288,
-            "15m": 96,
-            "1h": 24,
-            "4h": 6,
-            "1d": 1,
-        }
-        limit = min(days_diff * interval_map.get(request.interval, 1), 1000)
-        
-        # Binance에서 과거 데이터 가져오기
-        klines = await get_klines(
-            symbol=request.symbol,
-            interval=request.interval,
-            limit=limit,
+        candles = None
+        if checkpoint is not None and checkpoint.last_time <= int(end_date.timestamp()):
+            # 체크포인트 마지막 캔들부터만 조회 (마지막 캔들 값이 그대로인지 확인용으로 포함)
+            candles = await _fetch_backtest_candles(
+                request.symbol,
+                request.interval,
+                datetime.fromtimestamp(checkpoint.last_time, tz=end_date.tzinfo),
+                end_date,
+            )
+            if checkpoint.locate(candles) is None:
+                candles = None
+        if candles is None:
+            checkpoint = None
+            candles = await _fetch_backtest_candles(
+                request.symbol, request.interval, start_date, end_date
+            )
+        
+        # 단건 백테스트와 같은 전용 풀 / 실행 슬롯 / 리소스 제한으로 실행
+        with SharedCandles(candles) as handle:
+            result, checkpoint_body = await get_job_manager().run_task(
+                run_incremental_task,
+                handle,
+                body if checkpoint is not None else None,
+                request.strategyType,
+                request.parameters,
+                initial_capital,
+                0.001,
+                # 마감되지 않은 캔들은 체크포인트에 포함하지 않음
+                time.time() - interval_seconds,
+            )
+        if checkpoint_body is not None:
+            await asyncio.to_thread(store.put, key, checkpoint_body)
+        return IncrementalBacktestResponse(initialCapital=initial_capital, **result)
+    except HTTPException:
+        raise
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": QUEUE_RETRY_AFTER})
+    except TaskResourceError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"백테스트 실행 중 오류 발생: {str(e)}")
+
+
+def _format_stream_event(event: Dict[str, Any], stream_format: str) -> str:
+    """스트림 이벤트 한 건을 NDJSON 한 줄 또는 SSE 메시지로 변환"""
+    data = json.dumps(event, ensure_ascii=False, separators=(",", ":"))
+    if stream_format == "sse":
+        return f"event: {event['type']}\ndata: {data}\n\n"
+    return data + "\n"
+
+
+@router.post("/backtest/stream")
+async def stream_backtest(
+    request: BacktestRequest,
+    format: str = Query("ndjson", description="ndjson 또는 sse"),
+    chunkSize: int = Query(5000, ge=100, le=100000, description="이벤트당 캔들 수"),
+):
+    """
+    스트리밍 백테스트
+    거래를 진행하면서 캔들 / 자산 곡선 / 매매 신호를 구간("chunk") 단위로 전송하고,
+    마지막에 성과 지표("result")를 전송합니다. 전체 결과를 한 번에 만들지 않으므로
+    캔들 수가 많아도 첫 응답 시간과 메모리 사용량이 일정합니다.
+    """
+    if format not in STREAM_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"지원하지 않는 스트림 형식입니다: {format}")
+    _validate_strategy(request.strategyType, request.parameters)
+    
+    try:
+        start_date = datetime.fromisoformat(request.startDate)
+        end_date = datetime.fromisoformat(request.endDate)
+        
+        filtered_klines = await _fetch_backtest_candles(
+            request.symbol, request.interval, start_date, end_date
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"백테스트 실행 중 오류 발생: {str(e)}")
+    
+    # 대기열이 가득 찼으면 응답을 시작하기 전에 429 반환
+    manager = get_job_manager()
+    try:
+        manager.check_capacity()
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": QUEUE_RETRY_AFTER})
+    
+    initial_capital = request.initialCapital if request.initialCapital else 10000000.0
+    engine = BacktestEngine(initial_capital=initial_capital, commission=0.001, use_signal_cache=True)
+    
+    async def events():
+        # 응답 헤더를 보낸 뒤의 오류는 상태 코드로 알릴 수 없으므로 "error" 이벤트로 전송
+        try:
+            # 단건 백테스트 작업과 같은 실행 슬롯을 차지한 동안만 계산하고,
+            # 구간 계산은 이벤트 루프를 막지 않도록 스레드에서 실행
+            async with manager.slot():
+                stream = engine.stream(
+                    filtered_klines,
+                    strategy_type=request.strategyType,
+                    parameters=request.parameters,
+                    initial_capital=initial_capital,
+                    chunk_size=chunkSize,
+                )
+                while True:
+                    event = await asyncio.to_thread(next, stream, None)
+                    if event is None:
+                        break
+                    yield _format_stream_event(event, format)
+        except Exception as e:
+            yield _format_stream_event(
+                {"type": "error", "detail": f"백테스트 실행 중 오류 발생: {str(e)}"}, format
+            )
+    
+    return StreamingResponse(events(), media_type=STREAM_MEDIA_TYPES[format])
+
+
+@router.post("/sweep", response_model=SweepResponse)
+async def run_parameter_sweep(request: SweepRequest):
+    """
+    파라미터 스윕
+    캔들을 한 번만 조회한 뒤 파라미터 조합 전체를 프로세스 풀에서 병렬로 백테스트하고,
+    sortBy 지표 기준 상위 결과를 반환합니다.
+    """
+    try:
+        start_date = datetime.fromisoformat(request.startDate)
+        end_date = datetime.fromisoformat(request.endDate)
+        sort_by = request.sortBy or "totalReturn"
+        if sort_by not in METRIC_KEYS:
+            raise HTTPException(status_code=400, detail=f"지원하지 않는 정렬 기준입니다: {sort_by}")
+        
+        try:
+            combinations = expand_grid(request.strategyType, request.parameterRanges)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        for parameters in combinations:
+            _validate_strategy(request.strategyType, parameters)
+        
+        candles = await _fetch_backtest_candles(
+            request.symbol, request.interval, start_date, end_date
+        )
+        
+        initial_capital = request.initialCapital if request.initialCapital else 10000000.0
+        metrics = await run_sweep(
+            candles=candles,
+            strategy_type=request.strategyType,
+            combinations=combinations,
+            initial_capital=initial_capital,
+            commission=0.001,
         )
         
-        if not klines:
+        results = rank_results(combinations, metrics, sort_by, request.top or 0)
+        
+        return SweepResponse(
+            strategyType=request.strategyType,
+            sortBy=sort_by,
+            totalCombinations=len(combinations),
+            results=results,
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"파라미터 스윕 중 오류 발생: {str(e)}")
+
+
+@router.post("/walk-forward", response_model=WalkForwardResponse)
+async def run_walk_forward_backtest(request: WalkForwardRequest):
+    """
+    워크 포워드 최적화
+    기간을 롤링 in-sample / out-of-sample 구간으로 나누어 in-sample에서 최적화한 파라미터로
+    다음 out-of-sample 구간을 평가하고, out-of-sample 자산 곡선을 이어 붙인 결과를 반환합니다.
+    """
+    try:
+        start_date = datetime.fromisoformat(request.startDate)
+        end_date = datetime.fromisoformat(request.endDate)
+        objective = request.objective or "totalReturn"
+        if objective not in METRIC_KEYS:
+            raise HTTPException(status_code=400, detail=f"지원하지 않는 최적화 기준입니다: {objective}")
+        
+        try:
+            combinations = expand_grid(request.strategyType, request.parameterRanges)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        for parameters in combinations:
+            _validate_strategy(request.strategyType, parameters)
+        
+        candles = await _fetch_backtest_candles(
+            request.symbol, request.interval, start_date, end_date
+        )
+        
+        initial_capital = request.initialCapital if request.initialCapital else 10000000.0
+        try:
+            result = await run_walk_forward(
+                candles=candles,
+                strategy_type=request.strategyType,
+                combinations=combinations,
+                in_sample_bars=request.inSampleBars,
+                out_of_sample_bars=request.outOfSampleBars,
+                step_bars=request.stepBars or 0,
+                objective=objective,
+                initial_capital=initial_capital,
+                commission=0.001,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        if request.maxPoints:
+            result = downsample_result(result, request.maxPoints)
+        return WalkForwardResponse(**serialize_result(result))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"워크 포워드 실행 중 오류 발생: {str(e)}")
+
+
+@router.post("/monte-carlo", response_model=MonteCarloResponse)
+async def run_monte_carlo_simulation(request: MonteCarloRequest):
+    """
+    몬테카를로 시뮬레이션
+    백테스트를 실행한 뒤 거래 수익률을 리샘플링하여 최종 자산 / 최대 낙폭 / 샤프 지수의 분포를 반환합니다.
+    """
+    try:
+        _validate_strategy(request.strategyType, request.parameters)
+        start_date = datetime.fromisoformat(request.startDate)
+        end_date = datetime.fromisoformat(request.endDate)
+        
+        candles = await _fetch_backtest_candles(
+            request.symbol, request.interval, start_date, end_date
+        )
+        
+        initial_capital = request.initialCapital if request.initialCapital else 10000000.0
+        # 백테스트는 단건 백테스트와 같은 전용 풀 / 실행 슬롯 / 리소스 제한으로 실행
+        with SharedCandles(candles) as handle:
+            metrics, trades = await get_job_manager().run_task(
+                backtest_trades, handle, request.strategyType, request.parameters, initial_capital, 0.001
+            )
+        
+        years = (int(candles.time[-1]) - int(candles.time[0])) / (365.25 * 24 * 60 * 60)
+        try:
+            result = await run_monte_carlo(
+                trades,
+                initial_capital=initial_capital,
+                commission=0.001,
+                simulations=request.simulations or 1000,
+                method=request.method or "bootstrap",
+                years=years,
+                percentiles=request.percentiles,
+                seed=request.seed,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        return MonteCarloResponse(backtest=metrics, **result)
+    except HTTPException:
+        raise
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": QUEUE_RETRY_AFTER})
+    except TaskResourceError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"몬테카를로 시뮬레이션 중 오류 발생: {str(e)}")
+
+
+@router.post("/portfolio-backtest", response_model=PortfolioBacktestResponse)
+async def run_portfolio_backtest_endpoint(request: PortfolioBacktestRequest):
+    """
+    포트폴리오 백테스트
+    여러 심볼의 캔들을 동시에 조회해 공통 시간축으로 정렬한 뒤, 목표 비중으로 자본을 나누어
+    같은 전략을 적용하고 포트폴리오 자산 곡선과 심볼별 기여도를 반환합니다.
+    """
+    try:
+        symbols = list(dict.fromkeys(request.symbols))
+        if not symbols:
+            raise HTTPException(status_code=400, detail="심볼을 하나 이상 지정해주세요.")
+        if len(symbols) > MAX_PORTFOLIO_SYMBOLS:
             raise HTTPException(
-                status_code=404,
-                detail="데이터를 가져올 수 없습니다. 심볼과 기간을 확인해주세요."
+                status_code=400,
+                detail=f"심볼은 최대 {MAX_PORTFOLIO_SYMBOLS}개까지 지정할 수 있습니다."
             )
+        _validate_strategy(request.strategyType, request.parameters)
         
-        # 날짜 필터링 (Binance API는 최신 데이터부터 반환)
-        filtered_klines = []
-        start_timestamp = int(start_date.timestamp())
-        end_timestamp = int(end_date.timestamp())
+        start_date = datetime.fromisoformat(request.startDate)
+        end_date = datetime.fromisoformat(request.endDate)
         
-        for kline in klines:
-            if start_timestamp <= kline["time"] <= end_timestamp:
-                filtered_klines.append(kline)
+        # 심볼별 조회는 서로 독립이므로 동시에 실행 (동시 요청 수는 제한)
+        semaphore = asyncio.Semaphore(PORTFOLIO_FETCH_CONCURRENCY)
         
-        # 시간순 정렬
-        filtered_klines.sort(key=lambda x: x["time"])
+        async def fetch(symbol: str) -> Candles:
+            async with semaphore:
+                return await _fetch_backtest_candles(symbol, request.interval, start_date, end_date)
         
-        if not filtered_klines:
+        fetched = await asyncio.gather(*(fetch(symbol) for symbol in symbols), return_exceptions=True)
+        candles_by_symbol = {}
+        failed_symbols = []
+        for symbol, candles in zip(symbols, fetched):
+            if isinstance(candles, Exception):
+                failed_symbols.append(symbol)
+            else:
+                candles_by_symbol[symbol] = candles
+        if not candles_by_symbol:
             raise HTTPException(
                 status_code=404,
-                detail="선택한 기간에 해당하는 데이터가 없습니다."
+                detail="데이터를 가져올 수 없습니다. 심볼과 기간을 확인해주세요."
             )
         
-        # 백테스트 실행
         initial_capital = request.initialCapital if request.initialCapital else 10000000.0
-        engine = BacktestEngine(initial_capital=initial_capital, commission=0.001)
-        result = engine.run(
-            klines=filtered_klines,
-            strategy_type=request.strategyType,
-            parameters=request.parameters,
-            initial_capital=initial_capital,
-        )
+        try:
+            # 단건 백테스트와 같은 전용 풀 / 실행 슬롯 / 리소스 제한으로 실행
+            with ExitStack() as stack:
+                handles = {
+                    symbol: stack.enter_context(SharedCandles(candles))
+                    for symbol, candles in candles_by_symbol.items()
+                }
+                result = await get_job_manager().run_task(
+                    run_portfolio_task,
+                    handles,
+                    request.strategyType,
+                    request.parameters,
+                    initial_capital,
+                    0.001,
+                    request.weights,
+                    request.rebalanceEvery or 0,
+                )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
-        return BacktestResponse(**result)
+        result["failedSymbols"] = failed_symbols
+        if request.maxPoints:
+            result = downsample_result(result, request.maxPoints)
+        return PortfolioBacktestResponse(**serialize_result(result))
     except HTTPException:
         raise
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": QUEUE_RETRY_AFTER})
+    except TaskResourceError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"백테스트 실행 중 오류 발생: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"포트폴리오 백테스트 실행 중 오류 발생: {str(e)}")
 
 
-@router.get("/history")
-async def get_strategy_history():
+@router.get("/history", response_model=HistoryPage)
+def get_strategy_history(
+    limit: int = Query(default=20, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: dict = Depends(get_current_user_from_token),
+    db: Session = Depends(get_db),
+):
     """
-    전략 실행 이력 조회
+    전략 실행 이력 조회 (최신순, 요약 지표만)
+    다음 페이지는 응답의 nextCursor를 cursor로 전달해 조회합니다.
     """
-    return {
-        "history": []
-    }
+    try:
+        return list_history(db, current_user.get("sub", ""), limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"실행 이력 조회 중 오류 발생: {str(e)}")
+
+
+@router.get("/history/{result_id}", response_model=HistoryDetail)
+def get_strategy_history_detail(
+    result_id: str,
+    current_user: dict = Depends(get_current_user_from_token),
+    db: Session = Depends(get_db),
+):
+    """실행 이력 단건 조회 (자산 곡선 / 거래 내역 / 월간 수익률 포함)"""
+    try:
+        detail = get_history_detail(db, current_user.get("sub", ""), result_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"실행 이력 조회 중 오류 발생: {str(e)}")
+    if detail is None:
+        raise HTTPException(status_code=404, detail="실행 이력을 찾을 수 없습니다.")
+    return detail
 
@@ -103,9 +103,9 @@ def create_backtest_result_example(strategy_id: str, user_id: str):
             win_rate=60.0,
             max_drawdown=5.0,
             sharpe_ratio=1.5,
-            equity_curve=[{"date": "2024-01-01", "equity": 10000}],
+            equity_curve=[{"time": 1704067200, "value": 10000.0}],  # 압축 바이너리로 저장됨
             trades=[],
-            monthly_returns={}
+            monthly_returns=[]
         )
         db.add(backtest_result)
         db.commit()
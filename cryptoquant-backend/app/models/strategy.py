@@ -1,7 +1,8 @@
-from sqlalchemy import Column, String, Text, Float, Integer, DateTime, ForeignKey, JSON, Boolean
+from sqlalchemy import Column, String, Text, Float, Integer, DateTime, ForeignKey, JSON, Boolean, LargeBinary, Index
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 from app.database import Base
+from app.services.result_codec import decode_curve, decode_trades, encode_curve, encode_trades
 
 
 class Strategy(Base):
@@ -17,7 +18,7 @@ class Strategy(Base):
     symbol = Column(String, nullable=False)  # 거래할 암호화폐 심볼 (예: BTCUSDT)
     interval = Column(String, nullable=False)  # 차트 간격 (예: 1h, 4h, 1d)
     strategy_type = Column(String, nullable=False)  # 전략 타입
-    parameters = Column(JSON, nullable=True)  # 전략 파라미터 (JSON 형태)
+    parameters = Column(JSON, nullable=True)  # 전략 파라미터 (JSON 형태, custom 전략은 {"rules": 규칙 문자열, 규칙에 쓰인 파라미터...})
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -29,6 +30,15 @@ class Strategy(Base):
         return f"<Strategy(id={self.id}, name={self.name}, symbol={self.symbol})>"
 
 
+# 백테스트 이력 목록의 키셋 정렬 키와 요약 컬럼 (키가 아닌 요약 컬럼은 커버링 인덱스에 INCLUDE)
+HISTORY_KEY = ("user_id", "created_at", "id")
+HISTORY_COLUMNS = (
+    "id", "symbol", "interval", "strategy_type", "start_date", "end_date",
+    "initial_capital", "final_equity", "total_return", "total_trades",
+    "win_rate", "max_drawdown", "sharpe_ratio", "created_at",
+)
+
+
 class BacktestResult(Base):
     """
     백테스트 결과 모델
@@ -36,10 +46,15 @@ class BacktestResult(Base):
     __tablename__ = "backtest_results"
 
     id = Column(String, primary_key=True, index=True)
-    strategy_id = Column(String, ForeignKey("strategies.id"), nullable=False, index=True)
-    user_id = Column(String, ForeignKey("users.id"), nullable=False, index=True)
+    # 저장된 전략 없이 실행한 백테스트는 strategy_id 없이 전략 정보만 기록
+    strategy_id = Column(String, ForeignKey("strategies.id"), nullable=True, index=True)
+    user_id = Column(String, ForeignKey("users.id"), nullable=False)
     
     # 백테스트 설정
+    symbol = Column(String, nullable=True)
+    interval = Column(String, nullable=True)
+    strategy_type = Column(String, nullable=True)
+    parameters = deferred(Column(JSON, nullable=True), group="detail")
     start_date = Column(DateTime(timezone=True), nullable=False)
     end_date = Column(DateTime(timezone=True), nullable=False)
     initial_capital = Column(Float, nullable=False)
@@ -54,16 +69,54 @@ class BacktestResult(Base):
     max_drawdown = Column(Float, nullable=False)  # 최대 낙폭 (%)
     sharpe_ratio = Column(Float, nullable=True)  # 샤프 비율
     
-    # 상세 결과 데이터 (JSON 형태로 저장)
-    equity_curve = Column(JSON, nullable=True)  # 자산 곡선 데이터
-    trades = Column(JSON, nullable=True)  # 거래 내역
-    monthly_returns = Column(JSON, nullable=True)  # 월별 수익률
+    # 상세 결과 데이터 (열 기반 압축 바이너리, app/services/result_codec.py)
+    # 목록 조회에서 읽지 않도록 지연 로딩(deferred)하며, 아래 속성에 접근할 때 한 번에 로드 / 디코딩합니다.
+    equity_curve_data = deferred(Column(LargeBinary, nullable=True), group="detail")  # 자산 곡선
+    trades_data = deferred(Column(LargeBinary, nullable=True), group="detail")  # 거래 내역
+    monthly_returns_data = deferred(Column(LargeBinary, nullable=True), group="detail")  # 월별 수익률
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    __table_args__ = (
+        # (user_id, created_at, id) 키셋 페이지네이션용 커버링 인덱스 (PostgreSQL은 index-only scan)
+        Index(
+            "ix_backtest_results_user_history",
+            *HISTORY_KEY,
+            postgresql_include=[c for c in HISTORY_COLUMNS if c not in HISTORY_KEY],
+        ),
+    )
+
     # 관계 설정
     strategy = relationship("Strategy", back_populates="backtest_results")
 
+    @property
+    def equity_curve(self):
+        """자산 곡선 (Curve)"""
+        return decode_curve(self.equity_curve_data)
+
+    @equity_curve.setter
+    def equity_curve(self, curve):
+        self.equity_curve_data = encode_curve(curve)
+
+    @property
+    def trades(self):
+        """거래 내역 (type / time / price / quantity dict 리스트)"""
+        return decode_trades(self.trades_data)
+
+    @trades.setter
+    def trades(self, trades):
+        self.trades_data = encode_trades(trades)
+
+    @property
+    def monthly_returns(self):
+        """월별 수익률 ({"time", "value"} dict 리스트)"""
+        curve = decode_curve(self.monthly_returns_data)
+        return curve.to_dicts() if curve is not None else None
+
+    @monthly_returns.setter
+    def monthly_returns(self, monthly_returns):
+        self.monthly_returns_data = encode_curve(monthly_returns)
+
     def __repr__(self):
         return f"<BacktestResult(id={self.id}, strategy_id={self.strategy_id}, total_return={self.total_return}%)>"
 
@@ -0,0 +1,322 @@
+"""
+성과 분석 서비스
+자산 가치 배열 하나에서 성과 지표와 파생 곡선(누적 수익률, 낙폭, 월간 수익률)을
+한 번의 벡터 연산 단계로 계산합니다. 봉별 수익률/고점/낙폭 배열은 한 번만 만들어 모든 지표가 공유합니다.
+"""
+import copy
+import math
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+SECONDS_PER_DAY = 24 * 60 * 60
+SECONDS_PER_YEAR = 365.25 * SECONDS_PER_DAY
+# 샤프/소르티노 연율화 계수 (기존 샤프 지수 계산과 동일)
+ANNUALIZATION = math.sqrt(252)
+
+
+def month_index(time: np.ndarray) -> np.ndarray:
+    """
+    Unix timestamp(초, UTC) 배열을 월 번호(연도 x 12 + 월 - 1)로 변환
+    datetime 객체를 만들지 않고 정수 연산(일수 -> 그레고리력 연/월 변환)으로 계산합니다.
+    """
+    days = np.asarray(time, dtype=np.int64) // SECONDS_PER_DAY
+    z = days + 719468
+    era = z // 146097
+    day_of_era = z - era * 146097
+    year_of_era = (
+        day_of_era - day_of_era // 1460 + day_of_era // 36524 - day_of_era // 146096
+    ) // 365
+    day_of_year = day_of_era - (365 * year_of_era + year_of_era // 4 - year_of_era // 100)
+    shifted_month = (5 * day_of_year + 2) // 153  # 3월 = 0
+    month = np.where(shifted_month < 10, shifted_month + 3, shifted_month - 9)
+    year = year_of_era + era * 400 + (month <= 2)
+    return year * 12 + (month - 1)
+
+
+def monthly_returns(time: np.ndarray, values: np.ndarray) -> List[Dict[str, Any]]:
+    """월별 (첫 자산 가치 -> 마지막 자산 가치) 수익률. time은 오름차순이어야 합니다."""
+    if len(values) < 2:
+        return []
+    months = month_index(time)
+    starts = np.flatnonzero(np.diff(months, prepend=months[0] - 1))
+    ends = np.append(starts[1:], len(values)) - 1
+    start_values = values[starts]
+    valid = start_values > 0
+    returns = (values[ends][valid] - start_values[valid]) / start_values[valid] * 100
+    return [
+        {"time": t, "value": round(r, 2)}
+        for t, r in zip(time[starts][valid].tolist(), returns.tolist())
+    ]
+
+
+def exposure_ratio(time: np.ndarray, trades: List[Dict[str, Any]]) -> float:
+    """
+    포지션을 보유한 봉의 비율 (%)
+    매수 봉부터 매도 봉 직전까지를 보유 구간으로 보며, 여러 심볼의 구간이 겹쳐도 한 번만 셉니다.
+    """
+    n = len(time)
+    if not n or not trades:
+        return 0.0
+    buys = [t["time"] for t in trades if t["type"] == "buy"]
+    sells = [t["time"] for t in trades if t["type"] == "sell"]
+    counts = np.zeros(n + 1, dtype=np.int64)
+    np.add.at(counts, np.searchsorted(time, buys), 1)
+    np.add.at(counts, np.searchsorted(time, sells[: len(buys)]), -1)
+    held = np.cumsum(counts[:n]) > 0
+    return float(held.mean() * 100)
+
+
+def _win_rate(trades: List[Dict[str, Any]], total_trades: int) -> float:
+    """직전 매수가보다 높은 가격에 매도한 거래 비율 (거래 목록은 매수/매도가 번갈아 기록됨)"""
+    if len(trades) < 2 or total_trades == 0:
+        return 0.0
+    prices = np.array([t["price"] for t in trades], dtype=np.float64)
+    sells = prices[1::2]
+    buys = prices[0::2][: len(sells)]
+    return float(np.count_nonzero(sells > buys)) / total_trades * 100
+
+
+def _risk_ratios(avg_return: float, std_return: float, downside_deviation: float):
+    """(샤프, 소르티노) - 편차가 0이면 0"""
+    sharpe_ratio = avg_return / std_return * ANNUALIZATION if std_return > 0 else 0.0
+    sortino_ratio = avg_return / downside_deviation * ANNUALIZATION if downside_deviation > 0 else 0.0
+    return sharpe_ratio, sortino_ratio
+
+
+def _compose_metrics(
+    final_value: float,
+    initial_capital: float,
+    start_time: int,
+    end_time: int,
+    max_drawdown: float,
+    sharpe_ratio: float,
+    sortino_ratio: float,
+    total_trades: int,
+    win_rate: float,
+    exposure: float,
+) -> Dict[str, Any]:
+    """최종 자산 가치와 곡선 통계값으로 응답용(반올림) 성과 지표 생성"""
+    # 총 수익률 및 총 손익
+    total_return = ((final_value - initial_capital) / initial_capital) * 100
+    total_profit = final_value - initial_capital
+
+    # 일평균 수익률 / CAGR (연환산 수익률)
+    days = (end_time - start_time) / SECONDS_PER_DAY
+    daily_average_return = total_return / days if days > 0 else 0.0
+    years = (end_time - start_time) / SECONDS_PER_YEAR
+    if years > 0 and final_value > 0:
+        cagr = ((final_value / initial_capital) ** (1 / years) - 1) * 100
+    else:
+        cagr = 0.0
+
+    calmar_ratio = cagr / max_drawdown if max_drawdown > 0 else 0.0
+
+    return {
+        "totalReturn": round(total_return, 2),
+        "totalProfit": round(total_profit, 2),
+        "dailyAverageReturn": round(daily_average_return, 2),
+        "cagr": round(cagr, 2),
+        "totalTrades": total_trades,
+        "winRate": round(win_rate, 2),
+        "maxDrawdown": round(max_drawdown, 2),
+        "sharpeRatio": round(sharpe_ratio, 2),
+        "sortinoRatio": round(sortino_ratio, 2),
+        "calmarRatio": round(calmar_ratio, 2),
+        "exposureTime": round(exposure, 2),
+    }
+
+
+def analyze_equity(
+    time: np.ndarray,
+    values: np.ndarray,
+    initial_capital: float,
+    trades: List[Dict[str, Any]],
+    start_time: Optional[int] = None,
+    end_time: Optional[int] = None,
+    curves: bool = True,
+) -> Dict[str, Any]:
+    """
+    자산 곡선 성과 분석
+    start_time/end_time은 기간 기반 지표(일평균 수익률, CAGR)의 기준 구간이며 기본값은 곡선의 처음/끝입니다.
+    반환값의 "metrics"는 응답용으로 반올림한 지표이고, curves=True이면 "cumulativeReturnCurve"(%),
+    "drawdownCurve"(%), "monthlyReturns"를 함께 반환합니다.
+    """
+    n = len(values)
+    total_trades = sum(1 for t in trades if t["type"] == "sell")
+    if not n:
+        metrics = {
+            "totalReturn": 0.0,
+            "totalProfit": 0.0,
+            "dailyAverageReturn": 0.0,
+            "cagr": 0.0,
+            "totalTrades": 0,
+            "winRate": 0.0,
+            "maxDrawdown": 0.0,
+            "sharpeRatio": 0.0,
+            "sortinoRatio": 0.0,
+            "calmarRatio": 0.0,
+            "exposureTime": 0.0,
+        }
+        empty = np.empty(0)
+        return {
+            "metrics": metrics,
+            "cumulativeReturnCurve": empty,
+            "drawdownCurve": empty,
+            "monthlyReturns": [],
+        }
+
+    start_time = int(time[0]) if start_time is None else start_time
+    end_time = int(time[-1]) if end_time is None else end_time
+
+    # 낙폭: 초기 자본을 첫 고점으로 하는 누적 최고값 대비 하락률 (%)
+    peak = np.maximum.accumulate(np.maximum(values, initial_capital))
+    drawdown = (values - peak) / peak * 100
+    max_drawdown = abs(float(drawdown.min()))
+
+    # 봉별 수익률 한 벌로 샤프 / 소르티노 계산
+    sharpe_ratio = 0.0
+    sortino_ratio = 0.0
+    if n >= 2:
+        returns = (values[1:] - values[:-1]) / values[:-1]
+        avg_return = float(returns.mean())
+        deviations = returns - avg_return
+        std_return = math.sqrt(float(np.dot(deviations, deviations)) / len(returns))
+        downside = np.minimum(returns, 0.0)
+        downside_deviation = math.sqrt(float(np.dot(downside, downside)) / len(returns))
+        sharpe_ratio, sortino_ratio = _risk_ratios(avg_return, std_return, downside_deviation)
+
+    metrics = _compose_metrics(
+        final_value=float(values[-1]),
+        initial_capital=initial_capital,
+        start_time=start_time,
+        end_time=end_time,
+        max_drawdown=max_drawdown,
+        sharpe_ratio=sharpe_ratio,
+        sortino_ratio=sortino_ratio,
+        total_trades=total_trades,
+        win_rate=_win_rate(trades, total_trades),
+        exposure=exposure_ratio(time, trades),
+    )
+    if not curves:
+        return {"metrics": metrics}
+    return {
+        "metrics": metrics,
+        "cumulativeReturnCurve": (values - initial_capital) / initial_capital * 100,
+        "drawdownCurve": drawdown,
+        "monthlyReturns": monthly_returns(time, values),
+    }
+
+
+class EquityAccumulator:
+    """
+    구간 단위 자산 곡선 누적기
+    analyze_equity와 같은 지표를 전체 곡선 없이 계산할 수 있도록 누적 최고값, 최대 낙폭,
+    봉별 수익률의 합/제곱합, 월별 시작 가치만 유지합니다. update()는 추가된 구간 길이에만 비례합니다.
+    """
+
+    def __init__(self, initial_capital: float):
+        self.initial_capital = initial_capital
+        self.count = 0
+        self.last_value: Optional[float] = None
+        self.peak = initial_capital
+        self.max_drawdown = 0.0
+        self.return_count = 0
+        self.return_sum = 0.0
+        self.return_square_sum = 0.0
+        self.downside_square_sum = 0.0
+        self.months: List[Dict[str, Any]] = []  # 마감된 월의 수익률
+        self.month: Optional[int] = None  # 진행 중인 월 번호
+        self.month_start_time: Optional[int] = None
+        self.month_start_value: Optional[float] = None
+
+    def copy(self) -> "EquityAccumulator":
+        clone = copy.copy(self)
+        clone.months = list(self.months)
+        return clone
+
+    def update(self, time: np.ndarray, values: np.ndarray) -> None:
+        """time 오름차순의 자산 가치 구간 추가 (이전 구간 바로 뒤에 이어지는 구간이어야 함)"""
+        n = len(values)
+        if not n:
+            return
+
+        peak = np.maximum.accumulate(np.maximum(values, self.peak))
+        drawdown = (values - peak) / peak * 100
+        self.max_drawdown = max(self.max_drawdown, abs(float(drawdown.min())))
+        self.peak = float(peak[-1])
+
+        if self.last_value is None:
+            previous, current = values[:-1], values[1:]
+        else:
+            previous = np.concatenate(([self.last_value], values[:-1]))
+            current = values
+        if len(current):
+            returns = (current - previous) / previous
+            downside = np.minimum(returns, 0.0)
+            self.return_count += len(returns)
+            self.return_sum += float(returns.sum())
+            self.return_square_sum += float(np.dot(returns, returns))
+            self.downside_square_sum += float(np.dot(downside, downside))
+
+        # 월이 바뀌는 지점마다 진행 중인 월을 마감하고 새 월을 시작
+        months = month_index(time)
+        previous_month = self.month if self.month is not None else int(months[0]) - 1
+        for start in np.flatnonzero(np.diff(months, prepend=previous_month)).tolist():
+            end_value = float(values[start - 1]) if start > 0 else self.last_value
+            self._close_month(end_value)
+            self.month = int(months[start])
+            self.month_start_time = int(time[start])
+            self.month_start_value = float(values[start])
+
+        self.count += n
+        self.last_value = float(values[-1])
+
+    def _close_month(self, end_value: Optional[float]) -> None:
+        if self.month is None or end_value is None or not self.month_start_value > 0:
+            return
+        change = (end_value - self.month_start_value) / self.month_start_value * 100
+        self.months.append({"time": self.month_start_time, "value": round(change, 2)})
+
+    def monthly_returns(self) -> List[Dict[str, Any]]:
+        """monthly_returns()와 같은 형식의 월별 수익률 (진행 중인 월 포함)"""
+        if self.count < 2:
+            return []
+        current = self.copy()
+        current._close_month(self.last_value)
+        return current.months
+
+    def metrics(
+        self,
+        total_trades: int,
+        win_rate: float,
+        exposure: float,
+        start_time: int,
+        end_time: int,
+    ) -> Dict[str, Any]:
+        """
+        누적된 값으로 analyze_equity와 같은 성과 지표 계산
+        표준편차는 한 번에 누적한 합/제곱합으로 계산하므로 두 번 순회하는 계산과 반올림 전 값이 미세하게 다를 수 있습니다.
+        """
+        sharpe_ratio = 0.0
+        sortino_ratio = 0.0
+        if self.return_count:
+            avg_return = self.return_sum / self.return_count
+            variance = max(self.return_square_sum / self.return_count - avg_return * avg_return, 0.0)
+            sharpe_ratio, sortino_ratio = _risk_ratios(
+                avg_return,
+                math.sqrt(variance),
+                math.sqrt(self.downside_square_sum / self.return_count),
+            )
+        return _compose_metrics(
+            final_value=self.last_value if self.last_value is not None else self.initial_capital,
+            initial_capital=self.initial_capital,
+            start_time=start_time,
+            end_time=end_time,
+            max_drawdown=self.max_drawdown,
+            sharpe_ratio=sharpe_ratio,
+            sortino_ratio=sortino_ratio,
+            total_trades=total_trades,
+            win_rate=win_rate,
+            exposure=exposure,
+        )
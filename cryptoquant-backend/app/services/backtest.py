@@ -2,9 +2,63 @@
 백테스팅 서비스
 과거 데이터를 기반으로 전략의 성과를 시뮬레이션합니다.
 """
-from typing import List, Dict, Any, Optional
-from datetime import datetime
-import math
+from typing import List, Dict, Any, Callable, Iterator, Optional, Tuple
+
+import numpy as np
+
+from app.services.analytics import analyze_equity
+from app.services.candles import Candles, Curve
+from app.services.indicators import IndicatorSet
+from app.services.intrabar import IntrabarCandles, first_touch_above, touch_fill_prices
+from app.services.signal_cache import decode_signals, encode_signals, get_signal_cache, signal_key
+from app.services.strategy_dsl import compile_rules
+
+# 신호 배열 값 (int8)
+ACTION_HOLD = 0
+ACTION_BUY = 1
+ACTION_SELL = -1
+
+# 진행률 콜백을 호출하는 캔들 간격
+PROGRESS_CHUNK = 10000
+
+
+def _crossover_actions(fast: np.ndarray, slow: np.ndarray, valid_from: int) -> np.ndarray:
+    """
+    두 선의 교차 신호
+    fast가 slow를 상향 돌파하면 매수, 하향 돌파하면 매도 (valid_from 이전 봉은 hold)
+    """
+    actions = np.zeros(fast.shape, dtype=np.int8)
+    if len(fast) < 2:
+        return actions
+    
+    prev_fast, cur_fast = fast[:-1], fast[1:]
+    prev_slow, cur_slow = slow[:-1], slow[1:]
+    buy = (cur_fast > cur_slow) & (prev_fast <= prev_slow)
+    sell = (cur_fast < cur_slow) & (prev_fast >= prev_slow)
+    actions[1:][sell] = ACTION_SELL
+    actions[1:][buy] = ACTION_BUY
+    actions[:valid_from] = ACTION_HOLD
+    return actions
+
+
+def _breakout_actions(breakout: np.ndarray) -> np.ndarray:
+    """
+    돌파 봉에서 매수하고 다음 봉에서 매도하는 신호 (보유 중인 봉의 돌파는 건너뜀)
+    breakout이 (시간 x 심볼) 2차원이면 심볼별로 계산합니다.
+    """
+    n = len(breakout)
+    actions = np.zeros(breakout.shape, dtype=np.int8)
+    columns = [(actions, breakout)] if actions.ndim == 1 else zip(actions.T, breakout.T)
+    for column_actions, column_breakout in columns:
+        next_free = 0
+        for i in np.flatnonzero(column_breakout).tolist():
+            if i < next_free:
+                continue
+            column_actions[i] = ACTION_BUY
+            if i + 1 < n:
+                column_actions[i + 1] = ACTION_SELL
+            next_free = i + 2
+    return actions
 
 
 class BacktestEngine:
@@ -14,82 +68,289 @@ class BacktestEngine:
         self,
         initial_capital: float = 10000.0,
         commission: float = 0.001,  # 0.1% 수수료
+        use_signal_cache: bool = False,
     ):
         self.initial_capital = initial_capital
         self.commission = commission
+        # 같은 캔들/전략/파라미터의 신호 재사용 여부 (단건 실행 경로만 사용,
+        # 조합마다 파라미터가 다른 스윕/워크 포워드는 재사용되지 않는 항목만 쌓이므로 사용하지 않음)
+        self.use_signal_cache = use_signal_cache
         self.equity = initial_capital
         self.position = 0.0  # 보유 수량
         self.trades = []
-        self.equity_curve = []
+        self.equity_curve = Curve(np.empty(0), np.empty(0))
         self.trade_signals = []
         
     def run(
         self,
-        klines: List[Dict[str, Any]],
+        candles: Candles,
         strategy_type: str,
         parameters: Dict[str, Any],
         initial_capital: Optional[float] = None,
+        warmup: int = 0,
+        progress: Optional[Callable[[float], None]] = None,
+        intrabar: Optional[IntrabarCandles] = None,
     ) -> Dict[str, Any]:
-        """백테스트 실행"""
+        """
+        백테스트 실행
+        warmup: 앞쪽 캔들 중 지표 계산에만 쓰고 거래/성과에는 포함하지 않을 개수
+        progress: 거래 실행 진행률(0~1)을 받는 콜백. 예외를 발생시키면 실행이 중단됩니다.
+        intrabar: 캔들별 하위 봉 범위. 주어지면 봉 중간에 체결 가능한 전략(변동성 돌파)은
+                  하위 봉에서 기준가에 닿은 시점/가격으로 체결합니다.
+        """
+        traded = self._simulate(
+            candles, strategy_type, parameters, initial_capital, warmup, progress, intrabar
+        )
+        return self.report(traded)
+    
+    def report(self, candles: Candles) -> Dict[str, Any]:
+        """
+        현재 엔진 상태(자산 곡선, 거래 내역)로 결과 생성
+        candles는 자산 곡선과 같은 구간의 캔들입니다.
+        성과 지표와 누적 수익률/낙폭/월간 수익률은 자산 곡선 한 벌에서 함께 계산합니다.
+        """
+        analysis = self._analyze(candles, curves=True)
+        metrics = analysis["metrics"]
+        time = self.equity_curve.time
+        
+        return {
+            "initialCapital": self.initial_capital,
+            "totalReturn": metrics["totalReturn"],
+            "totalProfit": metrics["totalProfit"],
+            "dailyAverageReturn": metrics["dailyAverageReturn"],
+            "cumulativeReturn": metrics["totalReturn"],  # 누적 수익률은 totalReturn과 동일
+            "cagr": metrics["cagr"],
+            "totalTrades": metrics["totalTrades"],
+            "winRate": metrics["winRate"],
+            "maxDrawdown": metrics["maxDrawdown"],
+            "sharpeRatio": metrics["sharpeRatio"],
+            "sortinoRatio": metrics["sortinoRatio"],
+            "calmarRatio": metrics["calmarRatio"],
+            "exposureTime": metrics["exposureTime"],
+            "chartData": candles,
+            "equityCurve": self.equity_curve,
+            "cumulativeReturnCurve": Curve(time, analysis["cumulativeReturnCurve"]),
+            "drawdownCurve": Curve(time, analysis["drawdownCurve"]),
+            "monthlyReturns": analysis["monthlyReturns"],
+            "tradeSignals": self.trade_signals,
+        }
+    
+    def evaluate(
+        self,
+        candles: Candles,
+        strategy_type: str,
+        parameters: Dict[str, Any],
+        initial_capital: Optional[float] = None,
+        warmup: int = 0,
+        intrabar: Optional[IntrabarCandles] = None,
+    ) -> Dict[str, float]:
+        """
+        성과 지표만 계산하는 백테스트 (파라미터 스윕용)
+        곡선/월간 수익률 등 응답용 데이터는 만들지 않습니다.
+        """
+        traded = self._simulate(
+            candles, strategy_type, parameters, initial_capital, warmup, intrabar=intrabar
+        )
+        return self._calculate_metrics(traded)
+    
+    def stream(
+        self,
+        candles: Candles,
+        strategy_type: str,
+        parameters: Dict[str, Any],
+        initial_capital: Optional[float] = None,
+        chunk_size: int = 5000,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        스트리밍 백테스트
+        chunk_size개 캔들씩 거래를 실행하면서 해당 구간의 캔들 / 자산 / 누적 수익률 / 매매 신호를
+        "chunk" 이벤트로 내보내고, 마지막에 성과 지표와 월간 수익률을 "result" 이벤트로 내보냅니다.
+        dict 변환은 구간 단위로만 하므로 응답용 메모리는 캔들 수와 무관합니다.
+        """
+        candles, actions, fills = self._prepare(candles, strategy_type, parameters, initial_capital)
+        n = len(candles)
+        values = np.empty(n, dtype=np.float64)
+        chunk_size = max(1, chunk_size)
+        for start in range(0, n, chunk_size):
+            end = min(start + chunk_size, n)
+            signal_start = len(self.trade_signals)
+            values[start:end] = self._execute(candles, actions, fills, start, end)
+            if end == n:
+                # 마지막 구간은 잔여 포지션 청산을 반영한 뒤 내보냄
+                self.equity_curve = Curve(candles.time, values)
+                self._liquidate(candles)
+            equity = Curve(candles.time[start:end], values[start:end])
+            cumulative = Curve(equity.time, (equity.value - self.initial_capital) / self.initial_capital * 100)
+            yield {
+                "type": "chunk",
+                "chartData": candles[start:end].to_dicts(),
+                "equityCurve": equity.to_dicts(),
+                "cumulativeReturnCurve": cumulative.to_dicts(digits=2),
+                "tradeSignals": self.trade_signals[signal_start:],
+            }
+        
+        self.equity_curve = Curve(candles.time, values)
+        analysis = self._analyze(candles, curves=True)
+        metrics = analysis["metrics"]
+        yield {
+            "type": "result",
+            "initialCapital": self.initial_capital,
+            **metrics,
+            "cumulativeReturn": metrics["totalReturn"],
+            "monthlyReturns": analysis["monthlyReturns"],
+        }
+    
+    def _simulate(
+        self,
+        candles: Candles,
+        strategy_type: str,
+        parameters: Dict[str, Any],
+        initial_capital: Optional[float] = None,
+        warmup: int = 0,
+        progress: Optional[Callable[[float], None]] = None,
+        intrabar: Optional[IntrabarCandles] = None,
+    ) -> Candles:
+        """
+        신호 생성 및 거래 실행 (자산 곡선/거래 내역을 엔진 상태에 기록)
+        신호는 전체 캔들로 계산하고, 거래는 warmup 이후 구간에서만 실행합니다.
+        반환값은 실제로 거래한 구간의 캔들 뷰입니다.
+        """
+        candles, actions, fills = self._prepare(
+            candles, strategy_type, parameters, initial_capital, warmup, intrabar
+        )
+        n = len(candles)
+        if progress is None:
+            equity_values = self._execute(candles, actions, fills, 0, n)
+        else:
+            equity_values = []
+            for start in range(0, n, PROGRESS_CHUNK):
+                end = min(start + PROGRESS_CHUNK, n)
+                equity_values.extend(self._execute(candles, actions, fills, start, end))
+                progress(end / n)
+        self.equity_curve = Curve(candles.time, np.array(equity_values, dtype=np.float64))
+        self._liquidate(candles)
+        return candles
+    
+    def _prepare(
+        self,
+        candles: Candles,
+        strategy_type: str,
+        parameters: Dict[str, Any],
+        initial_capital: Optional[float] = None,
+        warmup: int = 0,
+        intrabar: Optional[IntrabarCandles] = None,
+    ) -> Tuple[Candles, np.ndarray, Optional[np.ndarray]]:
+        """
+        엔진 상태 초기화 및 신호 생성
+        warmup 이후 구간의 캔들 / 신호 / 체결 가격(None이면 종가 체결)을 반환합니다.
+        """
         if initial_capital is not None:
             self.initial_capital = initial_capital
         self.equity = self.initial_capital
         self.position = 0.0
         self.trades = []
-        self.equity_curve = []
         self.trade_signals = []
         
         # 전략별 신호 생성
-        signals = self._generate_signals(klines, strategy_type, parameters)
-        
-        # 신호 기반 거래 실행
-        for i, signal in enumerate(signals):
-            if signal["action"] == "buy" and self.position == 0:
+        if strategy_type != "volatility_breakout":
+            intrabar = None
+        actions, fills = self._signals(candles, strategy_type, parameters, intrabar)
+        if warmup > 0:
+            candles = candles[warmup:]
+            actions = actions[warmup:]
+            fills = fills[warmup:] if fills is not None else None
+        return candles, actions, fills
+    
+    def _signals(
+        self,
+        candles: Candles,
+        strategy_type: str,
+        parameters: Dict[str, Any],
+        intrabar: Optional[IntrabarCandles],
+    ) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        신호 / 체결 가격 계산
+        신호는 캔들과 전략/파라미터로만 결정되므로 신호 캐시에 있으면 초기 자본/수수료와 무관하게 재사용합니다.
+        캐시에서 가져온 배열은 읽기 전용입니다.
+        """
+        cache = get_signal_cache() if self.use_signal_cache else None
+        if cache is not None:
+            key = signal_key(candles, strategy_type, parameters, intrabar)
+            body = cache.get(key)
+            if body is not None:
+                return decode_signals(body)
+        
+        if intrabar is not None:
+            actions, fills = self._intrabar_breakout(candles, parameters, intrabar)
+        else:
+            actions, fills = self._generate_signals(candles, strategy_type, parameters), None
+        if cache is not None:
+            cache.put(key, encode_signals(actions, fills))
+        return actions, fills
+    
+    def _execute(
+        self,
+        candles: Candles,
+        actions: np.ndarray,
+        fills: Optional[np.ndarray],
+        start: int,
+        end: int,
+    ) -> List[float]:
+        """
+        [start, end) 구간의 신호대로 거래 실행 후 봉별 자산 가치 반환
+        포지션/현금은 엔진 상태에 유지되므로 구간을 나눠 순서대로 호출해도 결과가 같습니다.
+        fills가 주어지면 매수/매도는 그 가격으로 체결하고, 자산 가치는 종가로 평가합니다.
+        """
+        # 루프에서는 dict 조회 없이 파이썬 float 리스트만 사용
+        times = candles.time[start:end].tolist()
+        closes = candles.close[start:end].tolist()
+        prices = fills[start:end].tolist() if fills is not None else closes
+        equity_values = []
+        for i, action in enumerate(actions[start:end].tolist()):
+            if action == ACTION_BUY and self.position == 0:
                 # 매수
-                price = klines[i]["close"]
+                price = prices[i]
                 cost = self.equity * (1 - self.commission)
                 self.position = cost / price
                 self.equity = 0
                 self.trade_signals.append({
-                    "time": klines[i]["time"],
+                    "time": times[i],
                     "type": "buy",
                     "price": price,
                 })
                 self.trades.append({
                     "type": "buy",
-                    "time": klines[i]["time"],
+                    "time": times[i],
                     "price": price,
                     "quantity": self.position,
                 })
-            elif signal["action"] == "sell" and self.position > 0:
+            elif action == ACTION_SELL and self.position > 0:
                 # 매도
-                price = klines[i]["close"]
+                price = prices[i]
                 qty = self.position
                 self.equity = qty * price * (1 - self.commission)
                 self.position = 0.0
                 self.trade_signals.append({
-                    "time": klines[i]["time"],
+                    "time": times[i],
                     "type": "sell",
                     "price": price,
                 })
                 self.trades.append({
                     "type": "sell",
-                    "time": klines[i]["time"],
+                    "time": times[i],
                     "price": price,
                     "quantity": qty,
                 })
             
             # 자산 곡선 업데이트
-            current_value = self.equity + (self.position * klines[i]["close"])
-            self.equity_curve.append({
-                "time": klines[i]["time"],
-                "value": current_value,
-            })
-        
-        # 최종 정산 (포지션이 남아있으면 마지막 가격으로 청산)
+            equity_values.append(self.equity + (self.position * closes[i]))
+        return equity_values
+    
+    def _liquidate(self, candles: Candles) -> None:
+        """최종 정산 (포지션이 남아있으면 마지막 가격으로 청산)"""
         if self.position > 0:
-            final_time = klines[-1]["time"]
-            final_price = klines[-1]["close"]
+            final_time = int(candles.time[-1])
+            final_price = float(candles.close[-1])
             qty = self.position
             self.equity = qty * final_price * (1 - self.commission)
             self.position = 0.0
@@ -108,484 +369,210 @@ class BacktestEngine:
             })
 
             # 커미션 반영된 최종 자산가치로 마지막 포인트 보정
-            if self.equity_curve:
-                self.equity_curve[-1]["value"] = self.equity
-        
-        # 성과 지표 계산
-        metrics = self._calculate_metrics(klines)
-        
-        # 누적 수익률 곡선 계산
-        cumulative_return_curve = self._calculate_cumulative_return_curve()
-        
-        # 월간 수익률 계산
-        monthly_returns = self._calculate_monthly_returns()
-        
-        return {
-            "initialCapital": self.initial_capital,
-            "totalReturn": metrics["totalReturn"],
-            "totalProfit": metrics["totalProfit"],
-            "dailyAverageReturn": metrics["dailyAverageReturn"],
-            "cumulativeReturn": metrics["totalReturn"],  # 누적 수익률은 totalReturn과 동일
-            "cagr": metrics["cagr"],
-            "totalTrades": metrics["totalTrades"],
-            "winRate": metrics["winRate"],
-            "maxDrawdown": metrics["maxDrawdown"],
-            "sharpeRatio": metrics["sharpeRatio"],
-            "chartData": klines,
-            "equityCurve": self.equity_curve,
-            "cumulativeReturnCurve": cumulative_return_curve,
-            "monthlyReturns": monthly_returns,
-            "tradeSignals": self.trade_signals,
-        }
+            if len(self.equity_curve):
+                self.equity_curve.value[-1] = self.equity
     
     def _generate_signals(
         self,
-        klines: List[Dict[str, Any]],
+        candles: Candles,
         strategy_type: str,
         parameters: Dict[str, Any],
-    ) -> List[Dict[str, Any]]:
-        """전략별 신호 생성"""
+    ) -> np.ndarray:
+        """
+        전략별 신호 생성
+        지표는 IndicatorSet을 통해 실행당 한 번씩만 계산하고 전략 간에 재사용합니다.
+        반환값은 봉마다 ACTION_BUY / ACTION_SELL / ACTION_HOLD 를 담은 int8 배열입니다.
+        캔들 필드가 (시간 x 심볼) 2차원 배열이면 모든 심볼의 신호를 한 번에 계산합니다.
+        """
+        indicators = IndicatorSet(candles)
+        
         if strategy_type == "moving_average":
-            return self._moving_average_strategy(klines, parameters)
+            return self._moving_average_strategy(indicators, parameters)
         elif strategy_type == "rsi":
-            return self._rsi_strategy(klines, parameters)
+            return self._rsi_strategy(indicators, parameters)
         elif strategy_type == "macd":
-            return self._macd_strategy(klines, parameters)
+            return self._macd_strategy(indicators, parameters)
         elif strategy_type == "ema":
-            return self._ema_strategy(klines, parameters)
+            return self._ema_strategy(indicators, parameters)
         elif strategy_type == "volatility_breakout":
-            return self._volatility_breakout_strategy(klines, parameters)
+            return self._volatility_breakout_strategy(indicators, parameters)
+        elif strategy_type == "custom":
+            return self._custom_strategy(indicators, parameters)
         else:
-            return [{"action": "hold"} for _ in klines]
+            return np.zeros(candles.close.shape, dtype=np.int8)
     
     def _moving_average_strategy(
         self,
-        klines: List[Dict[str, Any]],
+        indicators: IndicatorSet,
         parameters: Dict[str, Any],
-    ) -> List[Dict[str, Any]]:
+    ) -> np.ndarray:
         """이동평균 전략"""
-        short_period = parameters.get("shortPeriod", 5)
-        long_period = parameters.get("longPeriod", 20)
+        short_period = int(parameters.get("shortPeriod", 5))
+        long_period = int(parameters.get("longPeriod", 20))
         
-        signals = []
-        short_ma = []
-        long_ma = []
+        short_ma = indicators.sma(short_period)
+        long_ma = indicators.sma(long_period)
         
-        for i in range(len(klines)):
-            if i < long_period:
-                signals.append({"action": "hold"})
-                continue
-            
-            # 단기 이동평균
-            short_slice = klines[i - short_period + 1 : i + 1]
-            short_sum = sum(candle["close"] for candle in short_slice)
-            short_ma.append(short_sum / short_period)
-            
-            # 장기 이동평균
-            long_slice = klines[i - long_period + 1 : i + 1]
-            long_sum = sum(candle["close"] for candle in long_slice)
-            long_ma.append(long_sum / long_period)
-            
-            if len(short_ma) < 2:
-                signals.append({"action": "hold"})
-                continue
-            
-            # 골든 크로스: 단기 MA가 장기 MA를 상향 돌파
-            if short_ma[-1] > long_ma[-1] and short_ma[-2] <= long_ma[-2]:
-                signals.append({"action": "buy"})
-            # 데드 크로스: 단기 MA가 장기 MA를 하향 돌파
-            elif short_ma[-1] < long_ma[-1] and short_ma[-2] >= long_ma[-2]:
-                signals.append({"action": "sell"})
-            else:
-                signals.append({"action": "hold"})
-        
-        return signals
+        # 골든 크로스 매수 / 데드 크로스 매도 (장기 MA가 두 번 계산된 이후부터)
+        return _crossover_actions(short_ma, long_ma, valid_from=long_period + 1)
     
     def _rsi_strategy(
         self,
-        klines: List[Dict[str, Any]],
+        indicators: IndicatorSet,
         parameters: Dict[str, Any],
-    ) -> List[Dict[str, Any]]:
-        """RSI 전략"""
-        period = parameters.get("rsiPeriod", 14)
+    ) -> np.ndarray:
+        """RSI 전략 (최근 period개 변화량의 단순 평균 RSI)"""
+        period = int(parameters.get("rsiPeriod", 14))
         overbought = parameters.get("rsiOverbought", 70)
         oversold = parameters.get("rsiOversold", 30)
         
-        signals = []
-        rsi_values = []
-        
-        for i in range(len(klines)):
-            if i < period:
-                signals.append({"action": "hold"})
-                continue
-            
-            # RSI 계산
-            gains = []
-            losses = []
-            for j in range(i - period + 1, i + 1):
-                change = klines[j]["close"] - klines[j - 1]["close"]
-                if change > 0:
-                    gains.append(change)
-                    losses.append(0)
-                else:
-                    gains.append(0)
-                    losses.append(abs(change))
-            
-            avg_gain = sum(gains) / period
-            avg_loss = sum(losses) / period
-            
-            if avg_loss == 0:
-                rsi = 100
-            else:
-                rs = avg_gain / avg_loss
-                rsi = 100 - (100 / (1 + rs))
-            
-            rsi_values.append(rsi)
-            
-            if len(rsi_values) < 2:
-                signals.append({"action": "hold"})
-                continue
-            
-            # 과매도 구간에서 상승 전환 시 매수
-            if rsi_values[-1] > oversold and rsi_values[-2] <= oversold:
-                signals.append({"action": "buy"})
-            # 과매수 구간에서 하락 전환 시 매도
-            elif rsi_values[-1] < overbought and rsi_values[-2] >= overbought:
-                signals.append({"action": "sell"})
-            else:
-                signals.append({"action": "hold"})
-        
-        return signals
+        rsi = indicators.rsi(period, method="simple")
+        actions = np.zeros(rsi.shape, dtype=np.int8)
+        if len(rsi) < 2:
+            return actions
+        
+        prev_rsi = rsi[:-1]
+        cur_rsi = rsi[1:]
+        # 과매수 구간에서 하락 전환 시 매도
+        sell = (cur_rsi < overbought) & (prev_rsi >= overbought)
+        # 과매도 구간에서 상승 전환 시 매수 (동시에 만족하면 매수 우선)
+        buy = (cur_rsi > oversold) & (prev_rsi <= oversold)
+        actions[1:][sell] = ACTION_SELL
+        actions[1:][buy] = ACTION_BUY
+        actions[: period + 1] = ACTION_HOLD
+        return actions
     
     def _macd_strategy(
         self,
-        klines: List[Dict[str, Any]],
+        indicators: IndicatorSet,
         parameters: Dict[str, Any],
-    ) -> List[Dict[str, Any]]:
+    ) -> np.ndarray:
         """MACD 전략"""
-        fast_period = parameters.get("fastPeriod", 12)
-        slow_period = parameters.get("slowPeriod", 26)
-        signal_period = parameters.get("signalPeriod", 9)
+        fast_period = int(parameters.get("fastPeriod", 12))
+        slow_period = int(parameters.get("slowPeriod", 26))
+        signal_period = int(parameters.get("signalPeriod", 9))
         
-        signals = []
-        ema_fast = []
-        ema_slow = []
-        macd_line = []
-        signal_line = []
-        
-        for i in range(len(klines)):
-            if i < slow_period:
-                signals.append({"action": "hold"})
-                continue
-            
-            # EMA 초기화 (SMA로 시작)
-            if i == slow_period:
-                # Fast EMA 초기화 (SMA)
-                fast_slice = klines[i - fast_period + 1 : i + 1]
-                fast_sma = sum(candle["close"] for candle in fast_slice) / fast_period
-                ema_fast.append(fast_sma)
-                # Slow EMA 초기화 (SMA)
-                slow_slice = klines[i - slow_period + 1 : i + 1]
-                slow_sma = sum(candle["close"] for candle in slow_slice) / slow_period
-                ema_slow.append(slow_sma)
-            else:
-                # EMA 계산
-                alpha_fast = 2 / (fast_period + 1)
-                alpha_slow = 2 / (slow_period + 1)
-                ema_fast.append(
-                    alpha_fast * klines[i]["close"] + (1 - alpha_fast) * ema_fast[-1]
-                )
-                ema_slow.append(
-                    alpha_slow * klines[i]["close"] + (1 - alpha_slow) * ema_slow[-1]
-                )
-            
-            # MACD 라인
-            if len(ema_fast) > 0 and len(ema_slow) > 0:
-                macd = ema_fast[-1] - ema_slow[-1]
-                macd_line.append(macd)
-                
-                # Signal 라인 (MACD의 EMA)
-                if len(macd_line) == 1:
-                    signal_line.append(macd)
-                elif len(macd_line) >= signal_period:
-                    alpha_signal = 2 / (signal_period + 1)
-                    signal_line.append(
-                        alpha_signal * macd + (1 - alpha_signal) * signal_line[-1]
-                    )
-                else:
-                    # Signal 라인 초기화 (SMA)
-                    signal_sma = sum(macd_line) / len(macd_line)
-                    signal_line.append(signal_sma)
-                
-                # 신호 생성
-                if len(macd_line) >= 2 and len(signal_line) >= 2:
-                    # MACD가 Signal을 상향 돌파
-                    if macd_line[-1] > signal_line[-1] and macd_line[-2] <= signal_line[-2]:
-                        signals.append({"action": "buy"})
-                    # MACD가 Signal을 하향 돌파
-                    elif macd_line[-1] < signal_line[-1] and macd_line[-2] >= signal_line[-2]:
-                        signals.append({"action": "sell"})
-                    else:
-                        signals.append({"action": "hold"})
-                else:
-                    signals.append({"action": "hold"})
-            else:
-                signals.append({"action": "hold"})
+        # Fast/Slow EMA 모두 slow_period 지점에서 SMA로 초기화
+        macd_line, signal_line, _ = indicators.macd(
+            fast_period, slow_period, signal_period, start=slow_period
+        )
         
-        return signals
+        # MACD가 Signal을 상향 돌파하면 매수, 하향 돌파하면 매도
+        return _crossover_actions(macd_line, signal_line, valid_from=slow_period + 1)
     
     def _ema_strategy(
         self,
-        klines: List[Dict[str, Any]],
+        indicators: IndicatorSet,
         parameters: Dict[str, Any],
-    ) -> List[Dict[str, Any]]:
+    ) -> np.ndarray:
         """EMA 전략 (지수 이동평균 교차)"""
-        short_period = parameters.get("shortPeriod", 12)
-        long_period = parameters.get("longPeriod", 26)
+        short_period = int(parameters.get("shortPeriod", 12))
+        long_period = int(parameters.get("longPeriod", 26))
         
-        signals = []
-        ema_short = []
-        ema_long = []
+        # 단기/장기 EMA 모두 long_period 지점에서 SMA로 초기화
+        ema_short = indicators.ema(short_period, start=long_period)
+        ema_long = indicators.ema(long_period, start=long_period)
         
-        for i in range(len(klines)):
-            if i < long_period:
-                signals.append({"action": "hold"})
-                continue
-            
-            # EMA 초기화 (SMA로 시작)
-            if i == long_period:
-                # 단기 EMA 초기화 (SMA)
-                short_slice = klines[i - short_period + 1 : i + 1]
-                short_sma = sum(candle["close"] for candle in short_slice) / short_period
-                ema_short.append(short_sma)
-                # 장기 EMA 초기화 (SMA)
-                long_slice = klines[i - long_period + 1 : i + 1]
-                long_sma = sum(candle["close"] for candle in long_slice) / long_period
-                ema_long.append(long_sma)
-            else:
-                # EMA 계산
-                alpha_short = 2 / (short_period + 1)
-                alpha_long = 2 / (long_period + 1)
-                ema_short.append(
-                    alpha_short * klines[i]["close"] + (1 - alpha_short) * ema_short[-1]
-                )
-                ema_long.append(
-                    alpha_long * klines[i]["close"] + (1 - alpha_long) * ema_long[-1]
-                )
-            
-            # 신호 생성
-            if len(ema_short) >= 2 and len(ema_long) >= 2:
-                # 골든 크로스: 단기 EMA가 장기 EMA를 상향 돌파
-                if ema_short[-1] > ema_long[-1] and ema_short[-2] <= ema_long[-2]:
-                    signals.append({"action": "buy"})
-                # 데드 크로스: 단기 EMA가 장기 EMA를 하향 돌파
-                elif ema_short[-1] < ema_long[-1] and ema_short[-2] >= ema_long[-2]:
-                    signals.append({"action": "sell"})
-                else:
-                    signals.append({"action": "hold"})
-            else:
-                signals.append({"action": "hold"})
-        
-        return signals
+        # 골든 크로스 매수 / 데드 크로스 매도
+        return _crossover_actions(ema_short, ema_long, valid_from=long_period + 1)
     
     def _volatility_breakout_strategy(
         self,
-        klines: List[Dict[str, Any]],
+        indicators: IndicatorSet,
         parameters: Dict[str, Any],
-    ) -> List[Dict[str, Any]]:
+    ) -> np.ndarray:
         """변동성 돌파 전략"""
-        k = parameters.get("k", 0.5)  # 변동성 계수 (기본값 0.5)
-        
-        signals = []
-        position_held = False  # 현재 포지션 보유 여부
-        
-        for i in range(len(klines)):
-            if i < 1:
-                # 첫 번째 캔들은 전일 데이터가 없으므로 hold
-                signals.append({"action": "hold"})
-                continue
-            
-            # 전일 데이터
-            prev_high = klines[i - 1]["high"]
-            prev_low = klines[i - 1]["low"]
-            prev_close = klines[i - 1]["close"]
-            
-            # 변동성 계산 (전일 고가 - 전일 저가)
-            volatility = prev_high - prev_low
-            
-            # 매수 기준선: 전일 종가 + (변동성 * k)
-            buy_threshold = prev_close + (volatility * k)
-            
-            # 현재 가격
-            current_price = klines[i]["close"]
-            
-            # 포지션이 없고 변동성 돌파 시 매수
-            if not position_held and current_price > buy_threshold:
-                signals.append({"action": "buy"})
-                position_held = True
-            # 포지션이 있으면 다음 캔들에서 매도
-            elif position_held:
-                signals.append({"action": "sell"})
-                position_held = False
-            else:
-                signals.append({"action": "hold"})
+        close = indicators.price("close")
+        buy_threshold = self._breakout_threshold(indicators, parameters)
         
-        return signals
+        # 종가가 매수 기준선을 넘은 봉이 돌파 봉
+        breakout = np.zeros(close.shape, dtype=bool)
+        breakout[1:] = close[1:] > buy_threshold[1:]
+        return _breakout_actions(breakout)
     
-    def _calculate_metrics(self, klines: List[Dict[str, Any]]) -> Dict[str, float]:
-        """성과 지표 계산"""
-        if not self.equity_curve:
-            return {
-                "totalReturn": 0.0,
-                "totalProfit": 0.0,
-                "dailyAverageReturn": 0.0,
-                "cagr": 0.0,
-                "totalTrades": 0,
-                "winRate": 0.0,
-                "maxDrawdown": 0.0,
-                "sharpeRatio": 0.0,
-            }
-        
-        # 총 수익률 및 총 손익
-        final_value = self.equity_curve[-1]["value"]
-        total_return = ((final_value - self.initial_capital) / self.initial_capital) * 100
-        total_profit = final_value - self.initial_capital
-        
-        # 일평균 수익률 계산
-        if len(klines) > 0:
-            start_time = klines[0]["time"]
-            end_time = klines[-1]["time"]
-            days = (end_time - start_time) / (24 * 60 * 60)  # 초를 일로 변환
-            if days > 0:
-                daily_average_return = total_return / days
-            else:
-                daily_average_return = 0.0
-        else:
-            daily_average_return = 0.0
-        
-        # CAGR 계산 (연환산 수익률)
-        if len(klines) > 0:
-            start_time = klines[0]["time"]
-            end_time = klines[-1]["time"]
-            years = (end_time - start_time) / (365.25 * 24 * 60 * 60)  # 초를 연으로 변환
-            if years > 0 and final_value > 0:
-                cagr = ((final_value / self.initial_capital) ** (1 / years) - 1) * 100
-            else:
-                cagr = 0.0
-        else:
-            cagr = 0.0
-        
-        # 총 거래 횟수
-        total_trades = len([t for t in self.trades if t["type"] == "sell"])
-        
-        # 승률 계산
-        if len(self.trades) < 2:
-            win_rate = 0.0
-        else:
-            wins = 0
-            for i in range(1, len(self.trades), 2):  # 매도 거래만 확인
-                if i < len(self.trades):
-                    sell_trade = self.trades[i]
-                    buy_trade = self.trades[i - 1] if i > 0 else None
-                    if buy_trade and sell_trade["price"] > buy_trade["price"]:
-                        wins += 1
-            win_rate = (wins / total_trades * 100) if total_trades > 0 else 0.0
-        
-        # 최대 낙폭 (MDD) - 절대값(+)로 반환
-        peak = self.initial_capital
-        max_drawdown = 0.0  # 음수로 누적
-        for point in self.equity_curve:
-            if point["value"] > peak:
-                peak = point["value"]
-            drawdown = ((point["value"] - peak) / peak) * 100
-            if drawdown < max_drawdown:
-                max_drawdown = drawdown
-        max_drawdown_abs = abs(max_drawdown)
-        
-        # 샤프 지수 (간단한 버전)
-        if len(self.equity_curve) < 2:
-            sharpe_ratio = 0.0
-        else:
-            returns = []
-            for i in range(1, len(self.equity_curve)):
-                ret = (
-                    (self.equity_curve[i]["value"] - self.equity_curve[i - 1]["value"])
-                    / self.equity_curve[i - 1]["value"]
-                )
-                returns.append(ret)
-            
-            if returns:
-                avg_return = sum(returns) / len(returns)
-                std_return = math.sqrt(
-                    sum((r - avg_return) ** 2 for r in returns) / len(returns)
-                )
-                sharpe_ratio = (avg_return / std_return * math.sqrt(252)) if std_return > 0 else 0.0
-            else:
-                sharpe_ratio = 0.0
-        
-        return {
-            "totalReturn": round(total_return, 2),
-            "totalProfit": round(total_profit, 2),
-            "dailyAverageReturn": round(daily_average_return, 2),
-            "cagr": round(cagr, 2),
-            "totalTrades": total_trades,
-            "winRate": round(win_rate, 2),
-            "maxDrawdown": round(max_drawdown_abs, 2),
-            "sharpeRatio": round(sharpe_ratio, 2),
-        }
+    def _custom_strategy(
+        self,
+        indicators: IndicatorSet,
+        parameters: Dict[str, Any],
+    ) -> np.ndarray:
+        """
+        사용자 정의 규칙 전략
+        parameters["rules"]의 규칙 문자열(예: "buy when ema(12) crosses_above ema(26) and rsi(14) < 60")을
+        DAG로 컴파일해 평가합니다. 매수/매도 조건이 같은 봉에서 동시에 참이면 매수가 우선합니다.
+        """
+        program = compile_rules(parameters.get("rules", ""), parameters)
+        buy, sell = program.evaluate(indicators)
+        actions = np.zeros(buy.shape, dtype=np.int8)
+        actions[sell] = ACTION_SELL
+        actions[buy] = ACTION_BUY
+        return actions
     
-    def _calculate_cumulative_return_curve(self) -> List[Dict[str, Any]]:
-        """누적 수익률 곡선 계산"""
-        if not self.equity_curve:
-            return []
+    def _breakout_threshold(self, indicators: IndicatorSet, parameters: Dict[str, Any]) -> np.ndarray:
+        """
+        변동성 돌파 매수 기준선: 전일 종가 + (전일 고가 - 전일 저가) * k
+        첫 봉은 전일 데이터가 없으므로 NaN입니다.
+        """
+        k = parameters.get("k", 0.5)  # 변동성 계수 (기본값 0.5)
         
-        cumulative_return_curve = []
-        for point in self.equity_curve:
-            return_pct = ((point["value"] - self.initial_capital) / self.initial_capital) * 100
-            cumulative_return_curve.append({
-                "time": point["time"],
-                "value": round(return_pct, 2),
-            })
+        close = indicators.price("close")
+        high = indicators.price("high")
+        low = indicators.price("low")
         
-        return cumulative_return_curve
+        threshold = np.full(close.shape, np.nan)
+        volatility = high[:-1] - low[:-1]
+        threshold[1:] = close[:-1] + (volatility * k)
+        return threshold
     
-    def _calculate_monthly_returns(self) -> List[Dict[str, Any]]:
-        """월간 수익률 계산"""
-        if not self.equity_curve or len(self.equity_curve) < 2:
-            return []
-        
-        monthly_returns = []
-        monthly_data = {}  # {month_key: {"start_value": ..., "start_time": ..., "end_value": ..., "end_time": ...}}
-        
-        for point in self.equity_curve:
-            dt = datetime.fromtimestamp(point["time"])
-            month_key = f"{dt.year}-{dt.month:02d}"
-            
-            if month_key not in monthly_data:
-                # 월의 첫 데이터 포인트
-                monthly_data[month_key] = {
-                    "start_value": point["value"],
-                    "start_time": point["time"],
-                    "end_value": point["value"],
-                    "end_time": point["time"],
-                }
-            else:
-                # 월의 마지막 데이터 포인트 업데이트
-                monthly_data[month_key]["end_value"] = point["value"]
-                monthly_data[month_key]["end_time"] = point["time"]
-        
-        # 월별 수익률 계산
-        for month_key in sorted(monthly_data.keys()):
-            month_info = monthly_data[month_key]
-            if month_info["start_value"] > 0:
-                monthly_return = (
-                    (month_info["end_value"] - month_info["start_value"])
-                    / month_info["start_value"]
-                ) * 100
-                monthly_returns.append({
-                    "time": month_info["start_time"],
-                    "value": round(monthly_return, 2),
-                })
-        
-        return monthly_returns
+    def _intrabar_breakout(
+        self,
+        candles: Candles,
+        parameters: Dict[str, Any],
+        intrabar: IntrabarCandles,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        하위 봉 기반 변동성 돌파
+        봉 안에서 하위 봉 고가가 기준선에 처음 닿은 시점에 기준선 가격(갭 상승이면 그 하위 봉 시가)으로 매수하고,
+        다음 봉 종가에 매도합니다. 반환값은 (신호, 체결 가격)입니다.
+        """
+        threshold = self._breakout_threshold(IndicatorSet(candles), parameters)
+        touch = first_touch_above(intrabar, threshold)
+        actions = _breakout_actions(touch >= 0)
+        
+        fills = candles.close.copy()
+        buys = actions == ACTION_BUY
+        fills[buys] = touch_fill_prices(intrabar, threshold, touch)[buys]
+        return actions, fills
+    
+    def _analyze(self, candles: Candles, curves: bool) -> Dict[str, Any]:
+        """자산 곡선 성과 분석 (기간 기반 지표는 candles의 처음/끝 시각 기준)"""
+        has_candles = len(candles) > 0
+        return analyze_equity(
+            self.equity_curve.time,
+            self.equity_curve.value,
+            self.initial_capital,
+            self.trades,
+            start_time=int(candles.time[0]) if has_candles else None,
+            end_time=int(candles.time[-1]) if has_candles else None,
+            curves=curves,
+        )
+    
+    def _calculate_metrics(self, candles: Candles) -> Dict[str, float]:
+        """성과 지표 계산"""
+        return self._analyze(candles, curves=False)["metrics"]
+
 
+def serialize_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    BacktestEngine.run 결과를 JSON 응답 형식으로 변환
+    열 기반 캔들/곡선은 이 시점에만 dict 리스트로 풀어냅니다.
+    """
+    payload = dict(result)
+    if isinstance(payload.get("chartData"), Candles):
+        payload["chartData"] = payload["chartData"].to_dicts()
+    if isinstance(payload.get("equityCurve"), Curve):
+        payload["equityCurve"] = payload["equityCurve"].to_dicts()
+    # 수익률(%) 곡선은 소수점 2자리로 반올림
+    for key in ("cumulativeReturnCurve", "drawdownCurve"):
+        if isinstance(payload.get(key), Curve):
+            payload[key] = payload[key].to_dicts(digits=2)
+    return payload
@@ -2,40 +2,135 @@
 Binance API 서비스
 공개 API를 사용하여 시세 데이터를 가져옵니다.
 """
+import asyncio
+import os
+import time
 import httpx
-from typing import List, Dict, Any
-from datetime import datetime
+import numpy as np
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import datetime, timezone
+from app.services.candle_files import CandleFiles, get_candle_files
+from app.services.candle_store import CandleStore, find_gaps, get_candle_store, merge_ranges
+from app.services.candles import Candles, INTERVAL_SECONDS
+from app.services.http_clients import get_http_client
+from app.services.resample import (
+    BASE_INTERVALS,
+    base_interval,
+    bucket_times,
+    candle_close_time,
+    interval_seconds,
+    resample,
+)
 
 BINANCE_BASE_URL = "https://api.binance.com/api/v3"
 
+KLINES_PAGE_LIMIT = 1000  # 요청당 최대 캔들 수
+KLINES_WEIGHT = 2  # klines 요청 가중치
+MAX_RATE_LIMIT_RETRIES = 3
+
+
+class RequestWeightBudget:
+    """
+    Binance 요청 가중치 예산 (분당 한도의 토큰 버킷)
+    IP당 분당 가중치 한도(6000)를 다른 요청과 나눠 쓰도록 더 낮은 한도로 요청 속도를 제한하고,
+    429/418 응답의 Retry-After 동안은 모든 요청을 멈춥니다.
+    """
+
+    def __init__(self, per_minute: int):
+        self.per_minute = per_minute
+        self.tokens = float(per_minute)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    async def acquire(self, weight: int) -> None:
+        """weight만큼 예산이 생길 때까지 대기"""
+        while True:
+            now = time.monotonic()
+            if now < self.blocked_until:
+                await asyncio.sleep(self.blocked_until - now)
+                continue
+            self.tokens = min(self.per_minute, self.tokens + (now - self.updated) * self.per_minute / 60)
+            self.updated = now
+            if self.tokens >= weight:
+                self.tokens -= weight
+                return
+            await asyncio.sleep((weight - self.tokens) * 60 / self.per_minute)
+
+    def observe(self, used_weight: Optional[str]) -> None:
+        """응답 헤더의 분당 사용 가중치(X-MBX-USED-WEIGHT-1M)가 예산을 넘었으면 남은 예산을 비움"""
+        if used_weight and used_weight.isdigit() and int(used_weight) >= self.per_minute:
+            self.tokens = min(self.tokens, 0.0)
+
+    def block(self, seconds: float) -> None:
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+_budget: Optional[RequestWeightBudget] = None
+
+
+def get_weight_budget() -> RequestWeightBudget:
+    """
+    공용 요청 가중치 예산 조회 (최초 호출 시 생성)
+    분당 가중치는 BINANCE_WEIGHT_PER_MINUTE 환경 변수 (기본값 3000)
+    """
+    global _budget
+    if _budget is None:
+        _budget = RequestWeightBudget(max(KLINES_WEIGHT, int(os.getenv("BINANCE_WEIGHT_PER_MINUTE", "3000"))))
+    return _budget
+
+
+def fetch_concurrency() -> int:
+    """기간 조회 시 동시 요청 수 (KLINES_FETCH_CONCURRENCY 환경 변수, 기본값 8)"""
+    return max(1, int(os.getenv("KLINES_FETCH_CONCURRENCY", "8")))
+
+
+async def _get_weighted(path: str, params: Dict[str, Any], weight: int, timeout: float) -> httpx.Response:
+    """
+    가중치 예산 안에서 GET 요청
+    429(요청 한도 초과)는 Retry-After만큼 기다린 뒤 재시도하고, 418(IP 차단)은 대기 시간만 기록하고 실패합니다.
+    """
+    budget = get_weight_budget()
+    client = get_http_client("binance")
+    for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+        await budget.acquire(weight)
+        response = await client.get(f"{BINANCE_BASE_URL}{path}", params=params, timeout=timeout)
+        budget.observe(response.headers.get("x-mbx-used-weight-1m"))
+        if response.status_code in (418, 429):
+            retry_after = response.headers.get("retry-after", "")
+            budget.block(float(retry_after) if retry_after.isdigit() else 1.0)
+            if response.status_code == 429 and attempt < MAX_RATE_LIMIT_RETRIES:
+                continue
+        response.raise_for_status()
+        return response
+
 
 async def get_24h_ticker(symbol: str) -> Dict[str, Any]:
     """
     24시간 티커 정보 조회
     """
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(
-                f"{BINANCE_BASE_URL}/ticker/24hr",
-                params={"symbol": symbol.upper()},
-                timeout=10.0,
-            )
-            response.raise_for_status()
-            data = response.json()
-            
-            return {
-                "symbol": data["symbol"],
-                "price": float(data["lastPrice"]),
-                "change24h": float(data["priceChange"]),
-                "changePercent24h": float(data["priceChangePercent"]),
-                "volume24h": float(data["volume"]),
-                "high24h": float(data["highPrice"]),
-                "low24h": float(data["lowPrice"]),
-            }
-        except httpx.HTTPStatusError as e:
-            raise Exception(f"Binance API 오류: {e.response.status_code}")
-        except Exception as e:
-            raise Exception(f"데이터 조회 실패: {str(e)}")
+    client = get_http_client("binance")
+    try:
+        response = await client.get(
+            f"{BINANCE_BASE_URL}/ticker/24hr",
+            params={"symbol": symbol.upper()},
+            timeout=10.0,
+        )
+        response.raise_for_status()
+        data = response.json()
+        
+        return {
+            "symbol": data["symbol"],
+            "price": float(data["lastPrice"]),
+            "change24h": float(data["priceChange"]),
+            "changePercent24h": float(data["priceChangePercent"]),
+            "volume24h": float(data["volume"]),
+            "high24h": float(data["highPrice"]),
+            "low24h": float(data["lowPrice"]),
+        }
+    except httpx.HTTPStatusError as e:
+        raise Exception(f"Binance API 오류: {e.response.status_code}")
+    except Exception as e:
+        raise Exception(f"데이터 조회 실패: {str(e)}")
 
 
 async def get_24h_tickers(symbols: List[str] = None) -> List[Dict[str, Any]]:
@@ -43,136 +138,282 @@ async def get_24h_tickers(symbols: List[str] = None) -> List[Dict[str, Any]]:
     여러 코인의 24시간 티커 정보를 한 번에 조회
     symbols가 None이면 모든 USDT 페어를 반환
     """
-    async with httpx.AsyncClient() as client:
-        try:
-            # Binance API는 심볼 없이 호출하면 모든 티커를 반환
-            response = await client.get(
-                f"{BINANCE_BASE_URL}/ticker/24hr",
-                timeout=15.0,
-            )
-            response.raise_for_status()
-            all_tickers = response.json()
-            
-            # USDT 페어만 필터링
+    client = get_http_client("binance")
+    try:
+        # Binance API는 심볼 없이 호출하면 모든 티커를 반환
+        response = await client.get(
+            f"{BINANCE_BASE_URL}/ticker/24hr",
+            timeout=15.0,
+        )
+        response.raise_for_status()
+        all_tickers = response.json()
+        
+        # USDT 페어만 필터링
+        usdt_tickers = [
+            ticker for ticker in all_tickers
+            if ticker["symbol"].endswith("USDT")
+        ]
+        
+        # 특정 심볼만 요청한 경우 필터링
+        if symbols:
+            symbol_set = {s.upper() for s in symbols}
             usdt_tickers = [
-                ticker for ticker in all_tickers
-                if ticker["symbol"].endswith("USDT")
+                ticker for ticker in usdt_tickers
+                if ticker["symbol"] in symbol_set
             ]
-            
-            # 특정 심볼만 요청한 경우 필터링
-            if symbols:
-                symbol_set = {s.upper() for s in symbols}
-                usdt_tickers = [
-                    ticker for ticker in usdt_tickers
-                    if ticker["symbol"] in symbol_set
-                ]
-            
-            # 데이터 형식 변환
-            result = []
-            for ticker in usdt_tickers:
-                result.append({
-                    "symbol": ticker["symbol"],
-                    "price": float(ticker["lastPrice"]),
-                    "change24h": float(ticker["priceChange"]),
-                    "changePercent24h": float(ticker["priceChangePercent"]),
-                    "volume24h": float(ticker["volume"]),
-                    "high24h": float(ticker["highPrice"]),
-                    "low24h": float(ticker["lowPrice"]),
-                })
-            
-            return result
-        except httpx.HTTPStatusError as e:
-            raise Exception(f"Binance API 오류: {e.response.status_code}")
-        except Exception as e:
-            raise Exception(f"데이터 조회 실패: {str(e)}")
+        
+        # 데이터 형식 변환
+        result = []
+        for ticker in usdt_tickers:
+            result.append({
+                "symbol": ticker["symbol"],
+                "price": float(ticker["lastPrice"]),
+                "change24h": float(ticker["priceChange"]),
+                "changePercent24h": float(ticker["priceChangePercent"]),
+                "volume24h": float(ticker["volume"]),
+                "high24h": float(ticker["highPrice"]),
+                "low24h": float(ticker["lowPrice"]),
+            })
+        
+        return result
+    except httpx.HTTPStatusError as e:
+        raise Exception(f"Binance API 오류: {e.response.status_code}")
+    except Exception as e:
+        raise Exception(f"데이터 조회 실패: {str(e)}")
 
 
 async def get_klines(
-    symbol: str, interval: str = "1d", limit: int = 100, start_time: int = None
-) -> List[Dict[str, Any]]:
+    symbol: str,
+    interval: str = "1d",
+    limit: int = 100,
+    start_time: int = None,
+    end_time: int = None,
+) -> Candles:
     """
     캔들스틱 데이터 조회
     
-    interval: 1m, 3m, 5m, 15m, 30m, 1h, 2h, 4h, 6h, 8h, 12h, 1d, 3d, 1w, 1M
+    interval: 1m, 5m, 15m, 1h, 4h, 1d는 업스트림에서 받고, 그 외 간격(3m, 2h, 12h, 3d, 1w, 1M, 7h 등)은
+              기준 간격 캔들을 리샘플링해 만듭니다 (형식이 잘못되면 ValueError)
     start_time: 시작 시간 (Unix timestamp, 초 단위). None이면 최신 데이터부터 반환
+    end_time: 마지막 캔들 시작 시각 상한 (Unix timestamp, 초 단위)
+    반환값은 열 기반 Candles이며, dict 변환은 응답 직렬화 시점에 수행합니다.
+    최대 1000개이며, 더 긴 기간은 get_klines_range를 사용합니다.
+    로컬 캔들 저장소를 사용하면 limit개에 해당하는 기간을 get_klines_range로 조회하므로,
+    이미 저장된 마감 캔들은 디스크에서 읽고 새 캔들과 진행 중인 캔들만 업스트림에서 받아 옵니다.
     """
-    # Binance interval 매핑
-    interval_map = {
-        "1m": "1m",
-        "5m": "5m",
-        "15m": "15m",
-        "1h": "1h",
-        "4h": "4h",
-        "1d": "1d",
-    }
+    limit = min(limit, KLINES_PAGE_LIMIT)  # Binance 최대 제한
+    span = limit * interval_seconds(interval)
     
-    binance_interval = interval_map.get(interval, "1d")
+    if get_candle_store() is None and interval in BASE_INTERVALS:
+        return await _fetch_klines(symbol, interval, limit, start_time, end_time)
     
-    async with httpx.AsyncClient() as client:
-        try:
-            params = {
-                "symbol": symbol.upper(),
-                "interval": binance_interval,
-                "limit": min(limit, 1000),  # Binance 최대 제한
-            }
-            
-            # startTime이 제공되면 추가 (Binance는 밀리초 단위)
-            if start_time is not None:
-                params["startTime"] = start_time * 1000  # 초를 밀리초로 변환
-            
-            response = await client.get(
-                f"{BINANCE_BASE_URL}/klines",
-                params=params,
-                timeout=10.0,
-            )
-            response.raise_for_status()
-            data = response.json()
-            
-            # Binance klines 형식을 변환
-            # [timestamp, open, high, low, close, volume, ...]
-            klines = []
-            for kline in data:
-                klines.append({
-                    "time": int(kline[0]) // 1000,  # 밀리초를 초로 변환
-                    "open": float(kline[1]),
-                    "high": float(kline[2]),
-                    "low": float(kline[3]),
-                    "close": float(kline[4]),
-                    "volume": float(kline[5]),
-                })
-            
-            return klines
-        except httpx.HTTPStatusError as e:
-            raise Exception(f"Binance API 오류: {e.response.status_code}")
-        except Exception as e:
-            raise Exception(f"데이터 조회 실패: {str(e)}")
+    if start_time is None:
+        end = end_time if end_time is not None else int(time.time())
+        candles = await get_klines_range(symbol, interval, end - span, end)
+        return candles[-limit:] if len(candles) > limit else candles
+    end = start_time + span - 1
+    if end_time is not None:
+        end = min(end, end_time)
+    candles = await get_klines_range(symbol, interval, start_time, end)
+    return candles[:limit]
+
+
+async def _fetch_klines(
+    symbol: str,
+    interval: str,
+    limit: int,
+    start_time: Optional[int] = None,
+    end_time: Optional[int] = None,
+) -> Candles:
+    """업스트림 klines 요청 한 번 (최대 1000개, 저장소를 거치지 않음)"""
+    try:
+        params = {
+            "symbol": symbol.upper(),
+            "interval": interval,
+            "limit": limit,
+        }
+        
+        # startTime / endTime이 제공되면 추가 (Binance는 밀리초 단위)
+        if start_time is not None:
+            params["startTime"] = start_time * 1000  # 초를 밀리초로 변환
+        if end_time is not None:
+            params["endTime"] = end_time * 1000
+        
+        response = await _get_weighted("/klines", params, KLINES_WEIGHT, timeout=10.0)
+        data = response.json()
+        
+        # Binance klines 형식을 열 기반 배열로 변환
+        # [timestamp, open, high, low, close, volume, ...]
+        return Candles.from_binance(data)
+    except httpx.HTTPStatusError as e:
+        raise Exception(f"Binance API 오류: {e.response.status_code}")
+    except Exception as e:
+        raise Exception(f"데이터 조회 실패: {str(e)}")
 
 
 async def get_exchange_info() -> List[Dict[str, Any]]:
     """
     거래 가능한 심볼 목록 조회
     """
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(
-                f"{BINANCE_BASE_URL}/exchangeInfo",
-                timeout=10.0,
+    client = get_http_client("binance")
+    try:
+        response = await client.get(
+            f"{BINANCE_BASE_URL}/exchangeInfo",
+            timeout=10.0,
+        )
+        response.raise_for_status()
+        data = response.json()
+        
+        # USDT 페어만 필터링
+        symbols = []
+        for symbol_info in data.get("symbols", []):
+            if symbol_info["quoteAsset"] == "USDT" and symbol_info["status"] == "TRADING":
+                symbols.append({
+                    "symbol": symbol_info["symbol"],
+                    "baseAsset": symbol_info["baseAsset"],
+                    "quoteAsset": symbol_info["quoteAsset"],
+                    "name": symbol_info["baseAsset"],
+                })
+        
+        return symbols[:50]  # 상위 50개만 반환
+    except Exception as e:
+        raise Exception(f"심볼 목록 조회 실패: {str(e)}")
+
+
+async def get_klines_range(
+    symbol: str,
+    interval: str,
+    start_time: int,
+    end_time: int,
+    concurrency: Optional[int] = None,
+) -> Candles:
+    """
+    기간 전체 캔들 조회 (start_time <= 캔들 시작 시각 <= end_time, Unix timestamp 초 단위)
+    로컬 캔들 저장소(get_candle_store)가 있으면 마감된 캔들은 저장소에서 읽고,
+    아직 받아 오지 않은 구간과 진행 중인 캔들만 업스트림에서 조회합니다.
+    새로 받은 마감 캔들은 저장소에 추가하므로, 같은 과거 기간을 다시 조회하면 네트워크 요청이 없습니다.
+    기준 간격(BASE_INTERVALS)이 아닌 간격은 기준 간격 캔들을 조회해 리샘플링합니다.
+    """
+    symbol = symbol.upper()
+    if interval not in BASE_INTERVALS:
+        # 마지막 구간을 채우는 기준 캔들까지 조회 (start_time 이전에 시작하는 첫 구간은 제외)
+        last_bucket = int(bucket_times(np.array([end_time]), interval)[0])
+        base_candles = await get_klines_range(
+            symbol,
+            base_interval(interval),
+            start_time,
+            candle_close_time(last_bucket, interval) - 1,
+            concurrency,
+        )
+        return resample(base_candles, interval).between(start_time, end_time)
+    now = int(time.time())
+    end_time = min(end_time, now)  # 아직 시작하지 않은 구간은 요청하지 않음
+    if end_time < start_time:
+        return Candles.empty()
+    store = get_candle_store()
+    if store is None:
+        return await _fetch_range(symbol, interval, [(start_time, end_time)], concurrency)
+
+    # 시작 시각이 now - 간격 이하인 캔들은 마감되어 더 이상 바뀌지 않음
+    closed_end = min(end_time, now - INTERVAL_SECONDS[interval])
+    open_range = [(max(start_time, closed_end + 1), end_time)] if end_time > closed_end else []
+    files = get_candle_files()
+    if files is not None and not files.enabled(symbol):
+        files = None
+    stored = Candles.empty()
+    live = Candles.empty()
+    closed = Candles.empty()
+    async with _sync_lock(symbol, interval):
+        missing = []
+        if start_time <= closed_end:
+            missing = await asyncio.to_thread(store.missing, symbol, interval, start_time, closed_end)
+        if missing or open_range:
+            # 빠진 구간과 진행 중인 캔들 구간이 이어지면 한 번에 요청
+            fetched = await _fetch_range(symbol, interval, merge_ranges(missing + open_range), concurrency)
+            live = fetched.between(closed_end + 1, end_time)
+            if missing:
+                closed = fetched.between(start_time, closed_end)
+                await asyncio.to_thread(store.save, symbol, interval, closed, missing)
+                for range_start, range_end in missing:
+                    _report_gaps(symbol, interval, closed.between(range_start, range_end))
+        if start_time <= closed_end:
+            if files is not None:
+                # 자주 쓰는 심볼은 메모리 맵 열 파일에서 복사 없이 읽음 (워커에도 파일 핸들로 전달)
+                stored = await asyncio.to_thread(
+                    _load_mapped, files, store, symbol, interval, start_time, closed_end, closed
+                )
+            else:
+                stored = await asyncio.to_thread(store.load, symbol, interval, start_time, closed_end)
+    return Candles.concat([stored, live])
+
+
+def _load_mapped(
+    files: CandleFiles,
+    store: CandleStore,
+    symbol: str,
+    interval: str,
+    start_time: int,
+    end_time: int,
+    new_candles: Candles,
+) -> Candles:
+    """
+    새로 저장한 캔들을 열 파일에 덧붙이고 구간을 매핑해 반환
+    파일이 아직 없거나 과거 구간이 채워졌으면 저장소 전체로 파일을 다시 만듭니다.
+    """
+    if not files.append(symbol, interval, new_candles):
+        files.rebuild(symbol, interval, store.load(symbol, interval, 0, 2 ** 62))
+    return files.load(symbol, interval, start_time, end_time)
+
+
+async def _fetch_range(
+    symbol: str,
+    interval: str,
+    ranges: List[Tuple[int, int]],
+    concurrency: Optional[int] = None,
+) -> Candles:
+    """
+    업스트림에서 여러 구간의 캔들 조회
+    구간을 1000개 캔들 길이의 창으로 나눠 동시에(최대 concurrency개, 기본값 fetch_concurrency())
+    요청 가중치 예산 안에서 조회하고, 시간순으로 합친 뒤 중복 캔들을 제거합니다.
+    """
+    span = KLINES_PAGE_LIMIT * INTERVAL_SECONDS[interval]
+    windows = [
+        (window_start, min(window_start + span - 1, range_end))
+        for range_start, range_end in ranges
+        for window_start in range(range_start, range_end + 1, span)
+    ]
+    semaphore = asyncio.Semaphore(concurrency or fetch_concurrency())
+
+    async def fetch(window_start: int, window_end: int) -> Candles:
+        async with semaphore:
+            page = await _fetch_klines(
+                symbol,
+                interval,
+                KLINES_PAGE_LIMIT,
+                start_time=window_start,
+                end_time=window_end,
             )
-            response.raise_for_status()
-            data = response.json()
-            
-            # USDT 페어만 필터링
-            symbols = []
-            for symbol_info in data.get("symbols", []):
-                if symbol_info["quoteAsset"] == "USDT" and symbol_info["status"] == "TRADING":
-                    symbols.append({
-                        "symbol": symbol_info["symbol"],
-                        "baseAsset": symbol_info["baseAsset"],
-                        "quoteAsset": symbol_info["quoteAsset"],
-                        "name": symbol_info["baseAsset"],
-                    })
-            
-            return symbols[:50]  # 상위 50개만 반환
-        except Exception as e:
-            raise Exception(f"심볼 목록 조회 실패: {str(e)}")
+        return page.sorted().between(window_start, window_end)
+
+    pages = await asyncio.gather(*(fetch(*window) for window in windows))
+    return Candles.concat(pages).deduplicated()
+
+
+# (symbol, interval)별 동기화 잠금 - 같은 구간을 동시에 요청해도 업스트림 조회는 한 번만
+_sync_locks: Dict[Tuple[str, str], asyncio.Lock] = {}
+
+
+def _sync_lock(symbol: str, interval: str) -> asyncio.Lock:
+    lock = _sync_locks.get((symbol, interval))
+    if lock is None:
+        lock = _sync_locks[(symbol, interval)] = asyncio.Lock()
+    return lock
+
 
+def _report_gaps(symbol: str, interval: str, candles: Candles) -> None:
+    """새로 받은 캔들 사이에 빠진 구간이 있으면 기록 (거래소 점검 등으로 캔들이 없는 구간)"""
+    for gap_start, gap_end in find_gaps(candles.time, INTERVAL_SECONDS[interval]):
+        print(
+            f"⚠️ {symbol} {interval} 캔들 누락 구간: "
+            f"{datetime.fromtimestamp(gap_start, timezone.utc)} ~ {datetime.fromtimestamp(gap_end, timezone.utc)}"
+        )
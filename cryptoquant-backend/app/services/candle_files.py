@@ -0,0 +1,241 @@
+"""
+메모리 맵 캔들 파일
+자주 백테스트하는 심볼(CANDLE_FILE_SYMBOLS)의 캔들을 (symbol, interval)별로 필드마다 고정 폭 열 파일 하나씩
+(time: int64, 나머지: float64, 리틀 엔디언) 보관하고 읽기 전용 메모리 맵으로 엽니다.
+- 로컬 캔들 저장소(candle_store)에 저장된 마감 캔들의 정렬된 사본이며, 새 캔들은 파일 끝에 덧붙입니다.
+- 과거 구간이 채워지면 저장소에서 새 세대(generation) 디렉터리로 다시 만들고 CURRENT 파일로 교체합니다.
+- 워커 프로세스는 (디렉터리, 첫 캔들 시각, 캔들 수) 핸들로 같은 파일을 매핑하므로,
+  여러 프로세스가 페이지 캐시의 물리 메모리 한 벌을 복사 / 역직렬화 없이 함께 읽습니다.
+"""
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Set, Tuple
+
+import numpy as np
+
+from app.services.candles import CANDLE_FIELDS, Candles
+
+try:
+    import fcntl
+except ImportError:  # Windows: 프로세스 간 쓰기 잠금 없이 실행
+    fcntl = None
+
+FIELD_DTYPES = {field: np.dtype("<i8") if field == "time" else np.dtype("<f8") for field in CANDLE_FIELDS}
+# 덧붙이는 도중에 읽어도 time 길이만큼은 모든 열이 채워져 있도록 time 열을 마지막에 기록
+_WRITE_ORDER = CANDLE_FIELDS[1:] + ("time",)
+
+FileHandle = Tuple[str, str, int, int]  # ("file", 세대 디렉터리, 첫 캔들 시각, 캔들 수)
+
+# 프로세스별 매핑 캐시 {세대 디렉터리: 전체 열 Candles}
+# (symbol, interval)마다 최근 두 세대(현재 / 직전)만 보관합니다.
+_mapped: Dict[str, Candles] = {}
+_KEEP_GENERATIONS = 2
+
+
+def _column_path(directory: str, field: str) -> str:
+    return os.path.join(directory, f"{field}.bin")
+
+
+def _generation_number(directory: str) -> int:
+    return int(os.path.basename(directory)[1:])
+
+
+def _prune_mapped(directory: str) -> None:
+    """directory와 같은 (symbol, interval)의 매핑 중 최근 두 세대보다 오래된 세대를 캐시에서 제거"""
+    key_dir = os.path.dirname(directory)
+    generations = sorted(
+        (cached for cached in _mapped if os.path.dirname(cached) == key_dir),
+        key=_generation_number,
+        reverse=True,
+    )
+    for stale in generations[_KEEP_GENERATIONS:]:
+        # 이미 잘라 낸 뷰를 쓰는 작업은 자신의 배열 참조로 매핑을 유지함
+        del _mapped[stale]
+
+
+def map_columns(directory: str) -> Candles:
+    """
+    세대 디렉터리의 열 파일 전체를 읽기 전용으로 매핑
+    파일 끝에 캔들이 덧붙었으면 늘어난 길이로 다시 매핑합니다 (기존 매핑을 쓰던 배열은 그대로 유효).
+    """
+    n = os.path.getsize(_column_path(directory, "time")) // FIELD_DTYPES["time"].itemsize
+    cached = _mapped.get(directory)
+    if cached is not None and len(cached) == n:
+        return cached
+    if n == 0:
+        return Candles.empty()
+    candles = Candles(*(
+        np.memmap(_column_path(directory, field), dtype=FIELD_DTYPES[field], mode="r", shape=(n,))
+        for field in CANDLE_FIELDS
+    ))
+    _mapped[directory] = candles
+    _prune_mapped(directory)
+    return candles
+
+
+def file_handle(candles: Candles) -> Optional[FileHandle]:
+    """
+    열 파일을 매핑한 배열의 연속 구간이면 워커에 넘길 핸들을 반환 (복사본이거나 다른 배열이면 None)
+    캔들 시각은 파일 안에서 정렬 / 중복 없이 저장되므로 첫 캔들 시각으로 시작 위치를 찾습니다.
+    """
+    if not len(candles):
+        return None
+    directory = None
+    for field in CANDLE_FIELDS:
+        array = getattr(candles, field)
+        filename = getattr(array, "filename", None)
+        if filename is None or not array.flags.c_contiguous:
+            return None
+        if directory not in (None, os.path.dirname(filename)):
+            return None
+        directory = os.path.dirname(filename)
+    return ("file", directory, int(candles.time[0]), len(candles))
+
+
+def attach_file_candles(handle: FileHandle) -> Candles:
+    """워커 프로세스에서 핸들이 가리키는 구간을 매핑 (같은 파일은 프로세스당 한 번만 매핑)"""
+    _, directory, first_time, n = handle
+    candles = _mapped.get(directory)
+    if candles is None or not len(candles) or candles.time[-1] < first_time:
+        candles = map_columns(directory)
+    start = int(np.searchsorted(candles.time, first_time))
+    if start + n > len(candles) or candles.time[start] != first_time:
+        candles = map_columns(directory)
+        start = int(np.searchsorted(candles.time, first_time))
+    return candles[start:start + n]
+
+
+class CandleFiles:
+    """(symbol, interval)별 열 파일 관리 - 디렉터리 구조: root/SYMBOL/interval/<세대>/<필드>.bin"""
+
+    def __init__(self, root: str, symbols: Set[str]):
+        self.root = os.path.abspath(root)
+        self.symbols = symbols
+
+    def enabled(self, symbol: str) -> bool:
+        return symbol in self.symbols
+
+    def _key_dir(self, symbol: str, interval: str) -> str:
+        return os.path.join(self.root, symbol, interval)
+
+    def current(self, symbol: str, interval: str) -> Optional[str]:
+        """현재 세대 디렉터리 (아직 만들지 않았으면 None)"""
+        key_dir = self._key_dir(symbol, interval)
+        try:
+            with open(os.path.join(key_dir, "CURRENT"), encoding="utf-8") as f:
+                return os.path.join(key_dir, f.read().strip())
+        except FileNotFoundError:
+            return None
+
+    @contextmanager
+    def _locked(self, symbol: str, interval: str) -> Iterator[None]:
+        """여러 서버 프로세스가 같은 파일에 동시에 쓰지 않도록 잠금"""
+        key_dir = self._key_dir(symbol, interval)
+        os.makedirs(key_dir, exist_ok=True)
+        with open(os.path.join(key_dir, "LOCK"), "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def load(self, symbol: str, interval: str, start_time: int, end_time: int) -> Optional[Candles]:
+        """start_time <= time <= end_time 구간의 매핑된 뷰 (파일이 없으면 None)"""
+        directory = self.current(symbol, interval)
+        if directory is None:
+            return None
+        return map_columns(directory).between(start_time, end_time)
+
+    def append(self, symbol: str, interval: str, candles: Candles) -> bool:
+        """
+        마지막 캔들 이후의 새 캔들을 파일 끝에 덧붙임
+        파일이 없거나 candles가 기존 캔들보다 앞선 구간을 포함하면 False (rebuild 필요)
+        """
+        with self._locked(symbol, interval):
+            directory = self.current(symbol, interval)
+            if directory is None:
+                return False
+            existing = map_columns(directory)
+            if not self._trim_columns(directory, len(existing)):
+                return False
+            if not len(candles):
+                return True
+            if len(existing) and int(candles.time[0]) <= int(existing.time[-1]):
+                # 이미 있는 캔들을 다시 받은 부분은 건너뛰고, 빈 곳을 채운 경우는 다시 만듦
+                split = int(np.searchsorted(candles.time, existing.time[-1], side="right"))
+                if not np.isin(candles.time[:split], existing.time).all():
+                    return False
+                candles = candles[split:]
+            for field in _WRITE_ORDER:
+                with open(_column_path(directory, field), "ab") as f:
+                    f.write(getattr(candles, field).astype(FIELD_DTYPES[field], copy=False).tobytes())
+            return True
+
+    @staticmethod
+    def _trim_columns(directory: str, n: int) -> bool:
+        """
+        값 열 파일을 time 열 길이(n)에 맞춤
+        덧붙이다 중단되면 time보다 긴 값 열이 남으므로 다음 덧붙이기 전에 잘라 냅니다.
+        time보다 짧은 열이 있으면 파일이 손상된 것이므로 False (rebuild 필요)
+        """
+        for field in CANDLE_FIELDS[1:]:
+            path = _column_path(directory, field)
+            expected = n * FIELD_DTYPES[field].itemsize
+            size = os.path.getsize(path)
+            if size < expected:
+                return False
+            if size > expected:
+                os.truncate(path, expected)
+        return True
+
+    def rebuild(self, symbol: str, interval: str, candles: Candles) -> str:
+        """
+        정렬 / 중복 제거된 전체 캔들로 새 세대 파일을 만들고 교체
+        이전 세대는 진행 중인 작업이 아직 매핑할 수 있으므로 하나 더 남겨 두고 그보다 오래된 세대만 삭제합니다.
+        """
+        with self._locked(symbol, interval):
+            key_dir = self._key_dir(symbol, interval)
+            generation = f"g{time.time_ns()}"
+            directory = os.path.join(key_dir, generation)
+            os.makedirs(directory)
+            for field in CANDLE_FIELDS:
+                getattr(candles, field).astype(FIELD_DTYPES[field], copy=False).tofile(_column_path(directory, field))
+            previous = self.current(symbol, interval)
+            pointer = os.path.join(key_dir, "CURRENT.tmp")
+            with open(pointer, "w", encoding="utf-8") as f:
+                f.write(generation)
+            os.replace(pointer, os.path.join(key_dir, "CURRENT"))
+
+            keep = {generation, os.path.basename(previous) if previous else None}
+            for name in os.listdir(key_dir):
+                if name.startswith("g") and name not in keep:
+                    _mapped.pop(os.path.join(key_dir, name), None)
+                    shutil.rmtree(os.path.join(key_dir, name), ignore_errors=True)
+            return directory
+
+
+_files: Optional[CandleFiles] = None
+
+
+def get_candle_files() -> Optional[CandleFiles]:
+    """
+    공용 캔들 파일 관리자 조회 (최초 호출 시 생성)
+    경로는 CANDLE_FILE_DIR (기본값 .cache/candle_files), 대상 심볼은 CANDLE_FILE_SYMBOLS
+    (쉼표로 구분, 기본값 BTCUSDT,ETHUSDT, 빈 값이면 사용하지 않음)
+    """
+    global _files
+    if _files is None:
+        directory = os.getenv("CANDLE_FILE_DIR", ".cache/candle_files")
+        symbols = {
+            symbol.strip().upper()
+            for symbol in os.getenv("CANDLE_FILE_SYMBOLS", "BTCUSDT,ETHUSDT").split(",")
+            if symbol.strip()
+        }
+        if not directory or not symbols:
+            return None
+        _files = CandleFiles(directory, symbols)
+    return _files
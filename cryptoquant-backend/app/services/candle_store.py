@@ -0,0 +1,182 @@
+"""
+로컬 캔들 저장소
+마감된 캔들을 (symbol, interval)별로 SQLite 파일에 보관하고, 업스트림에서 받아 온 시간 구간(coverage)을 함께 기록합니다.
+같은 기간을 다시 조회하면 디스크에서 읽고, 기록되지 않은 구간만 업스트림에서 받아 채웁니다.
+- 받아 온 구간 안에 캔들이 없으면 거래소 쪽 누락(점검 등)으로 보고 다시 요청하지 않습니다.
+- 아직 마감되지 않은 캔들은 값이 바뀌므로 저장하지 않습니다.
+"""
+import os
+import sqlite3
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.candles import Candles
+
+Range = Tuple[int, int]  # (시작, 끝) 캔들 시작 시각 기준 닫힌 구간 (Unix timestamp, 초 단위)
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS candles ("
+    " symbol TEXT NOT NULL, interval TEXT NOT NULL, time INTEGER NOT NULL,"
+    " open REAL NOT NULL, high REAL NOT NULL, low REAL NOT NULL, close REAL NOT NULL, volume REAL NOT NULL,"
+    " PRIMARY KEY (symbol, interval, time)) WITHOUT ROWID",
+    "CREATE TABLE IF NOT EXISTS coverage ("
+    " symbol TEXT NOT NULL, interval TEXT NOT NULL, start_time INTEGER NOT NULL, end_time INTEGER NOT NULL,"
+    " PRIMARY KEY (symbol, interval, start_time)) WITHOUT ROWID",
+)
+
+
+def merge_ranges(ranges: List[Range]) -> List[Range]:
+    """겹치거나 맞닿은 구간을 합쳐 시작 시각순으로 반환"""
+    merged: List[Range] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def subtract_ranges(start: int, end: int, covered: List[Range]) -> List[Range]:
+    """[start, end]에서 covered(정렬 / 병합된 구간)를 뺀 나머지 구간"""
+    missing: List[Range] = []
+    cursor = start
+    for covered_start, covered_end in covered:
+        if covered_end < cursor:
+            continue
+        if covered_start > end:
+            break
+        if covered_start > cursor:
+            missing.append((cursor, covered_start - 1))
+        cursor = covered_end + 1
+    if cursor <= end:
+        missing.append((cursor, end))
+    return missing
+
+
+def find_gaps(times: np.ndarray, interval_seconds: int) -> List[Range]:
+    """
+    정렬된 캔들 시각 사이에서 빠진 캔들 구간 (첫 번째, 마지막 누락 캔들 시작 시각)
+    앞뒤 구간(상장 전 / 조회 범위 밖)은 누락으로 보지 않습니다.
+    """
+    if len(times) < 2:
+        return []
+    steps = np.diff(times)
+    positions = np.flatnonzero(steps > interval_seconds)
+    return [
+        (int(times[i]) + interval_seconds, int(times[i + 1]) - interval_seconds)
+        for i in positions
+    ]
+
+
+class CandleStore:
+    """SQLite 파일 하나에 여러 (symbol, interval)의 마감된 캔들과 조회 구간을 저장"""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")  # 읽기와 쓰기가 서로 막지 않도록
+            for statement in _SCHEMA:
+                conn.execute(statement)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # 스레드마다 호출되므로 연결은 작업 단위로 열고 닫음 (with 블록이 끝나면 커밋)
+        conn = sqlite3.connect(self.path, timeout=30.0)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def coverage(self, symbol: str, interval: str) -> List[Range]:
+        """업스트림에서 받아 온 구간 목록 (시작 시각순)"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT start_time, end_time FROM coverage WHERE symbol = ? AND interval = ? ORDER BY start_time",
+                (symbol, interval),
+            ).fetchall()
+        return [(start, end) for start, end in rows]
+
+    def missing(self, symbol: str, interval: str, start_time: int, end_time: int) -> List[Range]:
+        """[start_time, end_time] 중 아직 받아 오지 않은 구간"""
+        return subtract_ranges(start_time, end_time, self.coverage(symbol, interval))
+
+    def load(self, symbol: str, interval: str, start_time: int, end_time: int) -> Candles:
+        """start_time <= time <= end_time인 저장된 캔들 (시간순)"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT time, open, high, low, close, volume FROM candles"
+                " WHERE symbol = ? AND interval = ? AND time BETWEEN ? AND ? ORDER BY time",
+                (symbol, interval, start_time, end_time),
+            ).fetchall()
+        if not rows:
+            return Candles.empty()
+        table = np.array(rows, dtype=np.float64).T.copy()
+        return Candles(table[0].astype(np.int64), table[1], table[2], table[3], table[4], table[5])
+
+    def save(self, symbol: str, interval: str, candles: Candles, ranges: List[Range]) -> None:
+        """
+        ranges 구간을 조회한 결과 candles를 저장하고 구간을 조회 완료로 기록
+        캔들과 구간은 한 트랜잭션으로 기록하므로, 중간에 실패해도 구간만 기록된 채로 남지 않습니다.
+        """
+        rows = zip(
+            [symbol] * len(candles),
+            [interval] * len(candles),
+            candles.time.tolist(),
+            candles.open.tolist(),
+            candles.high.tolist(),
+            candles.low.tolist(),
+            candles.close.tolist(),
+            candles.volume.tolist(),
+        )
+        with self._connect() as conn:
+            conn.executemany("INSERT OR REPLACE INTO candles VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            existing = conn.execute(
+                "SELECT start_time, end_time FROM coverage WHERE symbol = ? AND interval = ?",
+                (symbol, interval),
+            ).fetchall()
+            conn.execute("DELETE FROM coverage WHERE symbol = ? AND interval = ?", (symbol, interval))
+            conn.executemany(
+                "INSERT INTO coverage VALUES (?, ?, ?, ?)",
+                [(symbol, interval, start, end) for start, end in merge_ranges(list(existing) + list(ranges))],
+            )
+
+    def status(self, symbol: str, interval: str, interval_seconds: int) -> Dict[str, Any]:
+        """저장 현황: 캔들 수, 첫 / 마지막 캔들 시각, 조회 구간, 누락 구간"""
+        with self._connect() as conn:
+            times = np.array(
+                [row[0] for row in conn.execute(
+                    "SELECT time FROM candles WHERE symbol = ? AND interval = ? ORDER BY time",
+                    (symbol, interval),
+                )],
+                dtype=np.int64,
+            )
+        return {
+            "count": len(times),
+            "first": int(times[0]) if len(times) else None,
+            "last": int(times[-1]) if len(times) else None,
+            "coverage": [{"start": start, "end": end} for start, end in self.coverage(symbol, interval)],
+            "gaps": [{"start": start, "end": end} for start, end in find_gaps(times, interval_seconds)],
+        }
+
+
+_store: Optional[CandleStore] = None
+
+
+def get_candle_store() -> Optional[CandleStore]:
+    """
+    공용 캔들 저장소 조회 (최초 호출 시 생성)
+    경로는 CANDLE_STORE_PATH 환경 변수 (기본값 .cache/candles.sqlite, 빈 값이면 저장소를 사용하지 않음)
+    """
+    global _store
+    if _store is None:
+        path = os.getenv("CANDLE_STORE_PATH", ".cache/candles.sqlite")
+        if not path:
+            return None
+        _store = CandleStore(path)
+    return _store
@@ -0,0 +1,192 @@
+"""
+캔들 데이터 컨테이너
+캔들을 봉마다 dict로 들고 다니는 대신 필드별 NumPy 배열(열 단위)로 보관합니다.
+슬라이싱은 복사 없이 뷰를 반환하며, dict 변환은 JSON 응답 직렬화 시점에만 수행합니다.
+"""
+from typing import List, Dict, Any, Iterable, Optional, Union
+
+import numpy as np
+
+CANDLE_FIELDS = ("time", "open", "high", "low", "close", "volume")
+
+# 캔들 간격별 길이 (초). 1M(월봉)은 길이가 일정하지 않아 제외합니다.
+INTERVAL_SECONDS = {
+    "1m": 60,
+    "3m": 3 * 60,
+    "5m": 5 * 60,
+    "15m": 15 * 60,
+    "30m": 30 * 60,
+    "1h": 60 * 60,
+    "2h": 2 * 60 * 60,
+    "4h": 4 * 60 * 60,
+    "6h": 6 * 60 * 60,
+    "8h": 8 * 60 * 60,
+    "12h": 12 * 60 * 60,
+    "1d": 24 * 60 * 60,
+    "3d": 3 * 24 * 60 * 60,
+    "1w": 7 * 24 * 60 * 60,
+}
+
+
+class Candles:
+    """
+    열 기반 캔들 배열
+    time은 Unix timestamp(초, int64), 나머지 필드는 float64 배열입니다.
+    """
+
+    __slots__ = CANDLE_FIELDS
+
+    def __init__(
+        self,
+        time: np.ndarray,
+        open: np.ndarray,
+        high: np.ndarray,
+        low: np.ndarray,
+        close: np.ndarray,
+        volume: np.ndarray,
+    ):
+        # asanyarray: 메모리 맵(np.memmap) 열은 하위 클래스를 유지해 워커에 파일 핸들로 넘길 수 있게 함
+        self.time = np.asanyarray(time, dtype=np.int64)
+        self.open = np.asanyarray(open, dtype=np.float64)
+        self.high = np.asanyarray(high, dtype=np.float64)
+        self.low = np.asanyarray(low, dtype=np.float64)
+        self.close = np.asanyarray(close, dtype=np.float64)
+        self.volume = np.asanyarray(volume, dtype=np.float64)
+
+    @classmethod
+    def empty(cls) -> "Candles":
+        """빈 캔들 배열"""
+        return cls(*(np.empty(0) for _ in CANDLE_FIELDS))
+
+    @classmethod
+    def from_binance(cls, rows: List[List[Any]]) -> "Candles":
+        """
+        Binance klines 응답([timestamp(ms), open, high, low, close, volume, ...])을 변환
+        """
+        if not rows:
+            return cls.empty()
+
+        # 필드별로 연속된 배열이 되도록 전치 후 복사
+        table = np.array([row[:6] for row in rows], dtype=np.float64).T.copy()
+        time = table[0].astype(np.int64) // 1000  # 밀리초를 초로 변환
+        return cls(time, table[1], table[2], table[3], table[4], table[5])
+
+    @classmethod
+    def from_dicts(cls, klines: Iterable[Dict[str, Any]]) -> "Candles":
+        """dict 리스트 형식의 캔들을 변환"""
+        klines = list(klines)
+        n = len(klines)
+        return cls(*(
+            np.fromiter((candle[field] for candle in klines), dtype=np.float64, count=n)
+            for field in CANDLE_FIELDS
+        ))
+
+    @classmethod
+    def concat(cls, parts: List["Candles"]) -> "Candles":
+        """여러 캔들 배열을 이어 붙임 (비어 있지 않은 배열이 하나뿐이면 복사하지 않고 그대로 반환)"""
+        parts = [part for part in parts if len(part)]
+        if not parts:
+            return cls.empty()
+        if len(parts) == 1:
+            return parts[0]
+        return cls(*(
+            np.concatenate([getattr(part, field) for part in parts])
+            for field in CANDLE_FIELDS
+        ))
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+    def __getitem__(self, index: Union[slice, np.ndarray]) -> "Candles":
+        """슬라이스는 복사 없이 뷰를 반환 (정수/불리언 배열 인덱스는 복사본)"""
+        if isinstance(index, (int, np.integer)):
+            raise TypeError("단일 캔들은 row()로 조회하세요.")
+        return Candles(*(getattr(self, field)[index] for field in CANDLE_FIELDS))
+
+    def row(self, index: int) -> Dict[str, Any]:
+        """단일 캔들을 dict로 반환"""
+        return {
+            "time": int(self.time[index]),
+            "open": float(self.open[index]),
+            "high": float(self.high[index]),
+            "low": float(self.low[index]),
+            "close": float(self.close[index]),
+            "volume": float(self.volume[index]),
+        }
+
+    @property
+    def nbytes(self) -> int:
+        """배열이 차지하는 메모리 (바이트)"""
+        return sum(getattr(self, field).nbytes for field in CANDLE_FIELDS)
+
+    def is_sorted(self) -> bool:
+        """시간순 정렬 여부"""
+        return len(self.time) < 2 or bool(np.all(self.time[1:] >= self.time[:-1]))
+
+    def sorted(self) -> "Candles":
+        """시간순 정렬 (이미 정렬되어 있으면 그대로 반환)"""
+        if self.is_sorted():
+            return self
+        return self[np.argsort(self.time, kind="stable")]
+
+    def deduplicated(self) -> "Candles":
+        """시간순 정렬 후 같은 시각의 캔들은 마지막 것만 남김 (여러 번 조회한 구간을 합칠 때 사용)"""
+        candles = self.sorted()
+        if len(candles) < 2:
+            return candles
+        keep = np.append(candles.time[1:] != candles.time[:-1], True)
+        if keep.all():
+            return candles
+        return candles[keep]
+
+    def between(self, start_time: int, end_time: int) -> "Candles":
+        """
+        start_time <= time <= end_time 구간을 뷰로 반환
+        시간순 정렬된 배열을 전제로 이진 탐색합니다.
+        """
+        start = int(np.searchsorted(self.time, start_time, side="left"))
+        end = int(np.searchsorted(self.time, end_time, side="right"))
+        return self[start:end]
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """JSON 응답용 dict 리스트로 변환"""
+        return [
+            {"time": t, "open": o, "high": h, "low": l, "close": c, "volume": v}
+            for t, o, h, l, c, v in zip(
+                self.time.tolist(),
+                self.open.tolist(),
+                self.high.tolist(),
+                self.low.tolist(),
+                self.close.tolist(),
+                self.volume.tolist(),
+            )
+        ]
+
+
+class Curve:
+    """
+    시간-값 곡선 (자산 곡선, 누적 수익률 곡선 등)
+    time은 int64, value는 float64 배열입니다.
+    """
+
+    __slots__ = ("time", "value")
+
+    def __init__(self, time: np.ndarray, value: np.ndarray):
+        self.time = np.asarray(time, dtype=np.int64)
+        self.value = np.asarray(value, dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+    def __getitem__(self, index: Union[slice, np.ndarray]) -> "Curve":
+        return Curve(self.time[index], self.value[index])
+
+    def to_dicts(self, digits: Optional[int] = None) -> List[Dict[str, Any]]:
+        """JSON 응답용 dict 리스트로 변환 (digits가 주어지면 반올림)"""
+        values = self.value.tolist()
+        if digits is not None:
+            values = [round(value, digits) for value in values]
+        return [
+            {"time": t, "value": v}
+            for t, v in zip(self.time.tolist(), values)
+        ]
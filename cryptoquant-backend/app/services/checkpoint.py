@@ -0,0 +1,546 @@
+"""
+증분 백테스트 체크포인트
+백테스트가 끝난 시점의 재개 가능한 상태(지표 상태, 포지션/현금, 누적 최고값과 수익률 합계 등)를 저장해 두고,
+같은 설정으로 기간만 뒤로 늘어난 요청은 새로 추가된 캔들만 처리합니다.
+
+지표 상태는 배열 모드 계산과 같은 결과가 나오도록 전략별로 보관합니다.
+- 이동평균/RSI: 창 길이가 유한하므로 마지막 캔들 몇 개(lookback)를 보관하고 새 캔들과 이어 붙여 다시 계산
+- EMA/MACD: 스트리밍 지표 객체(EMA, MACD)를 마지막 값으로 복원해 새 캔들만 갱신
+- 변동성 돌파: 마지막 캔들과 직전 봉 매수 여부
+사용자 정의 규칙(custom) 전략과 봉 내부 체결은 재개를 지원하지 않으며 항상 전체 기간을 계산합니다.
+"""
+import copy
+import io
+import json
+import os
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.analytics import EquityAccumulator
+from app.services.backtest import (
+    ACTION_BUY,
+    BacktestEngine,
+    _breakout_actions,
+    _crossover_actions,
+)
+from app.services.candles import CANDLE_FIELDS, Candles, Curve
+from app.services.indicators import EMA, MACD, IndicatorSet
+from app.services.result_cache import ResultCache, disk_budget
+from app.services.workers import CandleHandle, attach_candles
+
+RESUMABLE_STRATEGIES = ("moving_average", "rsi", "ema", "macd", "volatility_breakout")
+
+# 체크포인트 직렬화 형식 버전 (저장하는 상태 구성이 바뀌면 올림)
+_FORMAT_VERSION = 1
+
+
+class BacktestCheckpoint:
+    """
+    캔들 count개(첫 캔들 시각 first_time, 마지막 캔들 last_candle)까지 처리한 백테스트 상태
+    config가 같고 같은 캔들로 시작하는 요청만 이어서 계산할 수 있습니다.
+    """
+
+    def __init__(
+        self,
+        config: Dict[str, Any],
+        first_time: int,
+        count: int,
+        last_candle: Dict[str, Any],
+        signal_state: Dict[str, Any],
+        cash: float,
+        position: float,
+        last_buy_price: Optional[float],
+        total_trades: int,
+        wins: int,
+        held_bars: int,
+        accumulator: EquityAccumulator,
+    ):
+        self.config = config
+        self.first_time = first_time
+        self.count = count
+        self.last_candle = last_candle
+        self.signal_state = signal_state
+        self.cash = cash
+        self.position = position
+        self.last_buy_price = last_buy_price
+        self.total_trades = total_trades
+        self.wins = wins
+        self.held_bars = held_bars
+        self.accumulator = accumulator
+
+    @property
+    def last_time(self) -> int:
+        return self.last_candle["time"]
+
+    def locate(self, candles: Candles) -> Optional[int]:
+        """
+        candles에서 체크포인트 마지막 캔들의 위치 (없거나 값이 달라졌으면 None)
+        candles는 전체 기간이거나 체크포인트 마지막 캔들부터 시작하는 구간입니다.
+        """
+        index = int(np.searchsorted(candles.time, self.last_time))
+        if index >= len(candles) or candles.row(index) != self.last_candle:
+            return None
+        return index
+
+    def to_bytes(self) -> bytes:
+        """
+        npz 형식으로 직렬화
+        지표 상태의 캔들 배열은 배열 항목으로, 나머지 상태는 JSON(UTF-8 바이트 배열) 항목 하나로 저장합니다.
+        """
+        arrays: Dict[str, np.ndarray] = {}
+        state = {
+            "version": _FORMAT_VERSION,
+            "config": self.config,
+            "firstTime": self.first_time,
+            "count": self.count,
+            "lastCandle": self.last_candle,
+            "signalState": {
+                name: _encode_value(name, value, arrays) for name, value in self.signal_state.items()
+            },
+            "cash": self.cash,
+            "position": self.position,
+            "lastBuyPrice": self.last_buy_price,
+            "totalTrades": self.total_trades,
+            "wins": self.wins,
+            "heldBars": self.held_bars,
+            "accumulator": vars(self.accumulator),
+        }
+        arrays["state"] = np.frombuffer(json.dumps(state).encode("utf-8"), dtype=np.uint8)
+        buffer = io.BytesIO()
+        np.savez(buffer, **arrays)
+        return buffer.getvalue()
+
+    @staticmethod
+    def from_bytes(body: bytes) -> Optional["BacktestCheckpoint"]:
+        try:
+            with np.load(io.BytesIO(body), allow_pickle=False) as archive:
+                arrays = {name: archive[name] for name in archive.files}
+            state = json.loads(arrays.pop("state").tobytes().decode("utf-8"))
+            if state.get("version") != _FORMAT_VERSION:
+                return None
+            accumulator = EquityAccumulator(state["accumulator"]["initial_capital"])
+            vars(accumulator).update(state["accumulator"])
+            return BacktestCheckpoint(
+                config=state["config"],
+                first_time=state["firstTime"],
+                count=state["count"],
+                last_candle=state["lastCandle"],
+                signal_state={
+                    name: _decode_value(name, value, arrays) for name, value in state["signalState"].items()
+                },
+                cash=state["cash"],
+                position=state["position"],
+                last_buy_price=state["lastBuyPrice"],
+                total_trades=state["totalTrades"],
+                wins=state["wins"],
+                held_bars=state["heldBars"],
+                accumulator=accumulator,
+            )
+        except Exception:
+            # 형식 변경 등으로 읽을 수 없는 체크포인트는 없는 것으로 취급
+            return None
+
+
+def _ema_state(ema: EMA) -> Dict[str, Any]:
+    return {
+        "period": ema.period,
+        "start": ema.start,
+        "count": ema.count,
+        "window": list(ema.window),
+        "value": ema.value,
+    }
+
+
+def _restore_ema(state: Dict[str, Any]) -> EMA:
+    ema = EMA(state["period"], start=state["start"])
+    ema.count = state["count"]
+    ema.window = deque(state["window"], maxlen=ema.period)
+    ema.value = state["value"]
+    return ema
+
+
+def _encode_value(name: str, value: Any, arrays: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    """지표 상태 값 하나를 JSON 값으로 변환 (캔들은 arrays에 필드별 배열로 추가)"""
+    if isinstance(value, Candles):
+        for field in CANDLE_FIELDS:
+            arrays[f"{name}.{field}"] = np.ascontiguousarray(getattr(value, field))
+        return {"type": "candles"}
+    if isinstance(value, MACD):
+        return {
+            "type": "macd",
+            "fast": _ema_state(value.fast),
+            "slow": _ema_state(value.slow),
+            "signalPeriod": value.signal_period,
+            "count": value.count,
+            "runningSum": value.running_sum,
+            "value": value.value,
+            "signal": value.signal,
+        }
+    if isinstance(value, EMA):
+        return {"type": "ema", **_ema_state(value)}
+    if isinstance(value, bool):
+        return {"type": "bool", "value": value}
+    raise TypeError(f"직렬화할 수 없는 지표 상태입니다: {name}")
+
+
+def _decode_value(name: str, state: Dict[str, Any], arrays: Dict[str, np.ndarray]) -> Any:
+    """_encode_value의 역변환"""
+    kind = state["type"]
+    if kind == "candles":
+        return Candles(*(arrays[f"{name}.{field}"] for field in CANDLE_FIELDS))
+    if kind == "macd":
+        macd = MACD(signal_period=state["signalPeriod"])
+        macd.fast = _restore_ema(state["fast"])
+        macd.slow = _restore_ema(state["slow"])
+        macd.count = state["count"]
+        macd.running_sum = state["runningSum"]
+        macd.value = state["value"]
+        macd.signal = state["signal"]
+        return macd
+    if kind == "ema":
+        return _restore_ema(state)
+    if kind == "bool":
+        return state["value"]
+    raise ValueError(f"알 수 없는 지표 상태입니다: {name}")
+
+
+# ---------------------------------------------------------------------------
+# 전략별 지표 상태
+# ---------------------------------------------------------------------------
+
+def _min_history(strategy_type: str, parameters: Dict[str, Any]) -> int:
+    """재개 상태를 만들 수 있는 최소 캔들 수 (지표가 모두 준비되고 신호 유효 구간에 들어선 이후)"""
+    if strategy_type == "moving_average":
+        return int(parameters.get("longPeriod", 20)) + 2
+    if strategy_type == "rsi":
+        return int(parameters.get("rsiPeriod", 14)) + 2
+    if strategy_type == "ema":
+        return int(parameters.get("longPeriod", 26)) + 2
+    if strategy_type == "macd":
+        return int(parameters.get("slowPeriod", 26)) + int(parameters.get("signalPeriod", 9)) + 1
+    return 2
+
+
+def _copy_candles(candles: Candles) -> Candles:
+    """원본 배열을 붙잡지 않도록 복사"""
+    return Candles(*(np.array(getattr(candles, field)) for field in CANDLE_FIELDS))
+
+
+def _initial_signal_state(
+    engine: BacktestEngine,
+    history: Candles,
+    actions: np.ndarray,
+    strategy_type: str,
+    parameters: Dict[str, Any],
+) -> Dict[str, Any]:
+    """처리한 캔들 전체(history)와 그 신호로 지표 상태 생성"""
+    n = len(history)
+    if strategy_type in ("moving_average", "rsi"):
+        return {"window": _copy_candles(history[-_min_history(strategy_type, parameters):])}
+
+    if strategy_type == "volatility_breakout":
+        return {"window": _copy_candles(history[-1:]), "bought_last": bool(actions[-1] == ACTION_BUY)}
+
+    indicators = IndicatorSet(history)
+    if strategy_type == "ema":
+        short_period = int(parameters.get("shortPeriod", 12))
+        long_period = int(parameters.get("longPeriod", 26))
+        state = {}
+        for name, period in (("short", short_period), ("long", long_period)):
+            ema = EMA(period, start=long_period)
+            ema.value = float(indicators.ema(period, start=long_period)[-1])
+            ema.count = n
+            state[name] = ema
+        return state
+
+    # macd: 배열 모드와 같은 시작 지점(slow_period)에서 초기화한 스트리밍 MACD로 복원
+    fast_period = int(parameters.get("fastPeriod", 12))
+    slow_period = int(parameters.get("slowPeriod", 26))
+    signal_period = int(parameters.get("signalPeriod", 9))
+    macd_line, signal_line, _ = indicators.macd(fast_period, slow_period, signal_period, start=slow_period)
+    macd = MACD(fast_period, slow_period, signal_period, start=slow_period)
+    for ema, period in ((macd.fast, fast_period), (macd.slow, slow_period)):
+        ema.value = float(indicators.ema(period, start=slow_period)[-1])
+        ema.count = n
+    macd.count = n - slow_period
+    macd.running_sum = sum(macd_line[slow_period:].tolist())
+    macd.value = float(macd_line[-1])
+    macd.signal = float(signal_line[-1])
+    return {"macd": macd}
+
+
+def _advance_signals(
+    engine: BacktestEngine,
+    state: Dict[str, Any],
+    candles: Candles,
+    strategy_type: str,
+    parameters: Dict[str, Any],
+) -> np.ndarray:
+    """지표 상태에 이어지는 새 캔들의 신호 계산 (state를 새 캔들 이후 상태로 갱신)"""
+    if not len(candles):
+        return np.zeros(0, dtype=np.int8)
+
+    if strategy_type in ("moving_average", "rsi"):
+        window = state["window"]
+        joined = Candles.concat([window, candles])
+        actions = engine._generate_signals(joined, strategy_type, parameters)[len(window):]
+        state["window"] = _copy_candles(joined[-len(window):])
+        return actions
+
+    if strategy_type == "volatility_breakout":
+        joined = Candles.concat([state["window"], candles])
+        threshold = engine._breakout_threshold(IndicatorSet(joined), parameters)
+        breakout = np.zeros(len(joined), dtype=bool)
+        breakout[1:] = joined.close[1:] > threshold[1:]
+        # 직전 봉이 매수였다면 첫 새 봉은 매도 봉이므로 직전 봉을 돌파 봉으로 두고 계산
+        breakout[0] = state["bought_last"]
+        actions = _breakout_actions(breakout)[1:]
+        state["window"] = _copy_candles(joined[-1:])
+        state["bought_last"] = bool(actions[-1] == ACTION_BUY)
+        return actions
+
+    closes = candles.close.tolist()
+    if strategy_type == "ema":
+        fast = [state["short"].value] + [state["short"].update(price) for price in closes]
+        slow = [state["long"].value] + [state["long"].update(price) for price in closes]
+    else:
+        macd = state["macd"]
+        fast, slow = [macd.value], [macd.signal]
+        for price in closes:
+            value, signal = macd.update(price)
+            fast.append(value)
+            slow.append(signal)
+    return _crossover_actions(np.array(fast), np.array(slow), valid_from=0)[1:]
+
+
+# ---------------------------------------------------------------------------
+# 증분 실행
+# ---------------------------------------------------------------------------
+
+def _trade_stats(
+    trades: List[Dict[str, Any]], last_buy_price: Optional[float], total_trades: int, wins: int
+) -> Tuple[Optional[float], int, int]:
+    """거래 목록을 이어서 (마지막 매수가, 거래 수, 수익 거래 수) 갱신"""
+    for trade in trades:
+        if trade["type"] == "buy":
+            last_buy_price = trade["price"]
+        else:
+            total_trades += 1
+            wins += trade["price"] > last_buy_price
+    return last_buy_price, total_trades, wins
+
+
+def _held_bars(time: np.ndarray, trades: List[Dict[str, Any]], holding: bool) -> int:
+    """구간 봉 중 포지션을 보유한 봉 수 (매수 봉부터 매도 직전 봉까지, exposure_ratio와 같은 기준)"""
+    entry = 0 if holding else None
+    held = 0
+    for trade in trades:
+        index = int(np.searchsorted(time, trade["time"]))
+        if trade["type"] == "buy":
+            entry = index
+        elif entry is not None:
+            held += index - entry
+            entry = None
+    if entry is not None:
+        held += len(time) - entry
+    return held
+
+
+class _Progress:
+    """엔진 밖에서 이어 붙이는 거래/지표 누적 상태"""
+
+    def __init__(self, checkpoint: Optional[BacktestCheckpoint], initial_capital: float):
+        if checkpoint is None:
+            self.last_buy_price, self.total_trades, self.wins, self.held_bars = None, 0, 0, 0
+            self.accumulator = EquityAccumulator(initial_capital)
+        else:
+            self.last_buy_price = checkpoint.last_buy_price
+            self.total_trades = checkpoint.total_trades
+            self.wins = checkpoint.wins
+            self.held_bars = checkpoint.held_bars
+            self.accumulator = checkpoint.accumulator.copy()
+
+    def add(self, candles: Candles, values: np.ndarray, trades: List[Dict[str, Any]], holding: bool) -> None:
+        self.held_bars += _held_bars(candles.time, trades, holding)
+        self.last_buy_price, self.total_trades, self.wins = _trade_stats(
+            trades, self.last_buy_price, self.total_trades, self.wins
+        )
+        self.accumulator.update(candles.time, values)
+
+
+def run_incremental(
+    engine: BacktestEngine,
+    candles: Candles,
+    strategy_type: str,
+    parameters: Dict[str, Any],
+    initial_capital: Optional[float] = None,
+    checkpoint: Optional[BacktestCheckpoint] = None,
+    closed_until: Optional[float] = None,
+) -> Tuple[Dict[str, Any], Optional[BacktestCheckpoint]]:
+    """
+    체크포인트를 이용한 증분 백테스트 (성과 지표 + 월간 수익률)
+    checkpoint: 이전 실행 상태. candles에서 마지막 캔들을 찾을 수 있으면 그 이후 캔들만 처리합니다.
+    closed_until: 이 시각(Unix timestamp) 이하에 시작한 캔들만 마감된 것으로 봅니다 (기본값: 모두 마감).
+                  새 체크포인트에는 마감된 캔들까지만 담고, 정산으로 값이 바뀌는 마지막 캔들은
+                  항상 다음 실행에서 다시 처리하도록 남깁니다.
+    반환값: (결과, 새 체크포인트 - 재개를 지원하지 않거나 캔들이 부족하면 None)
+    """
+    if initial_capital is not None:
+        engine.initial_capital = initial_capital
+    config = {
+        "strategyType": strategy_type,
+        "parameters": parameters,
+        "initialCapital": engine.initial_capital,
+        "commission": engine.commission,
+    }
+    resumable = strategy_type in RESUMABLE_STRATEGIES
+    start = checkpoint.locate(candles) if checkpoint is not None and resumable and checkpoint.config == config else None
+    if start is None:
+        checkpoint = None
+
+    n = len(candles)
+    if closed_until is None:
+        closed = n
+    else:
+        closed = int(np.searchsorted(candles.time, closed_until, side="right"))
+    cut = max(min(closed, n - 1), 0)
+
+    if checkpoint is None:
+        # 전체 계산: 벡터 신호 생성 후 체크포인트 지점까지 실행
+        candles, actions, fills = engine._prepare(candles, strategy_type, parameters)
+        offset = 0
+        first_time = int(candles.time[0]) if n else 0
+        signal_state = None
+    else:
+        # 체크포인트 이후 캔들만 처리
+        offset = start + 1
+        engine.equity = checkpoint.cash
+        engine.position = checkpoint.position
+        engine.trades = []
+        engine.trade_signals = []
+        first_time = checkpoint.first_time
+        signal_state = copy.deepcopy(checkpoint.signal_state)
+        fills = None
+        actions = np.zeros(n, dtype=np.int8)
+        actions[offset:max(cut, offset)] = _advance_signals(
+            engine, signal_state, candles[offset:max(cut, offset)], strategy_type, parameters
+        )
+
+    progress = _Progress(checkpoint, engine.initial_capital)
+    base_count = checkpoint.count - offset if checkpoint is not None else 0
+
+    def execute(lo: int, hi: int) -> None:
+        holding = engine.position > 0
+        trade_count = len(engine.trades)
+        values = np.array(engine._execute(candles, actions, fills, lo, hi), dtype=np.float64)
+        progress.add(candles[lo:hi], values, engine.trades[trade_count:], holding)
+
+    # 1) 마감된 캔들까지 실행하고 체크포인트 저장
+    new_checkpoint = checkpoint
+    if cut > offset:
+        execute(offset, cut)
+        if resumable and base_count + cut >= _min_history(strategy_type, parameters):
+            if signal_state is None:
+                signal_state = _initial_signal_state(
+                    engine, candles[:cut], actions[:cut], strategy_type, parameters
+                )
+            new_checkpoint = BacktestCheckpoint(
+                config=config,
+                first_time=first_time,
+                count=base_count + cut,
+                last_candle=candles.row(cut - 1),
+                signal_state=copy.deepcopy(signal_state),
+                cash=engine.equity,
+                position=engine.position,
+                last_buy_price=progress.last_buy_price,
+                total_trades=progress.total_trades,
+                wins=progress.wins,
+                held_bars=progress.held_bars,
+                accumulator=progress.accumulator.copy(),
+            )
+        else:
+            new_checkpoint = None
+
+    # 2) 나머지 캔들(마지막 캔들, 미마감 캔들) 실행 후 정산
+    tail_start = max(cut, offset)
+    if checkpoint is not None and tail_start < n:
+        actions[tail_start:] = _advance_signals(
+            engine, signal_state, candles[tail_start:], strategy_type, parameters
+        )
+    if tail_start < n:
+        holding = engine.position > 0
+        trade_count = len(engine.trades)
+        values = np.array(engine._execute(candles, actions, fills, tail_start, n), dtype=np.float64)
+        # _liquidate가 마지막 값을 정산 후 가치로 보정
+        engine.equity_curve = Curve(candles.time[tail_start:], values)
+        engine._liquidate(candles)
+        progress.add(candles[tail_start:], engine.equity_curve.value, engine.trades[trade_count:], holding)
+
+    accumulator = progress.accumulator
+    win_rate = progress.wins / progress.total_trades * 100 if progress.total_trades else 0.0
+    exposure = progress.held_bars / accumulator.count * 100 if accumulator.count else 0.0
+    metrics = accumulator.metrics(
+        total_trades=progress.total_trades,
+        win_rate=win_rate,
+        exposure=exposure,
+        start_time=first_time,
+        end_time=int(candles.time[-1]) if n else first_time,
+    )
+    result = {
+        **metrics,
+        "monthlyReturns": accumulator.monthly_returns(),
+        "resumed": checkpoint is not None,
+        "processedCandles": n - offset,
+        "totalCandles": accumulator.count,
+    }
+    return result, new_checkpoint
+
+
+def run_incremental_task(
+    handle: CandleHandle,
+    checkpoint_body: Optional[bytes],
+    strategy_type: str,
+    parameters: Dict[str, Any],
+    initial_capital: float,
+    commission: float,
+    closed_until: Optional[float],
+) -> Tuple[Dict[str, Any], Optional[bytes]]:
+    """
+    워커 프로세스 작업: 공유 캔들로 증분 백테스트 실행
+    체크포인트는 직렬화된 바이트로 주고받으며, 저장할 새 체크포인트가 없으면 None을 반환합니다.
+    """
+    checkpoint = BacktestCheckpoint.from_bytes(checkpoint_body) if checkpoint_body is not None else None
+    engine = BacktestEngine(initial_capital=initial_capital, commission=commission, use_signal_cache=True)
+    result, new_checkpoint = run_incremental(
+        engine,
+        attach_candles(handle),
+        strategy_type=strategy_type,
+        parameters=parameters,
+        initial_capital=initial_capital,
+        checkpoint=checkpoint,
+        closed_until=closed_until,
+    )
+    if new_checkpoint is None or new_checkpoint is checkpoint:
+        return result, None
+    return result, new_checkpoint.to_bytes()
+
+
+_store: Optional[ResultCache] = None
+
+
+def get_checkpoint_store() -> ResultCache:
+    """
+    공용 체크포인트 저장소 조회 (최초 호출 시 생성)
+    CHECKPOINT_DIR 환경 변수가 빈 문자열이면 디스크 저장 없이 메모리만 사용합니다.
+    디스크 용량 한도는 CHECKPOINT_DISK_MB (기본값 256, 0이면 제한 없음)
+    """
+    global _store
+    if _store is None:
+        _store = ResultCache(
+            directory=os.getenv("CHECKPOINT_DIR", ".cache/checkpoints") or None,
+            max_entries=max(1, int(os.getenv("CHECKPOINT_CACHE_SIZE", "128"))),
+            max_disk_bytes=disk_budget("CHECKPOINT_DISK_MB", 256),
+        )
+    return _store
@@ -5,6 +5,7 @@ CoinGecko API 서비스
 import httpx
 from typing import List, Dict, Any, Optional
 from datetime import datetime
+from app.services.http_clients import get_http_client
 
 COINGECKO_BASE_URL = "https://api.coingecko.com/api/v3"
 
@@ -32,49 +33,49 @@ async def get_coins_markets(
     Returns:
         코인 시장 데이터 리스트
     """
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(
-                f"{COINGECKO_BASE_URL}/coins/markets",
-                params={
-                    "vs_currency": vs_currency,
-                    "order": order,
-                    "per_page": min(per_page, 250),  # 최대 250개
-                    "page": page,
-                    "sparkline": str(sparkline).lower(),
-                    "price_change_percentage": price_change_percentage,
-                },
-                timeout=15.0,
-            )
-            response.raise_for_status()
-            data = response.json()
-            
-            # Binance 형식으로 변환
-            result = []
-            for coin in data:
-                # CoinGecko symbol을 Binance 형식으로 변환 (예: bitcoin -> BTCUSDT)
-                symbol = coin.get("symbol", "").upper() + "USDT"
-                
-                result.append({
-                    "symbol": symbol,
-                    "price": coin.get("current_price", 0.0),
-                    "change24h": coin.get("price_change_24h", 0.0),
-                    "changePercent24h": coin.get("price_change_percentage_24h", 0.0),
-                    "volume24h": coin.get("total_volume", 0.0),
-                    "high24h": coin.get("high_24h"),
-                    "low24h": coin.get("low_24h"),
-                    "marketCap": coin.get("market_cap"),
-                    "marketCapRank": coin.get("market_cap_rank"),
-                    "name": coin.get("name"),
-                    "image": coin.get("image"),
-                    "lastUpdated": coin.get("last_updated"),
-                })
+    client = get_http_client("coingecko")
+    try:
+        response = await client.get(
+            f"{COINGECKO_BASE_URL}/coins/markets",
+            params={
+                "vs_currency": vs_currency,
+                "order": order,
+                "per_page": min(per_page, 250),  # 최대 250개
+                "page": page,
+                "sparkline": str(sparkline).lower(),
+                "price_change_percentage": price_change_percentage,
+            },
+            timeout=15.0,
+        )
+        response.raise_for_status()
+        data = response.json()
+        
+        # Binance 형식으로 변환
+        result = []
+        for coin in data:
+            # CoinGecko symbol을 Binance 형식으로 변환 (예: bitcoin -> BTCUSDT)
+            symbol = coin.get("symbol", "").upper() + "USDT"
             
-            return result
-        except httpx.HTTPStatusError as e:
-            raise Exception(f"CoinGecko API 오류: {e.response.status_code}")
-        except Exception as e:
-            raise Exception(f"데이터 조회 실패: {str(e)}")
+            result.append({
+                "symbol": symbol,
+                "price": coin.get("current_price", 0.0),
+                "change24h": coin.get("price_change_24h", 0.0),
+                "changePercent24h": coin.get("price_change_percentage_24h", 0.0),
+                "volume24h": coin.get("total_volume", 0.0),
+                "high24h": coin.get("high_24h"),
+                "low24h": coin.get("low_24h"),
+                "marketCap": coin.get("market_cap"),
+                "marketCapRank": coin.get("market_cap_rank"),
+                "name": coin.get("name"),
+                "image": coin.get("image"),
+                "lastUpdated": coin.get("last_updated"),
+            })
+        
+        return result
+    except httpx.HTTPStatusError as e:
+        raise Exception(f"CoinGecko API 오류: {e.response.status_code}")
+    except Exception as e:
+        raise Exception(f"데이터 조회 실패: {str(e)}")
 
 
 async def get_top_gainers(
@@ -0,0 +1,103 @@
+"""
+차트 데이터 다운샘플링 서비스
+차트가 표시할 수 있는 점 수보다 훨씬 많은 곡선/캔들을 응답 전에 줄여
+응답 크기와 직렬화 시간을 maxPoints 이내로 제한합니다.
+- 곡선(자산, 누적 수익률): Largest-Triangle-Three-Buckets (LTTB)
+- 캔들: 구간별 OHLC 집계 (시가=첫 봉 시가, 고가=최고가, 저가=최저가, 종가=마지막 봉 종가, 거래량=합계)
+"""
+from typing import Any, Dict
+
+import numpy as np
+
+from app.services.candles import Candles, Curve
+
+MIN_POINTS = 3
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    LTTB로 남길 점의 인덱스
+    첫 점과 마지막 점은 항상 포함하며, 나머지 점을 threshold - 2개 구간으로 나눠
+    (직전 선택 점, 후보 점, 다음 구간 평균점) 삼각형 넓이가 가장 큰 후보를 구간마다 하나씩 고릅니다.
+    구간 경계/평균과 구간 내 넓이 계산은 벡터 연산이며, 구간 간 의존성 때문에 구간 순회만 루프입니다.
+    """
+    n = len(y)
+    if threshold >= n or threshold < MIN_POINTS:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    buckets = threshold - 2
+    # 가운데 점 [1, n-1)을 buckets개 구간으로 분할 (구간 길이 >= 1이므로 경계가 겹치지 않음)
+    edges = np.floor(np.linspace(1, n - 1, buckets + 1)).astype(np.int64)
+    counts = np.diff(edges)
+    avg_x = np.add.reduceat(x[: edges[-1]], edges[:-1]) / counts
+    avg_y = np.add.reduceat(y[: edges[-1]], edges[:-1]) / counts
+    # 각 구간의 기준점은 다음 구간의 평균점 (마지막 구간은 마지막 점)
+    next_x = np.append(avg_x[1:], x[-1])
+    next_y = np.append(avg_y[1:], y[-1])
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    anchor = 0
+    for bucket in range(buckets):
+        lo, hi = edges[bucket], edges[bucket + 1]
+        ax, ay = x[anchor], y[anchor]
+        area = np.abs(
+            (ax - next_x[bucket]) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (next_y[bucket] - ay)
+        )
+        anchor = lo + int(np.argmax(area))
+        selected[bucket + 1] = anchor
+    return selected
+
+
+def downsample_curve(curve: Curve, max_points: int) -> Curve:
+    """곡선을 LTTB로 max_points개 이하로 축소"""
+    indices = lttb_indices(curve.time, curve.value, max_points)
+    return Curve(curve.time[indices], curve.value[indices])
+
+
+def downsample_candles(candles: Candles, max_points: int) -> Candles:
+    """
+    캔들을 연속된 max_points개 구간으로 묶어 OHLC 집계
+    각 구간의 시간은 첫 봉의 시간입니다.
+    """
+    n = len(candles)
+    if max_points >= n or max_points < MIN_POINTS:
+        return candles
+
+    starts = np.unique(np.floor(np.linspace(0, n, max_points, endpoint=False)).astype(np.int64))
+    ends = np.append(starts[1:], n) - 1
+    return Candles(
+        candles.time[starts],
+        candles.open[starts],
+        np.maximum.reduceat(candles.high, starts),
+        np.minimum.reduceat(candles.low, starts),
+        candles.close[ends],
+        np.add.reduceat(candles.volume, starts),
+    )
+
+
+def downsample_result(result: Dict[str, Any], max_points: int) -> Dict[str, Any]:
+    """
+    BacktestEngine 결과의 차트 데이터를 max_points개 이하로 축소 (성과 지표/매매 신호는 그대로)
+    누적 수익률 곡선은 자산 곡선의 선형 변환이므로 자산 곡선에서 고른 인덱스를 그대로 사용합니다.
+    """
+    payload = dict(result)
+    if isinstance(payload.get("chartData"), Candles):
+        payload["chartData"] = downsample_candles(payload["chartData"], max_points)
+
+    equity = payload.get("equityCurve")
+    if isinstance(equity, Curve):
+        indices = lttb_indices(equity.time, equity.value, max_points)
+        payload["equityCurve"] = Curve(equity.time[indices], equity.value[indices])
+        cumulative = payload.get("cumulativeReturnCurve")
+        if isinstance(cumulative, Curve) and len(cumulative) == len(equity):
+            payload["cumulativeReturnCurve"] = Curve(cumulative.time[indices], cumulative.value[indices])
+
+    for key in ("cumulativeReturnCurve", "drawdownCurve"):
+        curve = payload.get(key)
+        if isinstance(curve, Curve) and len(curve) > max_points:
+            payload[key] = downsample_curve(curve, max_points)
+    return payload
@@ -0,0 +1,171 @@
+"""
+백테스트 실행 이력 서비스
+로그인한 사용자의 백테스트 결과를 BacktestResult로 저장하고, (user_id, created_at, id) 키셋 페이지네이션으로 조회합니다.
+목록은 요약 컬럼만 선택하므로 커버링 인덱스만 읽고, 압축된 상세 데이터는 단건 조회에서만 로드합니다.
+"""
+import asyncio
+import base64
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Set, Tuple
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.strategy import HISTORY_COLUMNS, BacktestResult
+from app.models.user import User
+
+MAX_PAGE_SIZE = 100
+
+# 진행 중인 저장 작업 (완료 전에 가비지 컬렉션되지 않도록 참조 유지)
+_pending: Set[asyncio.Task] = set()
+
+
+def encode_cursor(created_at: datetime, result_id: str) -> str:
+    """다음 페이지 커서 (마지막 행의 created_at, id)"""
+    raw = f"{created_at.isoformat()}|{result_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """encode_cursor의 역변환 (형식이 잘못되면 ValueError)"""
+    try:
+        created_at, result_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|", 1)
+        return datetime.fromisoformat(created_at), result_id
+    except (UnicodeError, ValueError, TypeError) as e:
+        raise ValueError("잘못된 페이지 커서입니다.") from e
+
+
+def save_backtest_result(
+    user: Dict[str, Any],
+    request: Dict[str, Any],
+    record: Dict[str, Any],
+) -> str:
+    """
+    백테스트 결과 저장 (동기 함수, 스레드에서 호출)
+    user: JWT 페이로드 (sub, email, name) - 사용자 행이 없으면 함께 생성
+    request: BacktestRequest 필드 dict
+    record: encode_result_record()로 만든 요약 지표 + 압축된 상세 데이터
+    """
+    db: Session = SessionLocal()
+    try:
+        user_id = user["sub"]
+        if db.get(User, user_id) is None:
+            try:
+                with db.begin_nested():
+                    db.add(User(id=user_id, email=user.get("email") or user_id, name=user.get("name") or ""))
+            except IntegrityError:
+                pass  # 동시에 저장된 다른 결과가 먼저 사용자를 생성함
+        result = BacktestResult(
+            id=str(uuid.uuid4()),
+            user_id=user_id,
+            # 키셋 커서가 DB 종류와 무관하게 같은 정밀도(마이크로초)로 비교되도록 직접 기록
+            created_at=datetime.now(timezone.utc),
+            symbol=request["symbol"],
+            interval=request["interval"],
+            strategy_type=request["strategyType"],
+            parameters=request["parameters"],
+            start_date=datetime.fromisoformat(request["startDate"]),
+            end_date=datetime.fromisoformat(request["endDate"]),
+            **record,
+        )
+        db.add(result)
+        db.commit()
+        return result.id
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def schedule_save(user: Dict[str, Any], request: Dict[str, Any], record: Optional[Dict[str, Any]]) -> None:
+    """
+    응답을 막지 않도록 백그라운드 스레드에서 결과 저장
+    저장 실패는 백테스트 응답에 영향을 주지 않고 로그만 남깁니다.
+    """
+    if record is None or not user.get("sub"):
+        return
+
+    async def save() -> None:
+        try:
+            await asyncio.to_thread(save_backtest_result, user, request, record)
+        except Exception as e:
+            print(f"⚠️ 백테스트 이력 저장 실패: {e}")
+
+    task = asyncio.get_running_loop().create_task(save())
+    _pending.add(task)
+    task.add_done_callback(_pending.discard)
+
+
+def list_history(
+    db: Session,
+    user_id: str,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    사용자의 백테스트 이력 (최신순)
+    cursor는 이전 페이지의 nextCursor이며, 마지막 페이지면 nextCursor가 None입니다.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    columns = [getattr(BacktestResult, name) for name in HISTORY_COLUMNS]
+    query = select(*columns).where(BacktestResult.user_id == user_id)
+    if cursor:
+        created_at, result_id = decode_cursor(cursor)
+        query = query.where(
+            tuple_(BacktestResult.created_at, BacktestResult.id) < tuple_(created_at, result_id)
+        )
+    query = query.order_by(BacktestResult.created_at.desc(), BacktestResult.id.desc()).limit(limit + 1)
+
+    rows = db.execute(query).all()
+    page = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        last = page[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+    return {
+        "history": [_summary(row) for row in page],
+        "nextCursor": next_cursor,
+    }
+
+
+def _summary(row) -> Dict[str, Any]:
+    return {
+        "id": row.id,
+        "symbol": row.symbol,
+        "interval": row.interval,
+        "strategyType": row.strategy_type,
+        "startDate": row.start_date.isoformat(),
+        "endDate": row.end_date.isoformat(),
+        "initialCapital": row.initial_capital,
+        "finalEquity": row.final_equity,
+        "totalReturn": row.total_return,
+        "totalTrades": row.total_trades,
+        "winRate": row.win_rate,
+        "maxDrawdown": row.max_drawdown,
+        "sharpeRatio": row.sharpe_ratio,
+        "createdAt": row.created_at.isoformat() if row.created_at else None,
+    }
+
+
+def get_history_detail(db: Session, user_id: str, result_id: str) -> Optional[Dict[str, Any]]:
+    """
+    이력 단건 조회 (요약 + 파라미터 + 자산 곡선 / 거래 내역 / 월간 수익률)
+    지연 로딩된 상세 데이터는 여기서 한 번에 로드 / 디코딩합니다.
+    """
+    result = db.get(BacktestResult, result_id)
+    if result is None or result.user_id != user_id:
+        return None
+    equity_curve = result.equity_curve
+    return {
+        **_summary(result),
+        "parameters": result.parameters,
+        "winningTrades": result.winning_trades,
+        "losingTrades": result.losing_trades,
+        "equityCurve": equity_curve.to_dicts() if equity_curve is not None else None,
+        "trades": result.trades,
+        "monthlyReturns": result.monthly_returns,
+    }
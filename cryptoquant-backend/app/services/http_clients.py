@@ -0,0 +1,183 @@
+"""
+외부 API HTTP 클라이언트 레지스트리
+업스트림(Binance, CoinGecko 등)마다 애플리케이션 수명 동안 유지되는 httpx.AsyncClient를 하나씩 두어
+keep-alive 연결을 재사용합니다. 호출마다 클라이언트를 만들면 매 요청이 TCP/TLS 핸드셰이크를 다시 거칩니다.
+- 업스트림별 연결 풀 한도와 keep-alive 유지 시간은 UPSTREAMS에서 설정합니다.
+- h2 패키지가 설치되어 있으면 HTTP/2를 사용합니다 (서버가 지원하지 않으면 ALPN으로 HTTP/1.1 사용).
+- 업스트림별 요청 수, 오류 수, 새로 연 연결 / TLS 핸드셰이크 수, 풀 상태를 metrics()로 조회합니다.
+"""
+import importlib.util
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# 업스트림별 연결 풀 설정
+UPSTREAMS: Dict[str, Dict[str, Any]] = {
+    "binance": {"max_connections": 32, "max_keepalive_connections": 16, "timeout": 10.0},
+    "coingecko": {"max_connections": 8, "max_keepalive_connections": 4, "timeout": 15.0},
+    "cryptocompare": {"max_connections": 8, "max_keepalive_connections": 4, "timeout": 10.0},
+    "reddit": {"max_connections": 8, "max_keepalive_connections": 4, "timeout": 10.0},
+    "google_search": {"max_connections": 8, "max_keepalive_connections": 4, "timeout": 10.0},
+    "google_oauth": {"max_connections": 8, "max_keepalive_connections": 4, "timeout": 10.0},
+}
+
+KEEPALIVE_EXPIRY = 60.0  # 유휴 연결 유지 시간 (초)
+
+
+class UpstreamStats:
+    """업스트림 한 곳의 요청 통계"""
+
+    __slots__ = (
+        "requests", "errors", "in_flight", "total_seconds",
+        "connections_opened", "tls_handshakes",
+    )
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.total_seconds = 0.0
+        self.connections_opened = 0
+        self.tls_handshakes = 0
+
+    async def trace(self, event_name: str, info: Dict[str, Any]) -> None:
+        """httpcore trace 확장 콜백: 새 연결 / TLS 핸드셰이크 횟수 집계"""
+        if event_name == "connection.connect_tcp.complete":
+            self.connections_opened += 1
+        elif event_name == "connection.start_tls.complete":
+            self.tls_handshakes += 1
+
+
+class _MeteredTransport(httpx.AsyncBaseTransport):
+    """요청 시간 / 실패를 UpstreamStats에 기록하는 전송 계층 래퍼"""
+
+    def __init__(self, transport: httpx.AsyncHTTPTransport, stats: UpstreamStats):
+        self.transport = transport
+        self.stats = stats
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        stats = self.stats
+        request.extensions = {**request.extensions, "trace": stats.trace}
+        stats.requests += 1
+        stats.in_flight += 1
+        started = time.perf_counter()
+        try:
+            response = await self.transport.handle_async_request(request)
+        except Exception:
+            stats.errors += 1
+            raise
+        finally:
+            stats.in_flight -= 1
+            stats.total_seconds += time.perf_counter() - started
+        if response.status_code >= 400:
+            stats.errors += 1
+        return response
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+class HttpClientRegistry:
+    """업스트림 이름 -> 공유 httpx.AsyncClient"""
+
+    def __init__(self, http2: bool = HTTP2_AVAILABLE):
+        self.http2 = http2
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._transports: Dict[str, httpx.AsyncHTTPTransport] = {}
+        self._stats: Dict[str, UpstreamStats] = {}
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        """업스트림 클라이언트 조회 (처음 요청될 때 생성)"""
+        client = self._clients.get(name)
+        if client is None:
+            client = self._create(name)
+        return client
+
+    def _create(self, name: str) -> httpx.AsyncClient:
+        config = UPSTREAMS[name]
+        transport = httpx.AsyncHTTPTransport(
+            http2=self.http2,
+            limits=httpx.Limits(
+                max_connections=config["max_connections"],
+                max_keepalive_connections=config["max_keepalive_connections"],
+                keepalive_expiry=KEEPALIVE_EXPIRY,
+            ),
+        )
+        stats = UpstreamStats()
+        client = httpx.AsyncClient(
+            transport=_MeteredTransport(transport, stats),
+            timeout=config["timeout"],
+        )
+        self._clients[name] = client
+        self._transports[name] = transport
+        self._stats[name] = stats
+        return client
+
+    def open_all(self) -> None:
+        """설정된 모든 업스트림 클라이언트 생성 (애플리케이션 시작 시)"""
+        for name in UPSTREAMS:
+            self.get(name)
+
+    async def aclose(self) -> None:
+        """모든 클라이언트와 연결 풀 종료"""
+        clients, self._clients = self._clients, {}
+        self._transports = {}
+        for client in clients.values():
+            await client.aclose()
+
+    def metrics(self) -> Dict[str, Any]:
+        """업스트림별 요청 통계 + 연결 풀 상태"""
+        upstreams = {}
+        for name, stats in self._stats.items():
+            pool = _pool_state(self._transports.get(name))
+            upstreams[name] = {
+                "requests": stats.requests,
+                "errors": stats.errors,
+                "inFlight": stats.in_flight,
+                "avgMs": round(stats.total_seconds / stats.requests * 1000, 2) if stats.requests else 0.0,
+                "connectionsOpened": stats.connections_opened,
+                "tlsHandshakes": stats.tls_handshakes,
+                # 새 연결 없이 처리한 요청 비율 (keep-alive / HTTP/2 다중화 효과)
+                "reuseRatio": round(1 - stats.connections_opened / stats.requests, 4) if stats.requests else 0.0,
+                "maxConnections": UPSTREAMS[name]["max_connections"],
+                **pool,
+            }
+        return {"http2": self.http2, "upstreams": upstreams}
+
+
+def _pool_state(transport: Optional[httpx.AsyncHTTPTransport]) -> Dict[str, Any]:
+    """httpcore 연결 풀의 현재 연결 수 (열린 / 유휴 / HTTP/2)"""
+    pool = getattr(transport, "_pool", None)
+    connections = list(getattr(pool, "connections", []) or [])
+    return {
+        "openConnections": len(connections),
+        "idleConnections": sum(1 for c in connections if c.is_idle()),
+        "http2Connections": sum(1 for c in connections if "HTTP/2" in c.info()),
+    }
+
+
+_registry: Optional[HttpClientRegistry] = None
+
+
+def get_http_registry() -> HttpClientRegistry:
+    """공용 HTTP 클라이언트 레지스트리 조회 (최초 호출 시 생성)"""
+    global _registry
+    if _registry is None:
+        _registry = HttpClientRegistry()
+    return _registry
+
+
+def get_http_client(name: str) -> httpx.AsyncClient:
+    """업스트림 공유 클라이언트 조회 (요청이 끝나도 닫지 않고 연결을 재사용)"""
+    return get_http_registry().get(name)
+
+
+async def close_http_clients() -> None:
+    """애플리케이션 종료 시 모든 클라이언트 종료"""
+    global _registry
+    if _registry is not None:
+        await _registry.aclose()
+        _registry = None
@@ -0,0 +1,515 @@
+"""
+기술적 지표 서비스
+SMA, EMA, RSI, MACD, 볼린저 밴드, ATR을 두 가지 방식으로 제공합니다.
+
+- 배열 모드: sma(), ema(), rsi(), macd(), bollinger_bands(), atr()
+  NumPy 배열 전체를 한 번에 계산하며, 값이 아직 정의되지 않는 앞 구간은 NaN입니다.
+  sma/ema/rsi/macd는 (시간 x 심볼) 2차원 배열도 받아 0번 축(시간)을 따라 열마다 계산합니다.
+- 스트리밍 모드: SMA, EMA, RSI, MACD, BollingerBands, ATR 클래스
+  update()로 캔들을 하나씩 넣으면 O(1)로 갱신된 값을 반환합니다 (준비 전에는 None).
+
+IndicatorSet은 한 번의 백테스트 실행 동안 같은 지표를 한 번만 계산하도록 결과를 캐시합니다.
+"""
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.candles import Candles
+
+
+# ---------------------------------------------------------------------------
+# 배열 모드
+# ---------------------------------------------------------------------------
+
+def sma(values: np.ndarray, period: int) -> np.ndarray:
+    """
+    단순 이동평균 values[i - period + 1 : i + 1]
+    창 내부를 앞에서부터 순서대로 더해 파이썬 sum()과 같은 부동소수점 결과를 냅니다.
+    """
+    n = len(values)
+    out = np.full(values.shape, np.nan)
+    if period <= 0 or n < period:
+        return out
+
+    size = n - period + 1
+    total = values[0:size].copy()
+    for offset in range(1, period):
+        total += values[offset : offset + size]
+    out[period - 1 :] = total / period
+    return out
+
+
+def _ema_from(values: List[float], period: int, start: int) -> List[float]:
+    """
+    start 지점에서 직전 period개 평균(SMA)으로 초기화한 EMA
+    반환 리스트의 첫 값이 values[start] 시점의 EMA입니다.
+    """
+    alpha = 2 / (period + 1)
+    ema_value = sum(values[start - period + 1 : start + 1]) / period
+    result = [ema_value]
+    for price in values[start + 1 :]:
+        ema_value = alpha * price + (1 - alpha) * ema_value
+        result.append(ema_value)
+    return result
+
+
+def _ema_rows(values: np.ndarray, period: int, start: int) -> np.ndarray:
+    """
+    2차원 배열용 _ema_from: 시간 축을 따라 한 행씩 갱신하며 모든 열을 동시에 계산
+    반환 배열의 첫 행이 values[start] 시점의 EMA입니다.
+    """
+    alpha = 2 / (period + 1)
+    seed_rows = values[max(start - period + 1, 0) : start + 1]
+    ema_value = seed_rows[0].copy()
+    for row in seed_rows[1:]:
+        ema_value += row
+    ema_value /= period
+
+    result = np.empty((len(values) - start,) + values.shape[1:])
+    result[0] = ema_value
+    for offset, row in enumerate(values[start + 1 :], start=1):
+        ema_value = alpha * row + (1 - alpha) * ema_value
+        result[offset] = ema_value
+    return result
+
+
+def ema(values: np.ndarray, period: int, start: Optional[int] = None) -> np.ndarray:
+    """
+    지수 이동평균
+    start 지점(기본값 period - 1)에서 SMA로 초기화한 뒤 alpha = 2 / (period + 1)로 갱신합니다.
+    """
+    n = len(values)
+    out = np.full(values.shape, np.nan)
+    if start is None:
+        start = period - 1
+    if period <= 0 or start < 0 or start >= n:
+        return out
+    if values.ndim == 1:
+        out[start:] = _ema_from(values.tolist(), period, start)
+    else:
+        out[start:] = _ema_rows(values, period, start)
+    return out
+
+
+def _price_changes(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """봉별 상승폭/하락폭 (첫 봉은 이전 데이터가 없으므로 NaN)"""
+    change = np.empty(values.shape)
+    change[0] = np.nan
+    np.subtract(values[1:], values[:-1], out=change[1:])
+    gains = np.where(change > 0, change, 0.0)
+    losses = np.where(change > 0, 0.0, np.abs(change))
+    gains[0] = np.nan
+    losses[0] = np.nan
+    return gains, losses
+
+
+def _rsi_from_averages(avg_gain: np.ndarray, avg_loss: np.ndarray) -> np.ndarray:
+    """평균 상승폭/하락폭으로 RSI 계산 (하락폭 평균이 0이면 100)"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = avg_gain / avg_loss
+        return np.where(avg_loss == 0, 100.0, 100 - (100 / (1 + rs)))
+
+
+def rsi(values: np.ndarray, period: int = 14, method: str = "wilder") -> np.ndarray:
+    """
+    상대강도지수 (index period부터 값이 존재)
+    method="wilder": Wilder 평활 (첫 값은 단순 평균, 이후 (이전 * (period - 1) + 현재) / period)
+    method="simple": 최근 period개 변화량의 단순 평균
+    """
+    n = len(values)
+    if n < 2 or period <= 0:
+        return np.full(values.shape, np.nan)
+
+    gains, losses = _price_changes(values)
+    if method == "simple":
+        return _rsi_from_averages(sma(gains, period), sma(losses, period))
+    if method != "wilder":
+        raise ValueError(f"지원하지 않는 RSI 방식입니다: {method}")
+
+    avg_gain = np.full(values.shape, np.nan)
+    avg_loss = np.full(values.shape, np.nan)
+    if n > period and values.ndim > 1:
+        gain = gains[1 : period + 1].sum(axis=0) / period
+        loss = losses[1 : period + 1].sum(axis=0) / period
+        avg_gain[period] = gain
+        avg_loss[period] = loss
+        for i in range(period + 1, n):
+            gain = (gain * (period - 1) + gains[i]) / period
+            loss = (loss * (period - 1) + losses[i]) / period
+            avg_gain[i] = gain
+            avg_loss[i] = loss
+    elif n > period:
+        gain_list = gains.tolist()
+        loss_list = losses.tolist()
+        gain = sum(gain_list[1 : period + 1]) / period
+        loss = sum(loss_list[1 : period + 1]) / period
+        smoothed_gains = [gain]
+        smoothed_losses = [loss]
+        for i in range(period + 1, n):
+            gain = (gain * (period - 1) + gain_list[i]) / period
+            loss = (loss * (period - 1) + loss_list[i]) / period
+            smoothed_gains.append(gain)
+            smoothed_losses.append(loss)
+        avg_gain[period:] = smoothed_gains
+        avg_loss[period:] = smoothed_losses
+    return _rsi_from_averages(avg_gain, avg_loss)
+
+
+def macd(
+    values: np.ndarray,
+    fast_period: int = 12,
+    slow_period: int = 26,
+    signal_period: int = 9,
+    start: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    MACD (MACD 라인, Signal 라인, 히스토그램)
+    Fast/Slow EMA는 모두 start 지점(기본값 slow_period - 1)에서 SMA로 초기화합니다.
+    Signal 라인은 MACD 값이 signal_period개 쌓이기 전까지 누적 평균, 이후에는 EMA입니다.
+    """
+    n = len(values)
+    macd_line = np.full(values.shape, np.nan)
+    signal_line = np.full(values.shape, np.nan)
+    if start is None:
+        start = slow_period - 1
+    if start < 0 or start >= n:
+        return macd_line, signal_line, macd_line - signal_line
+
+    if values.ndim > 1:
+        macd_values = _ema_rows(values, fast_period, start) - _ema_rows(values, slow_period, start)
+        signal_values = np.empty_like(macd_values)
+        alpha_signal = 2 / (signal_period + 1)
+        running_sum = np.zeros(values.shape[1:])
+        for count, macd_value in enumerate(macd_values, start=1):
+            running_sum += macd_value
+            if count == 1:
+                signal_values[0] = macd_value
+            elif count >= signal_period:
+                signal_values[count - 1] = (
+                    alpha_signal * macd_value + (1 - alpha_signal) * signal_values[count - 2]
+                )
+            else:
+                signal_values[count - 1] = running_sum / count
+        macd_line[start:] = macd_values
+        signal_line[start:] = signal_values
+        return macd_line, signal_line, macd_line - signal_line
+
+    closes = values.tolist()
+    ema_fast = _ema_from(closes, fast_period, start)
+    ema_slow = _ema_from(closes, slow_period, start)
+    macd_values = [fast - slow for fast, slow in zip(ema_fast, ema_slow)]
+
+    alpha_signal = 2 / (signal_period + 1)
+    signal_values = []
+    running_sum = 0
+    for count, macd_value in enumerate(macd_values, start=1):
+        running_sum += macd_value
+        if count == 1:
+            signal_values.append(macd_value)
+        elif count >= signal_period:
+            signal_values.append(
+                alpha_signal * macd_value + (1 - alpha_signal) * signal_values[-1]
+            )
+        else:
+            signal_values.append(running_sum / count)
+
+    macd_line[start:] = macd_values
+    signal_line[start:] = signal_values
+    return macd_line, signal_line, macd_line - signal_line
+
+
+def bollinger_bands(
+    values: np.ndarray, period: int = 20, num_std: float = 2.0
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """볼린저 밴드 (중심선, 상단, 하단) - 모표준편차 사용"""
+    n = len(values)
+    middle = sma(values, period)
+    std = np.full(n, np.nan)
+    if 0 < period <= n:
+        windows = np.lib.stride_tricks.sliding_window_view(values, period)
+        std[period - 1 :] = windows.std(axis=-1)
+    return middle, middle + num_std * std, middle - num_std * std
+
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """True Range (첫 봉은 고가 - 저가)"""
+    tr = high - low
+    if len(close) > 1:
+        prev_close = close[:-1]
+        tr[1:] = np.maximum(
+            tr[1:],
+            np.maximum(np.abs(high[1:] - prev_close), np.abs(low[1:] - prev_close)),
+        )
+    return tr
+
+
+def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = 14) -> np.ndarray:
+    """Average True Range (Wilder 평활, index period - 1부터 값이 존재)"""
+    n = len(close)
+    out = np.full(n, np.nan)
+    if period <= 0 or n < period:
+        return out
+
+    tr = true_range(high, low, close).tolist()
+    value = sum(tr[:period]) / period
+    result = [value]
+    for tr_value in tr[period:]:
+        value = (value * (period - 1) + tr_value) / period
+        result.append(value)
+    out[period - 1 :] = result
+    return out
+
+
+# ---------------------------------------------------------------------------
+# 스트리밍 모드
+# ---------------------------------------------------------------------------
+
+class SMA:
+    """단순 이동평균 (누적합 갱신, O(1))"""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.window = deque()
+        self.total = 0.0
+        self.value: Optional[float] = None
+
+    def update(self, price: float) -> Optional[float]:
+        self.window.append(price)
+        self.total += price
+        if len(self.window) > self.period:
+            self.total -= self.window.popleft()
+        if len(self.window) == self.period:
+            self.value = self.total / self.period
+        return self.value
+
+
+class EMA:
+    """
+    지수 이동평균 (O(1))
+    start번째(0부터) 값이 들어올 때 직전 period개 평균으로 초기화합니다 (기본값 period - 1).
+    """
+
+    def __init__(self, period: int, start: Optional[int] = None):
+        self.period = period
+        self.start = period - 1 if start is None else start
+        self.alpha = 2 / (period + 1)
+        self.count = 0
+        self.window = deque(maxlen=period)
+        self.value: Optional[float] = None
+
+    def update(self, price: float) -> Optional[float]:
+        if self.value is None:
+            self.window.append(price)
+            if self.count == self.start:
+                self.value = sum(self.window) / self.period
+                self.window.clear()
+        else:
+            self.value = self.alpha * price + (1 - self.alpha) * self.value
+        self.count += 1
+        return self.value
+
+
+class RSI:
+    """상대강도지수 (wilder / simple, O(1))"""
+
+    def __init__(self, period: int = 14, method: str = "wilder"):
+        if method not in ("wilder", "simple"):
+            raise ValueError(f"지원하지 않는 RSI 방식입니다: {method}")
+        self.period = period
+        self.method = method
+        self.prev_price: Optional[float] = None
+        self.gains = SMA(period)
+        self.losses = SMA(period)
+        self.count = 0
+        self.avg_gain: Optional[float] = None
+        self.avg_loss: Optional[float] = None
+        self.value: Optional[float] = None
+
+    def update(self, price: float) -> Optional[float]:
+        if self.prev_price is None:
+            self.prev_price = price
+            return None
+
+        change = price - self.prev_price
+        self.prev_price = price
+        gain = change if change > 0 else 0.0
+        loss = 0.0 if change > 0 else abs(change)
+        self.count += 1
+
+        if self.method == "simple" or self.avg_gain is None:
+            avg_gain = self.gains.update(gain)
+            avg_loss = self.losses.update(loss)
+            if self.method == "wilder" and avg_gain is not None:
+                self.avg_gain, self.avg_loss = avg_gain, avg_loss
+        else:
+            self.avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+            self.avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+            avg_gain, avg_loss = self.avg_gain, self.avg_loss
+
+        if avg_gain is None:
+            return None
+        self.value = 100.0 if avg_loss == 0 else 100 - (100 / (1 + avg_gain / avg_loss))
+        return self.value
+
+
+class MACD:
+    """MACD (배열 모드 macd()와 같은 초기화 규칙, O(1))"""
+
+    def __init__(
+        self,
+        fast_period: int = 12,
+        slow_period: int = 26,
+        signal_period: int = 9,
+        start: Optional[int] = None,
+    ):
+        start = slow_period - 1 if start is None else start
+        self.fast = EMA(fast_period, start)
+        self.slow = EMA(slow_period, start)
+        self.signal_period = signal_period
+        self.alpha_signal = 2 / (signal_period + 1)
+        self.count = 0
+        self.running_sum = 0
+        self.value: Optional[float] = None
+        self.signal: Optional[float] = None
+
+    @property
+    def histogram(self) -> Optional[float]:
+        if self.value is None or self.signal is None:
+            return None
+        return self.value - self.signal
+
+    def update(self, price: float) -> Optional[Tuple[float, float]]:
+        fast = self.fast.update(price)
+        slow = self.slow.update(price)
+        if fast is None or slow is None:
+            return None
+
+        self.value = fast - slow
+        self.count += 1
+        self.running_sum += self.value
+        if self.count == 1:
+            self.signal = self.value
+        elif self.count >= self.signal_period:
+            self.signal = self.alpha_signal * self.value + (1 - self.alpha_signal) * self.signal
+        else:
+            self.signal = self.running_sum / self.count
+        return self.value, self.signal
+
+
+class BollingerBands:
+    """볼린저 밴드 (누적합/제곱합 갱신, O(1))"""
+
+    def __init__(self, period: int = 20, num_std: float = 2.0):
+        self.period = period
+        self.num_std = num_std
+        self.window = deque()
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.value: Optional[Tuple[float, float, float]] = None
+
+    def update(self, price: float) -> Optional[Tuple[float, float, float]]:
+        self.window.append(price)
+        self.total += price
+        self.total_sq += price * price
+        if len(self.window) > self.period:
+            old = self.window.popleft()
+            self.total -= old
+            self.total_sq -= old * old
+        if len(self.window) == self.period:
+            middle = self.total / self.period
+            variance = max(self.total_sq / self.period - middle * middle, 0.0)
+            band = self.num_std * variance ** 0.5
+            self.value = (middle, middle + band, middle - band)
+        return self.value
+
+
+class ATR:
+    """Average True Range (Wilder 평활, O(1))"""
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.prev_close: Optional[float] = None
+        self.count = 0
+        self.total = 0.0
+        self.value: Optional[float] = None
+
+    def update(self, high: float, low: float, close: float) -> Optional[float]:
+        tr = high - low
+        if self.prev_close is not None:
+            tr = max(tr, abs(high - self.prev_close), abs(low - self.prev_close))
+        self.prev_close = close
+        self.count += 1
+
+        if self.value is None:
+            self.total += tr
+            if self.count == self.period:
+                self.value = self.total / self.period
+        else:
+            self.value = (self.value * (self.period - 1) + tr) / self.period
+        return self.value
+
+
+# ---------------------------------------------------------------------------
+# 실행 단위 캐시
+# ---------------------------------------------------------------------------
+
+class IndicatorSet:
+    """
+    캔들 한 벌에 대한 지표 캐시
+    같은 (지표, 파라미터)는 한 번만 계산하고 이후에는 같은 배열을 재사용합니다.
+    반환 배열은 공유되므로 호출 측에서 수정하지 않아야 합니다.
+    """
+
+    def __init__(self, candles: Candles):
+        self.candles = candles
+        self._cache: Dict[Tuple[Any, ...], Any] = {}
+
+    def _get(self, key: Tuple[Any, ...], compute: Callable[[], Any]) -> Any:
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
+
+    def price(self, source: str = "close") -> np.ndarray:
+        """가격 필드 배열 (open/high/low/close/volume)"""
+        return getattr(self.candles, source)
+
+    def sma(self, period: int, source: str = "close") -> np.ndarray:
+        return self._get(("sma", period, source), lambda: sma(self.price(source), period))
+
+    def ema(self, period: int, start: Optional[int] = None, source: str = "close") -> np.ndarray:
+        return self._get(
+            ("ema", period, start, source), lambda: ema(self.price(source), period, start)
+        )
+
+    def rsi(self, period: int = 14, method: str = "wilder", source: str = "close") -> np.ndarray:
+        return self._get(
+            ("rsi", period, method, source), lambda: rsi(self.price(source), period, method)
+        )
+
+    def macd(
+        self,
+        fast_period: int = 12,
+        slow_period: int = 26,
+        signal_period: int = 9,
+        start: Optional[int] = None,
+        source: str = "close",
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        return self._get(
+            ("macd", fast_period, slow_period, signal_period, start, source),
+            lambda: macd(self.price(source), fast_period, slow_period, signal_period, start),
+        )
+
+    def bollinger_bands(
+        self, period: int = 20, num_std: float = 2.0, source: str = "close"
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        return self._get(
+            ("bollinger", period, num_std, source),
+            lambda: bollinger_bands(self.price(source), period, num_std),
+        )
+
+    def atr(self, period: int = 14) -> np.ndarray:
+        return self._get(
+            ("atr", period),
+            lambda: atr(self.candles.high, self.candles.low, self.candles.close, period),
+        )
@@ -0,0 +1,79 @@
+"""
+봉 내부(intrabar) 체결 서비스
+신호 봉(예: 1d) 안에 포함된 하위 봉(예: 1m)으로 봉 중간의 체결 시점/가격을 계산합니다.
+상위 봉마다 하위 봉 배열의 [시작, 끝) 인덱스 범위를 한 번의 벡터 검색으로 구해 두고,
+봉별 탐색 없이 범위 단위 벡터 연산으로 체결 지점을 찾습니다.
+"""
+from typing import Tuple
+
+import numpy as np
+
+from app.services.candles import Candles
+
+
+class IntrabarCandles:
+    """
+    상위 봉별 하위 봉 인덱스 범위
+    candles: 하위 봉 (시간 오름차순)
+    starts/ends: 상위 봉 i에 속한 하위 봉은 candles[starts[i]:ends[i]]
+    """
+
+    __slots__ = ("candles", "starts", "ends")
+
+    def __init__(self, candles: Candles, starts: np.ndarray, ends: np.ndarray):
+        self.candles = candles
+        self.starts = starts
+        self.ends = ends
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def flat_ranges(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        모든 범위를 이어 붙인 (하위 봉 인덱스, 소속 상위 봉 번호) 배열
+        범위 길이의 누적합으로 계산하므로 상위 봉 수만큼의 루프가 없습니다.
+        """
+        counts = self.ends - self.starts
+        bar_of = np.repeat(np.arange(len(counts)), counts)
+        offsets = np.cumsum(counts) - counts
+        fine_index = np.arange(int(counts.sum())) - np.repeat(offsets - self.starts, counts)
+        return fine_index, bar_of
+
+
+def align_intrabar(bars: Candles, fine: Candles, interval_seconds: int) -> IntrabarCandles:
+    """
+    상위 봉 [time, time + interval) 구간에 속한 하위 봉 인덱스 범위 계산
+    두 배열 모두 정렬되어 있으므로 모든 상위 봉의 경계를 searchsorted 한 번씩으로 구합니다.
+    """
+    if not fine.is_sorted():
+        fine = fine.sorted()
+    starts = np.searchsorted(fine.time, bars.time, side="left")
+    ends = np.searchsorted(fine.time, bars.time + interval_seconds, side="left")
+    return IntrabarCandles(fine, starts, ends)
+
+
+def first_touch_above(intrabar: IntrabarCandles, levels: np.ndarray) -> np.ndarray:
+    """
+    상위 봉마다 하위 봉 고가가 처음으로 levels[i] 이상이 된 하위 봉 인덱스 (없으면 -1)
+    levels가 NaN인 봉은 체결 대상이 아닙니다.
+    """
+    touch = np.full(len(intrabar), -1, dtype=np.int64)
+    fine_index, bar_of = intrabar.flat_ranges()
+    if not len(fine_index):
+        return touch
+    hit = np.flatnonzero(intrabar.candles.high[fine_index] >= levels[bar_of])
+    # 범위는 시간순이므로 상위 봉별 첫 번째 적중이 가장 이른 체결 지점
+    hit_bars, first = np.unique(bar_of[hit], return_index=True)
+    touch[hit_bars] = fine_index[hit[first]]
+    return touch
+
+
+def touch_fill_prices(intrabar: IntrabarCandles, levels: np.ndarray, touch: np.ndarray) -> np.ndarray:
+    """
+    체결 가격: 기준가에 닿은 하위 봉에서 기준가로 체결하되,
+    하위 봉이 기준가 위에서 시작(갭 상승)했다면 그 시가로 체결합니다. 미체결 봉은 NaN.
+    """
+    prices = np.full(len(intrabar), np.nan)
+    filled = touch >= 0
+    prices[filled] = np.maximum(levels[filled], intrabar.candles.open[touch[filled]])
+    return prices
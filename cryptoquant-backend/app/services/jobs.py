@@ -0,0 +1,460 @@
+"""
+백테스트 작업 큐 서비스
+백테스트를 작업으로 등록하면 작업 ID를 즉시 반환하고, 엔진은 동시 실행 수가 제한된 전용 프로세스 풀에서 실행합니다.
+상태/진행률 조회, 취소, 완료된 결과 조회를 지원하며 이벤트 루프는 계산을 기다리며 막히지 않습니다.
+실행 중 + 대기 중인 작업 수가 한도를 넘으면 새 작업을 받지 않습니다 (JobQueueFullError).
+"""
+import asyncio
+import json
+import os
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from contextlib import ExitStack, asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple, Union
+
+import numpy as np
+
+from app.services.backtest import BacktestEngine, serialize_result
+from app.services.candles import Candles
+from app.services.downsample import downsample_result
+from app.services.intrabar import align_intrabar
+from app.services.result_cache import get_result_cache
+from app.services.result_codec import dump_record, encode_result_record, load_record
+from app.services.workers import (
+    CandleHandle,
+    SharedCandles,
+    attach_candles,
+    backtest_worker_count,
+    get_backtest_pool,
+    reset_backtest_pool,
+    task_cpu_limit,
+    task_limits,
+    task_memory_limit,
+)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+MAX_FINISHED_JOBS = 200
+DISCONNECT_POLL_SECONDS = 0.5
+
+
+class JobCancelledError(Exception):
+    """취소 요청으로 중단된 작업"""
+
+
+class JobQueueFullError(Exception):
+    """대기열이 가득 차 작업을 받을 수 없음"""
+
+
+class JobControl:
+    """
+    부모 프로세스와 워커가 공유하는 작업 제어 블록 [진행률(0~1), 취소 플래그]
+    워커는 진행률을 기록하고, 거래 실행 구간 사이마다 취소 플래그를 확인합니다.
+    """
+
+    def __init__(self):
+        self._shm = shared_memory.SharedMemory(create=True, size=16)
+        self._values = np.ndarray((2,), dtype=np.float64, buffer=self._shm.buf)
+        self._values[:] = 0.0
+        self.name = self._shm.name
+
+    @property
+    def progress(self) -> float:
+        return float(self._values[0])
+
+    def request_cancel(self) -> None:
+        self._values[1] = 1.0
+
+    def close(self) -> None:
+        del self._values
+        self._shm.close()
+        self._shm.unlink()
+
+    def __enter__(self) -> "JobControl":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+def _run_backtest_job(
+    handle: CandleHandle,
+    control_name: str,
+    strategy_type: str,
+    parameters: Dict[str, Any],
+    initial_capital: float,
+    commission: float,
+    max_points: Optional[int] = None,
+    intrabar_handle: Optional[CandleHandle] = None,
+    bar_seconds: int = 0,
+    with_record: bool = False,
+    cpu_seconds: int = 0,
+    memory_mb: int = 0,
+) -> Union[bytes, Tuple[bytes, Dict[str, Any]]]:
+    """
+    워커 프로세스 작업: 백테스트 실행 후 응답 본문(JSON 바이트) 반환
+    결과 직렬화(와 max_points가 있으면 차트 데이터 다운샘플링)까지 워커에서 처리하므로
+    부모 프로세스는 바이트만 받습니다.
+    intrabar_handle이 주어지면 공유 하위 봉을 캔들별 범위로 정렬해 봉 내부 체결에 사용합니다.
+    with_record가 True이면 이력 저장용 레코드(요약 지표 + 압축된 전체 곡선)를 함께 반환합니다.
+    cpu_seconds / memory_mb를 넘으면 TaskResourceError로 중단합니다 (0이면 제한 없음).
+    """
+    with task_limits(cpu_seconds, memory_mb):
+        return _execute_backtest_job(
+            handle, control_name, strategy_type, parameters, initial_capital, commission,
+            max_points, intrabar_handle, bar_seconds, with_record,
+        )
+
+
+def _execute_backtest_job(
+    handle: CandleHandle,
+    control_name: str,
+    strategy_type: str,
+    parameters: Dict[str, Any],
+    initial_capital: float,
+    commission: float,
+    max_points: Optional[int],
+    intrabar_handle: Optional[CandleHandle],
+    bar_seconds: int,
+    with_record: bool,
+) -> Union[bytes, Tuple[bytes, Dict[str, Any]]]:
+    candles = attach_candles(handle)
+    intrabar = None
+    if intrabar_handle is not None:
+        intrabar = align_intrabar(candles, attach_candles(intrabar_handle), bar_seconds)
+    control_shm = shared_memory.SharedMemory(name=control_name)
+    control = np.ndarray((2,), dtype=np.float64, buffer=control_shm.buf)
+
+    def report_progress(fraction: float) -> None:
+        if control[1]:
+            raise JobCancelledError("작업이 취소되었습니다.")
+        control[0] = fraction
+
+    try:
+        engine = BacktestEngine(initial_capital=initial_capital, commission=commission, use_signal_cache=True)
+        result = engine.run(
+            candles,
+            strategy_type=strategy_type,
+            parameters=parameters,
+            initial_capital=initial_capital,
+            progress=report_progress,
+            intrabar=intrabar,
+        )
+        record = encode_result_record(initial_capital, result, engine.trades) if with_record else None
+        if max_points:
+            result = downsample_result(result, max_points)
+        body = json.dumps(
+            serialize_result(result), ensure_ascii=False, separators=(",", ":")
+        ).encode("utf-8")
+        return (body, record) if with_record else body
+    finally:
+        del control
+        control_shm.close()
+
+
+def _run_limited(cpu_seconds: int, memory_mb: int, func: Callable[..., Any], *args: Any) -> Any:
+    """워커 프로세스 작업: 리소스 제한을 건 채로 func(*args) 실행 (JobManager.run_task용)"""
+    with task_limits(cpu_seconds, memory_mb):
+        return func(*args)
+
+
+def _record_key(cache_key: str) -> str:
+    """결과 캐시 키에 대응하는 이력 저장용 레코드 키 (JSON, 이전 pickle 형식 항목과 겹치지 않는 키)"""
+    return f"{cache_key}:record-json"
+
+
+class BacktestJob:
+    """백테스트 작업 한 건의 상태"""
+
+    def __init__(self, job_id: str, request: Dict[str, Any]):
+        self.id = job_id
+        self.request = request
+        self.status = JOB_QUEUED
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.error: Optional[str] = None
+        self.exception: Optional[BaseException] = None
+        self.result: Optional[bytes] = None
+        self.record: Optional[Dict[str, Any]] = None  # 이력 저장용 레코드 (with_record 작업만)
+        self.task: Optional[asyncio.Task] = None
+        self.control: Optional[JobControl] = None
+        self.cancel_requested = False
+
+    @property
+    def progress(self) -> float:
+        """진행률 (%)"""
+        if self.status == JOB_COMPLETED:
+            return 100.0
+        if self.control is not None:
+            return round(self.control.progress * 100, 2)
+        return 0.0
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (JOB_COMPLETED, JOB_FAILED, JOB_CANCELLED)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "jobId": self.id,
+            "status": self.status,
+            "progress": self.progress,
+            "createdAt": self.created_at,
+            "startedAt": self.started_at,
+            "finishedAt": self.finished_at,
+            "error": self.error,
+            "request": self.request,
+        }
+
+
+class JobManager:
+    """
+    백테스트 작업 관리자
+    동시에 실행되는 작업 수를 max_concurrent로 제한하고, 나머지는 대기열(queued) 상태로 둡니다.
+    완료된 작업은 최근 MAX_FINISHED_JOBS개까지 결과와 함께 보관합니다.
+    """
+
+    def __init__(self, max_concurrent: int, max_queued: int = 0):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued  # 실행 슬롯을 기다릴 수 있는 작업 수 (0이면 제한 없음)
+        self._active = 0  # 실행 중 + 대기 중인 작업 수
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self._jobs: Dict[str, BacktestJob] = {}
+        self._finished: "OrderedDict[str, None]" = OrderedDict()
+
+    def get(self, job_id: str) -> Optional[BacktestJob]:
+        return self._jobs.get(job_id)
+
+    def submit(
+        self,
+        load_candles: Callable[[], Awaitable[Candles]],
+        request: Dict[str, Any],
+        strategy_type: str,
+        parameters: Dict[str, Any],
+        initial_capital: float,
+        commission: float = 0.001,
+        max_points: Optional[int] = None,
+        cache_key: Optional[str] = None,
+        expiry: Optional[Callable[[Candles], float]] = None,
+        load_intrabar: Optional[Callable[[], Awaitable[Candles]]] = None,
+        bar_seconds: int = 0,
+        with_record: bool = False,
+        on_complete: Optional[Callable[[BacktestJob], None]] = None,
+    ) -> BacktestJob:
+        """
+        작업 등록
+        load_candles: 캔들 조회 코루틴 함수 (작업 실행 시점에 호출)
+        max_points: 차트 데이터 최대 점 수 (None이면 전체)
+        cache_key가 주어지면 결과 캐시를 먼저 확인하고, 완료된 결과를 캐시에 저장합니다.
+        expiry: 캔들로부터 캐시 만료 시각을 계산하는 함수 (0이면 만료 없음)
+        load_intrabar: 봉 내부 체결용 하위 봉 조회 코루틴 함수
+        bar_seconds: 상위 봉(백테스트 캔들) 길이 (초) - 하위 봉을 상위 봉 구간에 나눌 때 사용
+        with_record: 이력 저장용 레코드(job.record)도 만들지 여부 (캐시에도 결과와 함께 저장)
+        on_complete: 작업이 완료되면 (캐시 적중 포함) 작업을 인자로 호출할 함수
+        캐시에 없는 작업이 max_concurrent + max_queued개를 넘으면 JobQueueFullError가 발생합니다.
+        """
+        cache = get_result_cache()
+        cached = cache.get(cache_key) if cache_key else None
+        record = None
+        if cached is not None and with_record:
+            record = cache.get(_record_key(cache_key))
+            if record is None:
+                cached = None  # 레코드가 먼저 밀려났으면 다시 실행
+        if cached is None:
+            self.check_capacity()
+
+        job = BacktestJob(uuid.uuid4().hex, request)
+        self._jobs[job.id] = job
+        if cached is not None:
+            job.record = load_record(record) if record is not None else None
+            job.result = cached
+            job.status = JOB_COMPLETED
+            job.started_at = job.finished_at = job.created_at
+            self._mark_finished(job)
+            if on_complete is not None:
+                on_complete(job)
+            return job
+
+        # 워커 작업 인자 (공유 메모리 핸들은 실행 시점에 추가)
+        spec = {
+            "strategy_type": strategy_type,
+            "parameters": parameters,
+            "initial_capital": initial_capital,
+            "commission": commission,
+            "max_points": max_points,
+            "bar_seconds": bar_seconds,
+            "with_record": with_record,
+            "cpu_seconds": task_cpu_limit(),
+            "memory_mb": task_memory_limit(),
+        }
+        self._active += 1
+        job.task = asyncio.create_task(
+            self._run(job, load_candles, load_intrabar, spec, cache_key, expiry, on_complete)
+        )
+        return job
+
+    def check_capacity(self) -> None:
+        """실행 중 + 대기 중인 작업이 max_concurrent + max_queued개에 이르렀으면 JobQueueFullError"""
+        if self.max_queued and self._active >= self.max_concurrent + self.max_queued:
+            raise JobQueueFullError("대기 중인 백테스트가 너무 많습니다. 잠시 후 다시 시도해주세요.")
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """
+        등록된 작업과 같은 실행 슬롯 하나를 차지한 채로 블록 실행 (스트리밍 백테스트 등 서버 프로세스에서 도는 계산용)
+        대기열이 가득 찼으면 JobQueueFullError, 슬롯이 모두 사용 중이면 빌 때까지 기다립니다.
+        """
+        self.check_capacity()
+        self._active += 1
+        try:
+            async with self._slots:
+                yield
+        finally:
+            self._active -= 1
+
+    async def run_task(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        작업으로 등록하지 않고 전용 프로세스 풀에서 func(*args)를 실행해 결과를 기다림 (증분, 몬테카를로, 포트폴리오 등)
+        등록된 작업과 같은 실행 슬롯, 대기열 한도(JobQueueFullError), 작업별 CPU 시간/메모리 제한을 적용합니다.
+        func와 인자는 워커로 pickle되므로 모듈 수준 함수와 공유 캔들 핸들을 넘깁니다.
+        """
+        async with self.slot():
+            future = get_backtest_pool().submit(
+                _run_limited, task_cpu_limit(), task_memory_limit(), func, *args
+            )
+            try:
+                return await asyncio.wrap_future(future)
+            except BrokenProcessPool:
+                reset_backtest_pool()
+                raise
+
+    async def wait(
+        self,
+        job: BacktestJob,
+        disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+    ) -> bytes:
+        """
+        작업 완료를 기다려 결과 반환 (실패/취소 시 원래 예외 발생)
+        disconnected가 주어지면 DISCONNECT_POLL_SECONDS마다 호출해, 요청한 클라이언트가 연결을 끊었으면 작업을 취소합니다.
+        """
+        if job.task is not None:
+            if disconnected is None:
+                await asyncio.shield(job.task)
+            else:
+                while not job.task.done():
+                    await asyncio.wait({job.task}, timeout=DISCONNECT_POLL_SECONDS)
+                    if not job.task.done() and await disconnected():
+                        self.cancel(job.id)
+                        await asyncio.shield(job.task)
+        if job.status == JOB_COMPLETED:
+            return job.result
+        if job.status == JOB_CANCELLED:
+            raise JobCancelledError("작업이 취소되었습니다.")
+        raise job.exception or RuntimeError(job.error)
+
+    def cancel(self, job_id: str) -> Optional[BacktestJob]:
+        """
+        작업 취소
+        대기 중인 작업은 즉시 취소하고, 실행 중인 작업은 워커가 다음 진행률 보고 시점에 중단합니다.
+        """
+        job = self._jobs.get(job_id)
+        if job is None or job.finished:
+            return job
+        job.cancel_requested = True
+        if job.status == JOB_QUEUED and job.task is not None:
+            job.task.cancel()
+        elif job.control is not None:
+            job.control.request_cancel()
+        return job
+
+    async def _run(
+        self,
+        job: BacktestJob,
+        load_candles: Callable[[], Awaitable[Candles]],
+        load_intrabar: Optional[Callable[[], Awaitable[Candles]]],
+        spec: Dict[str, Any],
+        cache_key: Optional[str],
+        expiry: Optional[Callable[[Candles], float]],
+        on_complete: Optional[Callable[[BacktestJob], None]] = None,
+    ) -> None:
+        try:
+            async with self._slots:
+                job.status = JOB_RUNNING
+                job.started_at = time.time()
+                if load_intrabar is not None:
+                    candles, intrabar_candles = await asyncio.gather(load_candles(), load_intrabar())
+                else:
+                    candles, intrabar_candles = await load_candles(), None
+                if job.cancel_requested:
+                    raise JobCancelledError("작업이 취소되었습니다.")
+
+                pool = get_backtest_pool()
+                with ExitStack() as stack:
+                    handle = stack.enter_context(SharedCandles(candles))
+                    if intrabar_candles is not None:
+                        spec["intrabar_handle"] = stack.enter_context(SharedCandles(intrabar_candles))
+                    control = stack.enter_context(JobControl())
+                    job.control = control
+                    future = pool.submit(_run_backtest_job, handle, control.name, **spec)
+                    try:
+                        output = await asyncio.wrap_future(future)
+                        if spec["with_record"]:
+                            job.result, job.record = output
+                        else:
+                            job.result = output
+                    except BrokenProcessPool:
+                        reset_backtest_pool()
+                        raise
+                    finally:
+                        job.control = None
+
+            job.status = JOB_COMPLETED
+            if cache_key:
+                expires_at = expiry(candles) if expiry else 0.0
+                get_result_cache().put(cache_key, job.result, expires_at)
+                if job.record is not None:
+                    get_result_cache().put(_record_key(cache_key), dump_record(job.record), expires_at)
+            if on_complete is not None:
+                on_complete(job)
+        except (JobCancelledError, asyncio.CancelledError):
+            job.status = JOB_CANCELLED
+        except Exception as e:
+            job.status = JOB_FAILED
+            job.exception = e
+            job.error = getattr(e, "detail", None) or str(e)
+        finally:
+            self._active -= 1
+            job.finished_at = time.time()
+            self._mark_finished(job)
+
+    def _mark_finished(self, job: BacktestJob) -> None:
+        """완료된 작업 기록 (보관 개수를 넘으면 오래된 작업부터 삭제)"""
+        self._finished[job.id] = None
+        while len(self._finished) > MAX_FINISHED_JOBS:
+            old_id, _ = self._finished.popitem(last=False)
+            self._jobs.pop(old_id, None)
+
+
+_manager: Optional[JobManager] = None
+
+
+def get_job_manager() -> JobManager:
+    """
+    공용 작업 관리자 조회 (최초 호출 시 생성)
+    동시 실행 작업 수는 BACKTEST_JOB_CONCURRENCY 환경 변수 (기본값: 백테스트 전용 풀 워커 수),
+    실행 슬롯 대기 작업 수는 BACKTEST_QUEUE_SIZE 환경 변수 (기본값 32, 0이면 제한 없음)
+    """
+    global _manager
+    if _manager is None:
+        _manager = JobManager(
+            max_concurrent=max(1, int(os.getenv("BACKTEST_JOB_CONCURRENCY", backtest_worker_count()))),
+            max_queued=max(0, int(os.getenv("BACKTEST_QUEUE_SIZE", "32"))),
+        )
+    return _manager
@@ -0,0 +1,183 @@
+"""
+몬테카를로 리샘플링 서비스
+백테스트 거래 수익률을 복원 추출(bootstrap)하거나 순서를 섞어(shuffle) 수천 개의 가상 경로를 만들고,
+최종 자산 / 최대 낙폭 / 샤프 지수의 신뢰 구간을 계산합니다.
+경로는 (경로 수 x 거래 수) 행렬로 한 번에 계산하며, 경로 묶음을 프로세스 풀에 나눠 실행합니다.
+"""
+import asyncio
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+from app.services.backtest import BacktestEngine
+from app.services.workers import CandleHandle, attach_candles, get_process_pool, reset_process_pool, worker_count
+
+MAX_SIMULATIONS = 100000
+RESAMPLE_METHODS = ("bootstrap", "shuffle")
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+
+# 한 번에 만드는 경로 행렬 크기 상한 (원소 수, 약 32MB)
+_MAX_BLOCK_CELLS = 4_000_000
+# 이 크기 이하의 작업은 프로세스 간 전송 비용이 더 크므로 현재 프로세스에서 계산
+_INLINE_CELLS = 500_000
+
+
+def backtest_trades(
+    handle: CandleHandle,
+    strategy_type: str,
+    parameters: Dict[str, Any],
+    initial_capital: float,
+    commission: float,
+) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """워커 프로세스 작업: 공유 캔들로 백테스트를 실행해 (성과 지표, 거래 목록) 반환"""
+    engine = BacktestEngine(initial_capital=initial_capital, commission=commission, use_signal_cache=True)
+    metrics = engine.evaluate(
+        attach_candles(handle),
+        strategy_type=strategy_type,
+        parameters=parameters,
+        initial_capital=initial_capital,
+    )
+    return metrics, engine.trades
+
+
+def trade_returns(trades: List[Dict[str, Any]], commission: float) -> np.ndarray:
+    """
+    BacktestEngine.trades의 매수/매도 쌍을 거래별 수익률로 변환
+    엔진은 매수/매도 시 각각 수수료를 차감하므로 (매도가 / 매수가) x (1 - 수수료)^2 - 1 입니다.
+    """
+    buys = np.array([t["price"] for t in trades if t["type"] == "buy"], dtype=np.float64)
+    sells = np.array([t["price"] for t in trades if t["type"] == "sell"], dtype=np.float64)
+    count = min(len(buys), len(sells))
+    return sells[:count] / buys[:count] * (1 - commission) ** 2 - 1
+
+
+def _path_statistics(
+    returns: np.ndarray,
+    initial_capital: float,
+    annualization: float,
+) -> Dict[str, np.ndarray]:
+    """(경로 수 x 거래 수) 수익률 행렬의 경로별 최종 자산 / 최대 낙폭(%) / 샤프 지수"""
+    equity = initial_capital * np.cumprod(1 + returns, axis=1)
+    # 초기 자본도 고점 후보에 포함
+    peak = np.maximum.accumulate(np.maximum(equity, initial_capital), axis=1)
+    max_drawdown = np.max((peak - equity) / peak, axis=1) * 100
+
+    mean = returns.mean(axis=1)
+    std = returns.std(axis=1)
+    sharpe = np.divide(mean, std, out=np.zeros_like(mean), where=std > 0) * annualization
+    return {"finalEquity": equity[:, -1], "maxDrawdown": max_drawdown, "sharpeRatio": sharpe}
+
+
+def simulate_paths(
+    returns: np.ndarray,
+    simulations: int,
+    method: str,
+    initial_capital: float,
+    annualization: float,
+    seed: Optional[np.random.SeedSequence] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    경로 묶음 시뮬레이션
+    - bootstrap: 거래 수익률을 복원 추출 (경로마다 다른 거래 구성)
+    - shuffle: 같은 거래들의 순서만 섞음 (최종 자산/샤프는 원본과 같고 낙폭 분포만 달라짐)
+    메모리 사용량을 제한하기 위해 _MAX_BLOCK_CELLS 단위로 나눠 계산합니다.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(returns)
+    block = max(1, _MAX_BLOCK_CELLS // n)
+    parts = []
+    for start in range(0, simulations, block):
+        rows = min(block, simulations - start)
+        if method == "bootstrap":
+            sampled = returns[rng.integers(0, n, size=(rows, n))]
+        else:
+            sampled = rng.permuted(np.broadcast_to(returns, (rows, n)), axis=1)
+        parts.append(_path_statistics(sampled, initial_capital, annualization))
+    return {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+
+
+def _split(total: int, count: int) -> List[int]:
+    """total개를 count개 묶음으로 최대한 고르게 분할"""
+    base, extra = divmod(total, count)
+    return [base + (1 if i < extra else 0) for i in range(count) if base or i < extra]
+
+
+def summarize(
+    statistics: Dict[str, np.ndarray],
+    initial_capital: float,
+    percentiles: List[float],
+) -> Dict[str, Any]:
+    """경로별 지표를 백분위 신뢰 구간으로 요약"""
+    summary = {}
+    for key, values in statistics.items():
+        bands = np.percentile(values, percentiles)
+        summary[key] = {
+            "mean": round(float(values.mean()), 2),
+            "percentiles": {
+                f"p{p:g}": round(float(value), 2) for p, value in zip(percentiles, bands)
+            },
+        }
+    summary["probabilityOfLoss"] = round(
+        float(np.mean(statistics["finalEquity"] < initial_capital)) * 100, 2
+    )
+    return summary
+
+
+async def run_monte_carlo(
+    trades: List[Dict[str, Any]],
+    initial_capital: float,
+    commission: float = 0.001,
+    simulations: int = 1000,
+    method: str = "bootstrap",
+    years: float = 0.0,
+    percentiles: Optional[List[float]] = None,
+    seed: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    몬테카를로 시뮬레이션 실행
+    샤프 지수는 거래 단위 수익률 기준이며, years(백테스트 기간)가 주어지면 연간 거래 수로 연율화합니다.
+    """
+    if method not in RESAMPLE_METHODS:
+        raise ValueError(f"지원하지 않는 리샘플링 방식입니다: {method}")
+    if simulations <= 0 or simulations > MAX_SIMULATIONS:
+        raise ValueError(f"시뮬레이션 횟수는 1 이상 {MAX_SIMULATIONS} 이하여야 합니다.")
+    percentiles = list(percentiles) if percentiles else list(DEFAULT_PERCENTILES)
+    if any(p < 0 or p > 100 for p in percentiles):
+        raise ValueError("백분위는 0에서 100 사이여야 합니다.")
+
+    returns = trade_returns(trades, commission)
+    if len(returns) < 2:
+        raise ValueError("몬테카를로 시뮬레이션에는 완료된 거래가 2개 이상 필요합니다.")
+    annualization = float(np.sqrt(len(returns) / years)) if years > 0 else 1.0
+
+    # 묶음마다 SeedSequence에서 파생한 독립 난수 스트림 사용
+    if simulations * len(returns) <= _INLINE_CELLS:
+        statistics = simulate_paths(
+            returns, simulations, method, initial_capital, annualization, np.random.SeedSequence(seed)
+        )
+    else:
+        pool = get_process_pool()
+        sizes = _split(simulations, worker_count())
+        seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+        futures = [
+            asyncio.wrap_future(
+                pool.submit(simulate_paths, returns, size, method, initial_capital, annualization, child)
+            )
+            for size, child in zip(sizes, seeds)
+        ]
+        try:
+            parts = await asyncio.gather(*futures)
+        except BrokenProcessPool:
+            reset_process_pool()
+            raise
+        finally:
+            for future in futures:
+                future.cancel()
+        statistics = {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+
+    result = summarize(statistics, initial_capital, percentiles)
+    result["simulations"] = simulations
+    result["method"] = method
+    result["tradeCount"] = int(len(returns))
+    return result
@@ -3,11 +3,11 @@
 외부 API를 통해 암호화폐 관련 뉴스를 가져옵니다.
 한국어 뉴스를 우선적으로 가져오고, 없으면 영어 뉴스를 번역합니다.
 """
-import httpx
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
 import random
 from deep_translator import GoogleTranslator
+from app.services.http_clients import get_http_client
 
 # CryptoCompare News API (무료 버전)
 CRYPTOCOMPARE_NEWS_URL = "https://min-api.cryptocompare.com/data/v2/news/"
@@ -57,94 +57,94 @@ async def get_crypto_news(
     # 심볼에서 base asset 추출 (BTCUSDT -> BTC)
     base_symbol = symbol.replace("USDT", "").replace("USD", "").upper()
     
-    async with httpx.AsyncClient() as client:
-        try:
-            # 1단계: 한국어 뉴스 시도 (lang="KO" 또는 "KR")
-            news_list = []
-            if lang == "ko":
-                try:
-                    response = await client.get(
-                        CRYPTOCOMPARE_NEWS_URL,
-                        params={"lang": "KO"},
-                        timeout=10.0,
-                    )
-                    response.raise_for_status()
-                    data = response.json()
+    client = get_http_client("cryptocompare")
+    try:
+        # 1단계: 한국어 뉴스 시도 (lang="KO" 또는 "KR")
+        news_list = []
+        if lang == "ko":
+            try:
+                response = await client.get(
+                    CRYPTOCOMPARE_NEWS_URL,
+                    params={"lang": "KO"},
+                    timeout=10.0,
+                )
+                response.raise_for_status()
+                data = response.json()
+                
+                if data.get("Type") == 100 and data.get("Data"):
+                    all_news = data["Data"]
+                    news_list = _filter_news_by_symbol(all_news, base_symbol, limit)
+            except Exception as e:
+                print(f"한국어 뉴스 조회 실패: {str(e)}, 영어 뉴스로 대체")
+        
+        # 2단계: 한국어 뉴스가 없거나 부족하면 영어 뉴스 가져오기
+        if not news_list or len(news_list) < limit:
+            try:
+                response = await client.get(
+                    CRYPTOCOMPARE_NEWS_URL,
+                    params={"lang": "EN"},
+                    timeout=10.0,
+                )
+                response.raise_for_status()
+                data = response.json()
+                
+                if data.get("Type") == 100 and data.get("Data"):
+                    all_news = data["Data"]
+                    english_news = _filter_news_by_symbol(all_news, base_symbol, limit)
                     
-                    if data.get("Type") == 100 and data.get("Data"):
-                        all_news = data["Data"]
-                        news_list = _filter_news_by_symbol(all_news, base_symbol, limit)
-                except Exception as e:
-                    print(f"한국어 뉴스 조회 실패: {str(e)}, 영어 뉴스로 대체")
-            
-            # 2단계: 한국어 뉴스가 없거나 부족하면 영어 뉴스 가져오기
-            if not news_list or len(news_list) < limit:
-                try:
-                    response = await client.get(
-                        CRYPTOCOMPARE_NEWS_URL,
-                        params={"lang": "EN"},
-                        timeout=10.0,
-                    )
-                    response.raise_for_status()
-                    data = response.json()
+                    # 한국어 뉴스가 있으면 부족한 만큼만 영어 뉴스 추가
+                    if news_list:
+                        needed = limit - len(news_list)
+                        english_news = english_news[:needed]
                     
-                    if data.get("Type") == 100 and data.get("Data"):
-                        all_news = data["Data"]
-                        english_news = _filter_news_by_symbol(all_news, base_symbol, limit)
-                        
-                        # 한국어 뉴스가 있으면 부족한 만큼만 영어 뉴스 추가
-                        if news_list:
-                            needed = limit - len(news_list)
-                            english_news = english_news[:needed]
-                        
-                        # 영어 뉴스를 한국어로 번역
-                        if lang == "ko":
-                            for news in english_news:
-                                news["title"] = _translate_text(news.get("title", ""))
-                                news["body"] = _translate_text(news.get("body", ""))
-                        
-                        news_list.extend(english_news)
-                except Exception as e:
-                    print(f"영어 뉴스 조회 실패: {str(e)}")
-            
-            # 3단계: 뉴스가 없으면 mock 데이터 사용
-            if not news_list:
-                news_list = _get_mock_news(base_symbol, limit)
+                    # 영어 뉴스를 한국어로 번역
+                    if lang == "ko":
+                        for news in english_news:
+                            news["title"] = _translate_text(news.get("title", ""))
+                            news["body"] = _translate_text(news.get("body", ""))
+                    
+                    news_list.extend(english_news)
+            except Exception as e:
+                print(f"영어 뉴스 조회 실패: {str(e)}")
+        
+        # 3단계: 뉴스가 없으면 mock 데이터 사용
+        if not news_list:
+            news_list = _get_mock_news(base_symbol, limit)
+        
+        # 최종적으로 limit 개수만큼만 반환
+        news_list = news_list[:limit]
+        
+        # 데이터 형식 변환
+        result = []
+        for news in news_list:
+            # 이미지 URL 처리
+            image_url = news.get("imageurl") or news.get("imageUrl", "")
+            if not image_url.startswith("http"):
+                image_url = f"https://www.cryptocompare.com{image_url}" if image_url else ""
             
-            # 최종적으로 limit 개수만큼만 반환
-            news_list = news_list[:limit]
+            # 본문 길이 제한
+            body = news.get("body", "")
+            if len(body) > 200:
+                body = body[:200] + "..."
             
-            # 데이터 형식 변환
-            result = []
-            for news in news_list:
-                # 이미지 URL 처리
-                image_url = news.get("imageurl") or news.get("imageUrl", "")
-                if not image_url.startswith("http"):
-                    image_url = f"https://www.cryptocompare.com{image_url}" if image_url else ""
-                
-                # 본문 길이 제한
-                body = news.get("body", "")
-                if len(body) > 200:
-                    body = body[:200] + "..."
-                
-                result.append({
-                    "id": news.get("id", ""),
-                    "title": news.get("title", ""),
-                    "body": body,
-                    "url": news.get("url", ""),
-                    "source": news.get("source", ""),
-                    "imageUrl": image_url,
-                    "publishedAt": news.get("published_on", news.get("publishedAt", 0)),
-                    "tags": news.get("tags", "").split("|") if isinstance(news.get("tags"), str) else (news.get("tags", []) if isinstance(news.get("tags"), list) else []),
-                    "categories": news.get("categories", "").split("|") if isinstance(news.get("categories"), str) else (news.get("categories", []) if isinstance(news.get("categories"), list) else []),
-                })
+            result.append({
+                "id": news.get("id", ""),
+                "title": news.get("title", ""),
+                "body": body,
+                "url": news.get("url", ""),
+                "source": news.get("source", ""),
+                "imageUrl": image_url,
+                "publishedAt": news.get("published_on", news.get("publishedAt", 0)),
+                "tags": news.get("tags", "").split("|") if isinstance(news.get("tags"), str) else (news.get("tags", []) if isinstance(news.get("tags"), list) else []),
+                "categories": news.get("categories", "").split("|") if isinstance(news.get("categories"), str) else (news.get("categories", []) if isinstance(news.get("categories"), list) else []),
+            })
+        
+        return result
             
-            return result
-                
-        except Exception as e:
-            # 에러 발생 시 mock 데이터 반환
-            print(f"뉴스 API 오류: {str(e)}, mock 데이터 반환")
-            return _get_mock_news(base_symbol, limit)
+    except Exception as e:
+        # 에러 발생 시 mock 데이터 반환
+        print(f"뉴스 API 오류: {str(e)}, mock 데이터 반환")
+        return _get_mock_news(base_symbol, limit)
 
 
 def _filter_news_by_symbol(
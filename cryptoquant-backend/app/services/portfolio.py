@@ -0,0 +1,196 @@
+"""
+포트폴리오 백테스트 서비스
+여러 심볼의 캔들을 (시간 x 심볼) 행렬로 정렬하고, 전략 신호와 포지션/자산 계산을
+모든 심볼에 대해 한 번의 벡터 연산으로 수행합니다.
+"""
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+from app.services.backtest import ACTION_BUY, BacktestEngine
+from app.services.candles import Candles, Curve, CANDLE_FIELDS
+from app.services.workers import CandleHandle, attach_candles
+
+
+def align_candles(candles_by_symbol: Dict[str, Candles]) -> Tuple[List[str], Candles]:
+    """
+    심볼별 캔들을 공통 시간축의 (시간 x 심볼) 행렬로 정렬
+    - 시간축은 모든 심볼 타임스탬프의 합집합이며, 모든 심볼에 데이터가 생긴 시점부터 시작합니다.
+    - 중간에 빠진 봉은 직전 가격으로 채우고 거래량은 0으로 둡니다.
+      시작 시점에 봉이 빠진 심볼은 시작 시점 이전의 마지막 봉 가격으로 채웁니다.
+    """
+    symbols = [symbol for symbol, candles in candles_by_symbol.items() if len(candles)]
+    if not symbols:
+        raise ValueError("정렬할 캔들 데이터가 없습니다.")
+
+    times = np.unique(np.concatenate([candles_by_symbol[s].time for s in symbols]))
+    common_start = max(int(candles_by_symbol[s].time[0]) for s in symbols)
+    times = times[times >= common_start]
+
+    n, m = len(times), len(symbols)
+    present = np.zeros((n, m), dtype=bool)
+    columns = {field: np.full((n, m), np.nan) for field in CANDLE_FIELDS if field != "time"}
+    for j, symbol in enumerate(symbols):
+        source = candles_by_symbol[symbol]
+        candles = source.between(common_start, int(times[-1]))
+        if not len(candles) or int(candles.time[0]) != common_start:
+            # 첫 행에 봉이 없으면 직전 봉 가격을 첫 행에 넣어 이후 빠진 봉 채우기의 기준으로 사용
+            previous = int(np.searchsorted(source.time, common_start)) - 1
+            for field in ("open", "high", "low", "close"):
+                columns[field][0, j] = getattr(source, field)[previous]
+        rows = np.searchsorted(times, candles.time)
+        present[rows, j] = True
+        for field, matrix in columns.items():
+            matrix[rows, j] = getattr(candles, field)
+
+    # 빠진 봉은 직전 봉 값으로 채움 (첫 행은 모든 심볼에 값이 있음)
+    last_row = np.where(present, np.arange(n)[:, None], 0)
+    np.maximum.accumulate(last_row, axis=0, out=last_row)
+    column_index = np.arange(m)[None, :]
+    for field in ("open", "high", "low", "close"):
+        columns[field] = columns[field][last_row, column_index]
+    columns["volume"] = np.where(present, columns["volume"], 0.0)
+
+    return symbols, Candles(times, **columns)
+
+
+def _normalize_weights(symbols: List[str], weights: Optional[Dict[str, float]]) -> np.ndarray:
+    """심볼별 목표 비중 (기본값 동일 비중, 합이 1이 되도록 정규화)"""
+    if not weights:
+        return np.full(len(symbols), 1.0 / len(symbols))
+    raw = np.array([float(weights.get(symbol, 0.0)) for symbol in symbols])
+    if np.any(raw < 0) or raw.sum() <= 0:
+        raise ValueError("비중은 0 이상이어야 하며 합이 0보다 커야 합니다.")
+    return raw / raw.sum()
+
+
+def _holding_matrix(actions: np.ndarray) -> np.ndarray:
+    """
+    봉별 보유 여부
+    무포지션일 때의 매도, 보유 중일 때의 매수는 무시되므로
+    "직전까지의 마지막 매수/매도 신호가 매수"인 봉이 곧 보유 중인 봉입니다.
+    """
+    n = len(actions)
+    event_row = np.where(actions != 0, np.arange(n)[:, None], -1)
+    np.maximum.accumulate(event_row, axis=0, out=event_row)
+    last_action = np.take_along_axis(actions, np.maximum(event_row, 0), axis=0)
+    return (event_row >= 0) & (last_action == ACTION_BUY)
+
+
+def _round_trips(
+    symbols: List[str], times: np.ndarray, close: np.ndarray, entries: np.ndarray, exits: np.ndarray
+) -> List[Dict[str, Any]]:
+    """진입/청산 행렬에서 심볼별 매수-매도 거래 쌍 목록 생성"""
+    trades = []
+    for j, symbol in enumerate(symbols):
+        for buy_row, sell_row in zip(np.flatnonzero(entries[:, j]), np.flatnonzero(exits[:, j])):
+            trades.append({"type": "buy", "symbol": symbol, "time": int(times[buy_row]), "price": float(close[buy_row, j]), "quantity": 0.0})
+            trades.append({"type": "sell", "symbol": symbol, "time": int(times[sell_row]), "price": float(close[sell_row, j]), "quantity": 0.0})
+    return trades
+
+
+def run_portfolio_backtest(
+    candles_by_symbol: Dict[str, Candles],
+    strategy_type: str,
+    parameters: Dict[str, Any],
+    initial_capital: float = 10000000.0,
+    commission: float = 0.001,
+    weights: Optional[Dict[str, float]] = None,
+    rebalance_every: int = 0,
+) -> Dict[str, Any]:
+    """
+    포트폴리오 백테스트
+    자본을 목표 비중대로 심볼별 슬리브(sleeve)에 나누고, 각 슬리브는 해당 심볼의 전략 신호대로
+    전액 매수/매도합니다 (단일 심볼 BacktestEngine과 같은 체결 규칙).
+    rebalance_every > 0이면 해당 캔들 수마다 슬리브를 목표 비중으로 재조정하며,
+    보유 중인 슬리브의 조정 금액에는 수수료를 부과합니다.
+    """
+    symbols, matrix = align_candles(candles_by_symbol)
+    target = _normalize_weights(symbols, weights)
+    close = matrix.close
+    n = len(matrix)
+
+    # 모든 심볼의 신호를 한 번에 계산
+    engine = BacktestEngine(initial_capital=initial_capital, commission=commission)
+    actions = engine._generate_signals(matrix, strategy_type, parameters)
+    held = _holding_matrix(actions)
+
+    prev_held = np.zeros_like(held)
+    prev_held[1:] = held[:-1]
+    entries = held & ~prev_held
+    exits = ~held & prev_held
+    # 마지막 캔들에서 남은 포지션 청산
+    final_exit = held[-1].copy()
+    exits[-1] |= final_exit
+
+    # 슬리브별 봉 단위 성장률: 보유 중 가격 변화 x 진입/청산 수수료
+    growth = np.ones_like(close)
+    growth[1:] = np.where(prev_held[1:], close[1:] / close[:-1], 1.0)
+    growth *= np.where(entries, 1 - commission, 1.0)
+    growth *= np.where(exits, 1 - commission, 1.0)
+
+    # 리밸런싱 구간별로 누적 성장률을 적용해 슬리브 가치 계산
+    step = rebalance_every if rebalance_every and rebalance_every > 0 else n
+    sleeves = np.empty_like(close)
+    allocation = initial_capital * target
+    contribution = np.zeros(len(symbols))
+    for start in range(0, n, step):
+        end = min(start + step, n)
+        segment = np.cumprod(growth[start:end], axis=0) * allocation
+        sleeves[start:end] = segment
+        contribution += segment[-1] - allocation
+        if end < n:
+            rebalanced = segment[-1].sum() * target
+            # 보유 중인 슬리브의 조정 금액만 실제 매매가 발생하므로 그 금액에만 수수료 부과
+            fee = np.abs(rebalanced - segment[-1]) * held[end - 1] * commission
+            allocation = rebalanced - fee
+            contribution -= fee
+
+    equity = sleeves.sum(axis=1)
+
+    # 포트폴리오 전체 지표는 단일 백테스트와 같은 계산 경로 사용
+    trades = _round_trips(symbols, matrix.time, close, entries, exits)
+    engine.equity_curve = Curve(matrix.time, equity)
+    engine.trades = trades
+    engine.trade_signals = []
+    timeline = Candles(matrix.time, *(np.zeros(n) for _ in range(5)))
+    result = engine.report(timeline)
+    result.pop("chartData")
+    result.pop("tradeSignals")
+
+    strategy_growth = np.prod(growth, axis=0)
+    assets = []
+    for j, symbol in enumerate(symbols):
+        buy_rows = np.flatnonzero(entries[:, j])
+        sell_rows = np.flatnonzero(exits[:, j])
+        symbol_trades = len(buy_rows)
+        wins = int(np.sum(close[sell_rows, j] > close[buy_rows, j]))
+        assets.append({
+            "symbol": symbol,
+            "weight": round(float(target[j]) * 100, 2),
+            "profit": round(float(contribution[j]), 2),
+            "contribution": round(float(contribution[j]) / initial_capital * 100, 2),
+            "strategyReturn": round((float(strategy_growth[j]) - 1) * 100, 2),
+            "totalTrades": symbol_trades,
+            "winRate": round(wins / symbol_trades * 100, 2) if symbol_trades else 0.0,
+        })
+
+    result["symbols"] = symbols
+    result["assets"] = assets
+    return result
+
+
+def run_portfolio_task(
+    handles: Dict[str, CandleHandle],
+    strategy_type: str,
+    parameters: Dict[str, Any],
+    initial_capital: float,
+    commission: float,
+    weights: Optional[Dict[str, float]],
+    rebalance_every: int,
+) -> Dict[str, Any]:
+    """워커 프로세스 작업: 심볼별 공유 캔들 핸들로 포트폴리오 백테스트 실행"""
+    candles_by_symbol = {symbol: attach_candles(handle) for symbol, handle in handles.items()}
+    return run_portfolio_backtest(
+        candles_by_symbol, strategy_type, parameters, initial_capital, commission, weights, rebalance_every
+    )
@@ -0,0 +1,117 @@
+"""
+캔들 리샘플링
+업스트림에서 받아 저장하는 기준 간격(BASE_INTERVALS) 외의 간격(3m, 2h, 6h, 12h, 3d, 1w, 1M, 7h 등)은
+기준 간격 캔들을 시간 구간(bucket)별로 묶어 만듭니다. 묶기는 NumPy 벡터 연산(reduceat)으로 처리합니다.
+- 간격 형식: <정수><단위>, 단위는 m(분), h(시간), d(일), w(주), M(월)
+- 구간 시작 시각: 분/시간/일은 Unix epoch 기준, 주는 월요일 00:00 UTC, 월은 매월 1일 00:00 UTC (Binance와 같음)
+- 기준 간격은 구간을 나누어떨어지게 하는 가장 긴 간격을 사용하므로, 새 간격을 써도 업스트림 요청이 늘지 않습니다.
+"""
+import re
+from typing import Optional, Tuple
+
+import numpy as np
+
+from app.services.candles import Candles
+
+# 업스트림에서 직접 받아 로컬 저장소에 보관하는 간격 (긴 간격부터)
+BASE_INTERVALS = ("1d", "4h", "1h", "15m", "5m", "1m")
+
+UNIT_SECONDS = {"m": 60, "h": 60 * 60, "d": 24 * 60 * 60, "w": 7 * 24 * 60 * 60}
+MAX_MONTH_SECONDS = 31 * 24 * 60 * 60
+WEEK_OFFSET = 4 * 24 * 60 * 60  # 1970-01-01은 목요일이므로 첫 월요일(1970-01-05)까지의 간격
+
+_INTERVAL_PATTERN = re.compile(r"^([1-9][0-9]*)([mhdwM])$")
+
+
+def parse_interval(interval: str) -> Tuple[int, str]:
+    """간격 문자열을 (개수, 단위)로 변환 (형식이 잘못되면 ValueError)"""
+    match = _INTERVAL_PATTERN.match(interval or "")
+    if match is None:
+        raise ValueError(f"지원하지 않는 캔들 간격입니다: {interval}")
+    return int(match.group(1)), match.group(2)
+
+
+def fixed_interval_seconds(interval: str) -> Optional[int]:
+    """고정 길이 간격의 길이 (초). 월 단위는 길이가 일정하지 않으므로 None"""
+    count, unit = parse_interval(interval)
+    if unit == "M":
+        return None
+    return count * UNIT_SECONDS[unit]
+
+
+def interval_seconds(interval: str) -> int:
+    """
+    간격의 길이 (초)
+    월 단위는 가장 긴 달(31일) 기준이므로, 마감 여부 판단에 쓰면 진행 중인 캔들을 마감된 것으로 보지 않습니다.
+    """
+    seconds = fixed_interval_seconds(interval)
+    if seconds is None:
+        return parse_interval(interval)[0] * MAX_MONTH_SECONDS
+    return seconds
+
+
+def bucket_times(times: np.ndarray, interval: str) -> np.ndarray:
+    """각 캔들 시각이 속하는 interval 구간의 시작 시각 (Unix timestamp 초, int64 배열)"""
+    count, unit = parse_interval(interval)
+    times = np.asarray(times, dtype=np.int64)
+    if unit == "M":
+        months = times.astype("datetime64[s]").astype("datetime64[M]").astype(np.int64)
+        starts = (months // count) * count
+        return starts.astype("datetime64[M]").astype("datetime64[s]").astype(np.int64)
+    size = count * UNIT_SECONDS[unit]
+    offset = WEEK_OFFSET if unit == "w" else 0
+    return (times - offset) // size * size + offset
+
+
+def candle_close_time(start_time: int, interval: str) -> int:
+    """start_time에 시작하는 캔들의 마감 시각 (다음 캔들 시작 시각)"""
+    count, unit = parse_interval(interval)
+    if unit == "M":
+        month = np.datetime64(int(start_time), "s").astype("datetime64[M]") + count
+        return int(month.astype("datetime64[s]").astype(np.int64))
+    return start_time + count * UNIT_SECONDS[unit]
+
+
+def candle_length(start_time: int, interval: str) -> int:
+    """start_time에 시작하는 캔들의 길이 (초, 월 단위는 해당 달의 실제 길이)"""
+    return candle_close_time(start_time, interval) - start_time
+
+
+def base_interval(interval: str) -> str:
+    """
+    interval 캔들을 만들 기준 간격
+    기준 간격이면 그대로, 아니면 구간 길이와 구간 시작 시각을 모두 나누어떨어지게 하는 가장 긴 기준 간격
+    (월 단위는 1d)
+    """
+    if interval in BASE_INTERVALS:
+        return interval
+    seconds = fixed_interval_seconds(interval)
+    if seconds is None:
+        return "1d"
+    offset = WEEK_OFFSET if interval.endswith("w") else 0
+    for base in BASE_INTERVALS:
+        base_seconds = fixed_interval_seconds(base)
+        if seconds % base_seconds == 0 and offset % base_seconds == 0:
+            return base
+    return BASE_INTERVALS[-1]
+
+
+def resample(candles: Candles, interval: str) -> Candles:
+    """
+    시간순 정렬된 기준 간격 캔들을 interval 캔들로 묶음
+    시가는 구간 첫 캔들, 종가는 마지막 캔들, 고가/저가는 최대/최소, 거래량은 합계입니다.
+    기준 캔들이 일부만 있는 구간(진행 중인 캔들, 거래소 누락 구간)은 있는 캔들로만 만듭니다.
+    """
+    if not len(candles):
+        return Candles.empty()
+    buckets = bucket_times(candles.time, interval)
+    starts = np.flatnonzero(np.concatenate(([True], buckets[1:] != buckets[:-1])))
+    ends = np.append(starts[1:], len(candles)) - 1
+    return Candles(
+        buckets[starts],
+        candles.open[starts],
+        np.maximum.reduceat(candles.high, starts),
+        np.minimum.reduceat(candles.low, starts),
+        candles.close[ends],
+        np.add.reduceat(candles.volume, starts),
+    )
@@ -0,0 +1,278 @@
+"""
+백테스트 결과 캐시
+요청 내용의 정규화 해시를 키로 직렬화된 응답(JSON 바이트)을 저장합니다.
+프로세스 메모리 LRU를 먼저 조회하고, 없으면 디스크 저장소를 조회합니다.
+결과는 과거 데이터로만 결정되므로 만료 시각이 없으며, 아직 마감되지 않은 마지막 캔들을
+포함한 결과만 그 캔들이 마감되는 시각에 만료됩니다.
+디스크 저장소는 용량 한도(max_disk_bytes)를 넘으면 만료된 파일과 가장 오래 쓰이지 않은 파일부터 삭제합니다.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+# 엔진 계산 방식이 바뀌어 기존 결과를 재사용할 수 없게 되면 올림
+# 2: 성과 지표 추가(sortino/calmar/exposure, drawdownCurve), 월간 수익률 UTC 기준
+# 3: 기간 조회를 구간별 동시 조회로 변경 (캔들 범위 수정)
+CACHE_VERSION = 3
+
+_HEADER_SIZE = 16  # 디스크 파일 앞부분: 만료 시각(Unix timestamp, 0이면 만료 없음)
+_EVICT_TARGET = 0.9  # 용량 한도를 넘으면 한도의 90%까지 줄임
+
+
+def cache_key(kind: str, payload: Dict[str, Any]) -> str:
+    """
+    요청 내용의 정규화 해시
+    키 순서/공백과 무관하도록 정렬된 JSON으로 직렬화한 뒤 SHA-256을 계산합니다.
+    """
+    canonical = json.dumps(
+        {"kind": kind, "version": CACHE_VERSION, "payload": payload},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    메모리 LRU + 디스크 2단계 결과 캐시
+    값은 응답 본문 바이트이므로 적중 시 재직렬화/검증 없이 그대로 반환할 수 있습니다.
+    """
+
+    def __init__(self, directory: Optional[str], max_entries: int = 256, max_disk_bytes: int = 0):
+        """max_disk_bytes: 디스크 저장소 용량 한도 (0이면 제한 없음)"""
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_disk_bytes = max_disk_bytes
+        self._entries: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        self._disk_bytes: Optional[int] = None  # 이 프로세스가 추정한 디스크 사용량 (처음 쓸 때 계산)
+        self.stats = {
+            "memoryHits": 0, "diskHits": 0, "misses": 0, "expired": 0, "stores": 0, "diskEvictions": 0,
+        }
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.bin")
+
+    def get(self, key: str) -> Optional[bytes]:
+        """캐시 조회 (만료된 항목은 삭제 후 None)"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                body, expires_at = entry
+                if expires_at and expires_at <= now:
+                    del self._entries[key]
+                    self.stats["expired"] += 1
+                    self.stats["misses"] += 1
+                    self._remove_disk(key)
+                    return None
+                else:
+                    self._entries.move_to_end(key)
+                    self.stats["memoryHits"] += 1
+                    return body
+
+        entry = self._read_disk(key)
+        with self._lock:
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            body, expires_at = entry
+            if expires_at and expires_at <= now:
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                self._remove_disk(key)
+                return None
+            self.stats["diskHits"] += 1
+            self._remember(key, body, expires_at)
+            return body
+
+    def put(self, key: str, body: bytes, expires_at: float = 0.0) -> None:
+        """캐시 저장 (expires_at이 0이면 만료 없음)"""
+        with self._lock:
+            self._remember(key, body, expires_at)
+            self.stats["stores"] += 1
+        self._write_disk(key, body, expires_at)
+
+    def clear(self) -> None:
+        """메모리/디스크 캐시 전체 삭제"""
+        with self._lock:
+            self._entries.clear()
+        if self.directory:
+            for name in os.listdir(self.directory):
+                if name.endswith(".bin"):
+                    self._remove_disk(name[: -len(".bin")])
+
+    def info(self) -> Dict[str, Any]:
+        """적중/실패 카운터와 현재 메모리 항목 수"""
+        with self._lock:
+            lookups = self.stats["memoryHits"] + self.stats["diskHits"] + self.stats["misses"]
+            hits = lookups - self.stats["misses"]
+            return {
+                **self.stats,
+                "hits": hits,
+                "hitRate": round(hits / lookups * 100, 2) if lookups else 0.0,
+                "memoryEntries": len(self._entries),
+                "maxEntries": self.max_entries,
+                "maxDiskBytes": self.max_disk_bytes,
+            }
+
+    def _remember(self, key: str, body: bytes, expires_at: float) -> None:
+        """메모리 LRU에 추가 (락을 잡은 상태에서 호출)"""
+        self._entries[key] = (body, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _read_disk(self, key: str) -> Optional[Tuple[bytes, float]]:
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                header = f.read(_HEADER_SIZE)
+                body = f.read()
+        except FileNotFoundError:
+            return None
+        try:
+            # 수정 시각을 마지막 사용 시각으로 써서 용량 초과 시 오래 쓰이지 않은 파일부터 삭제
+            os.utime(path)
+        except OSError:
+            pass
+        try:
+            expires_at = float(header.decode("ascii"))
+        except ValueError:
+            # 손상된 파일은 없는 것으로 취급
+            self._remove_disk(key)
+            return None
+        return body, expires_at
+
+    def _write_disk(self, key: str, body: bytes, expires_at: float) -> None:
+        if not self.directory:
+            return
+        # 임시 파일에 쓴 뒤 교체하여 동시에 읽는 쪽이 쓰다 만 파일을 보지 않도록 함
+        path = self._path(key)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(temp_path, "wb") as f:
+                f.write(f"{expires_at:<{_HEADER_SIZE}.0f}".encode("ascii"))
+                f.write(body)
+            os.replace(temp_path, path)
+        except OSError:
+            # 디스크 저장 실패는 결과 반환을 막지 않음 (메모리 캐시에는 남아 있음)
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            return
+        if self.max_disk_bytes:
+            with self._disk_lock:
+                if self._disk_bytes is None:
+                    self._disk_bytes = self._disk_usage()
+                else:
+                    self._disk_bytes += _HEADER_SIZE + len(body)
+                if self._disk_bytes > self.max_disk_bytes:
+                    self._evict_disk()
+
+    def _disk_files(self) -> List[Tuple[str, os.stat_result]]:
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".bin"):
+                try:
+                    files.append((entry.path, entry.stat()))
+                except FileNotFoundError:
+                    pass
+        return files
+
+    def _disk_usage(self) -> int:
+        return sum(stat.st_size for _, stat in self._disk_files())
+
+    def _evict_disk(self) -> None:
+        """
+        디스크 사용량을 한도의 90%까지 줄임 (_disk_lock을 잡은 상태에서 호출)
+        만료된 파일을 먼저 지우고, 그래도 넘으면 마지막 사용 시각(수정 시각)이 오래된 파일부터 지웁니다.
+        다른 프로세스가 쓴 파일도 포함하도록 디렉터리를 다시 읽어 실제 사용량을 계산합니다.
+        """
+        now = time.time()
+        files = sorted(self._disk_files(), key=lambda item: item[1].st_mtime)
+        usage = sum(stat.st_size for _, stat in files)
+        target = self.max_disk_bytes * _EVICT_TARGET
+        kept = []
+        for path, stat in files:
+            if _expired_file(path, now) and _remove_file(path):
+                usage -= stat.st_size
+                self.stats["diskEvictions"] += 1
+            else:
+                kept.append((path, stat))
+        for path, stat in kept:
+            if usage <= target:
+                break
+            if _remove_file(path):
+                usage -= stat.st_size
+                self.stats["diskEvictions"] += 1
+        self._disk_bytes = usage
+
+    def _remove_disk(self, key: str) -> None:
+        _remove_file(self._path(key))
+
+
+def _expired_file(path: str, now: float) -> bool:
+    """디스크 파일 헤더의 만료 시각이 지났는지 (읽을 수 없거나 손상된 파일도 만료로 취급)"""
+    try:
+        with open(path, "rb") as f:
+            expires_at = float(f.read(_HEADER_SIZE).decode("ascii"))
+    except FileNotFoundError:
+        return False
+    except (OSError, ValueError):
+        return True
+    return bool(expires_at) and expires_at <= now
+
+
+def _remove_file(path: str) -> bool:
+    try:
+        os.remove(path)
+        return True
+    except FileNotFoundError:
+        return False
+
+
+_cache: Optional[ResultCache] = None
+
+
+def get_result_cache() -> ResultCache:
+    """
+    공용 결과 캐시 조회 (최초 호출 시 생성)
+    RESULT_CACHE_DIR 환경 변수가 빈 문자열이면 디스크 저장 없이 메모리만 사용합니다.
+    디스크 용량 한도는 RESULT_CACHE_DISK_MB (기본값 1024, 0이면 제한 없음)
+    """
+    global _cache
+    if _cache is None:
+        _cache = ResultCache(
+            directory=os.getenv("RESULT_CACHE_DIR", ".cache/backtest_results") or None,
+            max_entries=max(1, int(os.getenv("RESULT_CACHE_SIZE", "256"))),
+            max_disk_bytes=disk_budget("RESULT_CACHE_DISK_MB", 1024),
+        )
+    return _cache
+
+
+def disk_budget(env_name: str, default_mb: int) -> int:
+    """디스크 용량 한도 환경 변수(MB)를 바이트로 변환 (0이면 제한 없음)"""
+    return max(0, int(os.getenv(env_name, str(default_mb)))) * 1024 * 1024
+
+
+def forming_candle_expiry(last_candle_time: int, interval_seconds: int, now: Optional[float] = None) -> float:
+    """
+    마지막 캔들이 아직 마감되지 않았으면 마감 시각을, 이미 마감되었으면 0(만료 없음)을 반환
+    """
+    close_time = last_candle_time + interval_seconds
+    now = time.time() if now is None else now
+    return float(close_time) if close_time > now else 0.0
@@ -0,0 +1,178 @@
+"""
+백테스트 결과 상세 데이터 인코딩
+자산 곡선 / 거래 내역 / 월간 수익률을 JSON 텍스트 대신 열 기반 압축 바이너리로 저장합니다.
+- 시간 열은 첫 값 + 차분(delta)으로 저장해 일정 간격 캔들이면 거의 같은 값만 남깁니다.
+- 실수 열은 바이트 단위로 전치(shuffle)해 지수/상위 바이트가 모이도록 한 뒤 zlib으로 압축합니다.
+디코딩은 DB 모델의 속성에 접근할 때만 수행합니다 (BacktestResult.equity_curve 등).
+"""
+import base64
+import json
+import zlib
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from app.services.candles import Curve
+
+# 직렬화 형식: [형식 버전(u2), 데이터 종류(u2), 행 수(u4)] + zlib(열 바이트)
+_HEADER = np.dtype([("version", "<u2"), ("kind", "<u2"), ("n", "<u4")])
+_VERSION = 1
+_KIND_CURVE = 1
+_KIND_TRADES = 2
+_COMPRESS_LEVEL = 6
+
+# 거래 종류 <-> 정수 코드
+_TRADE_TYPES = {"buy": 1, "sell": -1}
+_TRADE_NAMES = {code: name for name, code in _TRADE_TYPES.items()}
+
+CurveLike = Union[Curve, Sequence[Dict[str, Any]]]
+
+# 레코드 중 압축 바이너리 필드 (JSON 직렬화 시 base64)
+RECORD_BLOB_FIELDS = ("equity_curve_data", "trades_data", "monthly_returns_data")
+
+
+def _shuffle(values: np.ndarray) -> bytes:
+    """(n, itemsize) 바이트 행렬을 전치해 같은 자리의 바이트끼리 모음"""
+    values = np.ascontiguousarray(values)
+    return values.view(np.uint8).reshape(len(values), values.itemsize).T.tobytes()
+
+
+def _unshuffle(body: memoryview, offset: int, n: int, dtype: np.dtype) -> np.ndarray:
+    dtype = np.dtype(dtype)
+    planes = np.frombuffer(body, dtype=np.uint8, count=n * dtype.itemsize, offset=offset)
+    return np.ascontiguousarray(planes.reshape(dtype.itemsize, n).T).view(dtype).ravel()
+
+
+def _encode_time(time: np.ndarray) -> bytes:
+    time = np.asarray(time, dtype=np.int64)
+    return _shuffle(np.diff(time, prepend=np.int64(0)))
+
+
+def _decode_time(body: memoryview, offset: int, n: int) -> np.ndarray:
+    return np.cumsum(_unshuffle(body, offset, n, np.int64))
+
+
+def _pack(kind: int, n: int, columns: List[bytes]) -> bytes:
+    header = np.array([(_VERSION, kind, n)], dtype=_HEADER).tobytes()
+    return header + zlib.compress(b"".join(columns), _COMPRESS_LEVEL)
+
+
+def _unpack(blob: bytes, kind: int):
+    header = np.frombuffer(blob, dtype=_HEADER, count=1)[0]
+    if int(header["version"]) != _VERSION or int(header["kind"]) != kind:
+        raise ValueError("지원하지 않는 결과 데이터 형식입니다.")
+    body = memoryview(zlib.decompress(memoryview(blob)[_HEADER.itemsize:]))
+    return int(header["n"]), body
+
+
+def _curve_columns(curve: CurveLike):
+    if isinstance(curve, Curve):
+        return curve.time, curve.value
+    time = np.fromiter((point["time"] for point in curve), dtype=np.int64, count=len(curve))
+    value = np.fromiter((point["value"] for point in curve), dtype=np.float64, count=len(curve))
+    return time, value
+
+
+def encode_curve(curve: Optional[CurveLike]) -> Optional[bytes]:
+    """
+    시간-값 곡선 인코딩 (Curve 또는 {"time", "value"} dict 리스트)
+    월간 수익률처럼 dict 리스트 형식인 데이터도 같은 형식으로 저장합니다.
+    """
+    if curve is None:
+        return None
+    time, value = _curve_columns(curve)
+    return _pack(_KIND_CURVE, len(time), [
+        _encode_time(time),
+        _shuffle(np.asarray(value, dtype=np.float64)),
+    ])
+
+
+def decode_curve(blob: Optional[bytes]) -> Optional[Curve]:
+    """encode_curve의 역변환"""
+    if blob is None:
+        return None
+    n, body = _unpack(blob, _KIND_CURVE)
+    time = _decode_time(body, 0, n)
+    value = _unshuffle(body, n * 8, n, np.float64)
+    return Curve(time, value)
+
+
+def encode_trades(trades: Optional[List[Dict[str, Any]]]) -> Optional[bytes]:
+    """거래 내역(type / time / price / quantity dict 리스트) 인코딩"""
+    if trades is None:
+        return None
+    n = len(trades)
+    time = np.fromiter((t["time"] for t in trades), dtype=np.int64, count=n)
+    types = np.fromiter((_TRADE_TYPES[t["type"]] for t in trades), dtype=np.int8, count=n)
+    price = np.fromiter((t["price"] for t in trades), dtype=np.float64, count=n)
+    quantity = np.fromiter((t["quantity"] for t in trades), dtype=np.float64, count=n)
+    return _pack(_KIND_TRADES, n, [
+        _encode_time(time),
+        types.tobytes(),
+        _shuffle(price),
+        _shuffle(quantity),
+    ])
+
+
+def decode_trades(blob: Optional[bytes]) -> Optional[List[Dict[str, Any]]]:
+    """encode_trades의 역변환 (엔진의 거래 내역과 같은 dict 리스트)"""
+    if blob is None:
+        return None
+    n, body = _unpack(blob, _KIND_TRADES)
+    time = _decode_time(body, 0, n)
+    types = np.frombuffer(body, dtype=np.int8, count=n, offset=n * 8)
+    price = _unshuffle(body, n * 9, n, np.float64)
+    quantity = _unshuffle(body, n * 17, n, np.float64)
+    return [
+        {"type": _TRADE_NAMES[code], "time": t, "price": p, "quantity": q}
+        for code, t, p, q in zip(types.tolist(), time.tolist(), price.tolist(), quantity.tolist())
+    ]
+
+
+def encode_result_record(
+    initial_capital: float,
+    result: Dict[str, Any],
+    trades: List[Dict[str, Any]],
+) -> Dict[str, Any]:
+    """
+    BacktestEngine.run 결과를 BacktestResult 저장용 레코드로 변환 (요약 지표 + 압축된 상세 데이터)
+    trades는 엔진의 거래 내역(수량 포함)이며, 다운샘플링 전 결과를 넘겨야 전체 곡선이 저장됩니다.
+    """
+    sells = [t["price"] for t in trades if t["type"] == "sell"]
+    buys = [t["price"] for t in trades if t["type"] == "buy"][: len(sells)]
+    winning_trades = sum(1 for buy, sell in zip(buys, sells) if sell > buy)
+    total_trades = result["totalTrades"]
+    equity_curve = result["equityCurve"]
+    return {
+        "initial_capital": initial_capital,
+        "final_equity": float(equity_curve.value[-1]) if len(equity_curve) else initial_capital,
+        "total_return": result["totalReturn"],
+        "total_trades": total_trades,
+        "winning_trades": winning_trades,
+        "losing_trades": total_trades - winning_trades,
+        "win_rate": result["winRate"],
+        "max_drawdown": result["maxDrawdown"],
+        "sharpe_ratio": result["sharpeRatio"],
+        "equity_curve_data": encode_curve(equity_curve),
+        "trades_data": encode_trades(trades),
+        "monthly_returns_data": encode_curve(result["monthlyReturns"]),
+    }
+
+
+def dump_record(record: Dict[str, Any]) -> bytes:
+    """encode_result_record 레코드를 JSON 바이트로 직렬화 (압축 바이너리 필드는 base64)"""
+    payload = {
+        name: base64.b64encode(value).decode("ascii") if name in RECORD_BLOB_FIELDS and value is not None
+        else (value.item() if isinstance(value, np.generic) else value)
+        for name, value in record.items()
+    }
+    return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+
+def load_record(body: bytes) -> Dict[str, Any]:
+    """dump_record의 역변환"""
+    record = json.loads(body)
+    for name in RECORD_BLOB_FIELDS:
+        if record.get(name) is not None:
+            record[name] = base64.b64decode(record[name])
+    return record
@@ -0,0 +1,127 @@
+"""
+전략 신호 캐시
+신호 배열은 캔들과 전략/파라미터로만 결정되므로, (캔들 내용 지문, 전략, 파라미터) 키로 저장해 두고
+초기 자본이나 수수료만 바뀐 재실행에서는 신호 생성을 건너뛰고 거래 실행 단계만 다시 수행합니다.
+저장소는 결과 캐시와 같은 메모리 LRU + 디스크 2단계 캐시(ResultCache)이며, 디스크를 공유하므로
+프로세스 풀의 다른 워커가 만든 신호도 재사용할 수 있습니다.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from app.services.candles import CANDLE_FIELDS, Candles
+from app.services.intrabar import IntrabarCandles
+from app.services.result_cache import ResultCache, cache_key, disk_budget
+
+# 직렬화 형식: [캔들 수(int64), 체결 가격 유무(int64)] + 신호(int8, 8바이트 정렬) + 체결 가격(float64)
+_HEADER = np.dtype([("n", "<i8"), ("has_fills", "<i8")])
+
+
+# 최근에 계산한 캔들 지문 {id(candles): (candles, 지문)}
+# 캔들 객체를 함께 보관해 id가 다른 객체에 재사용되지 않도록 하고, 같은 데이터셋은 한 번만 해시합니다.
+_fingerprints: "OrderedDict[int, Tuple[Candles, str]]" = OrderedDict()
+_MAX_FINGERPRINTS = 8
+_fingerprints_lock = threading.Lock()
+
+
+def candle_fingerprint(candles: Candles) -> str:
+    """
+    캔들 내용(모든 필드의 바이트)의 해시. 같은 데이터면 조회 경로와 무관하게 같은 값입니다.
+    캔들 배열은 만든 뒤 바꾸지 않으므로 같은 객체의 지문은 다시 계산하지 않습니다.
+    """
+    with _fingerprints_lock:
+        cached = _fingerprints.get(id(candles))
+        if cached is not None and cached[0] is candles:
+            _fingerprints.move_to_end(id(candles))
+            return cached[1]
+    fingerprint = _hash_candles(candles)
+    with _fingerprints_lock:
+        _fingerprints[id(candles)] = (candles, fingerprint)
+        while len(_fingerprints) > _MAX_FINGERPRINTS:
+            _fingerprints.popitem(last=False)
+    return fingerprint
+
+
+def _hash_candles(candles: Candles) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(len(candles)).encode("ascii"))
+    for field in CANDLE_FIELDS:
+        values = np.ascontiguousarray(getattr(candles, field))
+        digest.update(str(values.shape).encode("ascii"))
+        digest.update(values)
+    return digest.hexdigest()
+
+
+def _intrabar_fingerprint(intrabar: IntrabarCandles) -> str:
+    digest = hashlib.blake2b(candle_fingerprint(intrabar.candles).encode("ascii"), digest_size=16)
+    digest.update(np.ascontiguousarray(intrabar.starts, dtype=np.int64))
+    digest.update(np.ascontiguousarray(intrabar.ends, dtype=np.int64))
+    return digest.hexdigest()
+
+
+def signal_key(
+    candles: Candles,
+    strategy_type: str,
+    parameters: Dict[str, Any],
+    intrabar: Optional[IntrabarCandles] = None,
+) -> str:
+    """신호 캐시 키 (봉 내부 체결이면 하위 봉 데이터도 키에 포함)"""
+    return cache_key("signals", {
+        "candles": candle_fingerprint(candles),
+        "strategyType": strategy_type,
+        "parameters": parameters,
+        "intrabar": _intrabar_fingerprint(intrabar) if intrabar is not None else None,
+    })
+
+
+def encode_signals(actions: np.ndarray, fills: Optional[np.ndarray]) -> bytes:
+    """신호 / 체결 가격 배열을 바이트로 직렬화"""
+    n = len(actions)
+    header = np.array([(n, fills is not None)], dtype=_HEADER).tobytes()
+    padding = b"\0" * (-n % 8)
+    body = np.ascontiguousarray(actions, dtype=np.int8).tobytes() + padding
+    if fills is not None:
+        body += np.ascontiguousarray(fills, dtype=np.float64).tobytes()
+    return header + body
+
+
+def decode_signals(body: bytes) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    encode_signals의 역변환
+    배열은 캐시 바이트를 복사 없이 참조하는 읽기 전용 배열입니다.
+    """
+    header = np.frombuffer(body, dtype=_HEADER, count=1)[0]
+    n = int(header["n"])
+    offset = _HEADER.itemsize
+    actions = np.frombuffer(body, dtype=np.int8, count=n, offset=offset)
+    fills = None
+    if header["has_fills"]:
+        offset += n + (-n % 8)
+        fills = np.frombuffer(body, dtype=np.float64, count=n, offset=offset)
+    return actions, fills
+
+
+_cache: Optional[ResultCache] = None
+
+
+def get_signal_cache() -> Optional[ResultCache]:
+    """
+    공용 신호 캐시 조회 (최초 호출 시 생성, SIGNAL_CACHE_SIZE가 0이면 None)
+    SIGNAL_CACHE_DIR 환경 변수가 빈 문자열이면 디스크 저장 없이 프로세스 메모리만 사용합니다.
+    디스크 용량 한도는 SIGNAL_CACHE_DISK_MB (기본값 256, 0이면 제한 없음)
+    """
+    global _cache
+    size = int(os.getenv("SIGNAL_CACHE_SIZE", "64"))
+    if size <= 0:
+        return None
+    if _cache is None:
+        _cache = ResultCache(
+            directory=os.getenv("SIGNAL_CACHE_DIR", ".cache/signals") or None,
+            max_entries=size,
+            max_disk_bytes=disk_budget("SIGNAL_CACHE_DISK_MB", 256),
+        )
+    return _cache
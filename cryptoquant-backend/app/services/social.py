@@ -2,11 +2,11 @@
 소셜 미디어 서비스
 Reddit과 Twitter/X에서 암호화폐 관련 게시물을 가져옵니다.
 """
-import httpx
 from typing import List, Dict, Any
 from datetime import datetime, timedelta
 import random
 import re
+from app.services.http_clients import get_http_client
 
 # Reddit API (공개 API, 인증 불필요)
 REDDIT_BASE_URL = "https://www.reddit.com/r"
@@ -36,72 +36,72 @@ async def get_reddit_posts(symbol: str, limit: int = 10) -> List[Dict[str, Any]]
         "altcoin",
     ]
     
-    async with httpx.AsyncClient() as client:
-        try:
-            all_posts = []
-            
-            # 여러 서브레딧에서 검색
-            for subreddit in subreddits[:3]:  # 상위 3개만 검색
-                try:
-                    # Reddit 검색 API 사용
-                    response = await client.get(
-                        f"{REDDIT_BASE_URL}/{subreddit}/search.json",
-                        params={
-                            "q": base_symbol,
-                            "sort": "new",
-                            "limit": limit,
-                            "restrict_sr": "1",  # 해당 서브레딧만 검색
-                        },
-                        headers={
-                            "User-Agent": "CryptoQuant/1.0 (Educational Purpose)",
-                        },
-                        timeout=10.0,
-                    )
-                    
-                    if response.status_code == 200:
-                        data = response.json()
-                        if "data" in data and "children" in data["data"]:
-                            for child in data["data"]["children"]:
-                                post = child.get("data", {})
-                                # 제목이나 본문에 심볼이 포함된 경우만 추가
-                                title = post.get("title", "").lower()
-                                selftext = post.get("selftext", "").lower()
-                                
-                                if (base_symbol_lower in title or 
-                                    base_symbol_lower in selftext or
-                                    base_symbol_lower in post.get("subreddit", "").lower()):
-                                    all_posts.append({
-                                        "id": f"reddit_{post.get('id', '')}",
-                                        "title": post.get("title", ""),
-                                        "body": post.get("selftext", "")[:300] + "..." if len(post.get("selftext", "")) > 300 else post.get("selftext", ""),
-                                        "url": f"https://www.reddit.com{post.get('permalink', '')}",
-                                        "source": f"r/{post.get('subreddit', 'cryptocurrency')}",
-                                        "author": post.get("author", ""),
-                                        "upvotes": post.get("ups", 0),
-                                        "comments": post.get("num_comments", 0),
-                                        "publishedAt": int(post.get("created_utc", 0)),
-                                        "type": "reddit",
-                                    })
-                except Exception as e:
-                    print(f"Reddit 서브레딧 {subreddit} 조회 실패: {str(e)}")
-                    continue
-            
-            # 중복 제거 및 정렬
-            seen_ids = set()
-            unique_posts = []
-            for post in all_posts:
-                if post["id"] not in seen_ids:
-                    seen_ids.add(post["id"])
-                    unique_posts.append(post)
-            
-            # 시간순 정렬 (최신순)
-            unique_posts.sort(key=lambda x: x["publishedAt"], reverse=True)
-            
-            return unique_posts[:limit]
-            
-        except Exception as e:
-            print(f"Reddit API 오류: {str(e)}, mock 데이터 반환")
-            return _get_mock_reddit_posts(base_symbol, limit)
+    client = get_http_client("reddit")
+    try:
+        all_posts = []
+        
+        # 여러 서브레딧에서 검색
+        for subreddit in subreddits[:3]:  # 상위 3개만 검색
+            try:
+                # Reddit 검색 API 사용
+                response = await client.get(
+                    f"{REDDIT_BASE_URL}/{subreddit}/search.json",
+                    params={
+                        "q": base_symbol,
+                        "sort": "new",
+                        "limit": limit,
+                        "restrict_sr": "1",  # 해당 서브레딧만 검색
+                    },
+                    headers={
+                        "User-Agent": "CryptoQuant/1.0 (Educational Purpose)",
+                    },
+                    timeout=10.0,
+                )
+                
+                if response.status_code == 200:
+                    data = response.json()
+                    if "data" in data and "children" in data["data"]:
+                        for child in data["data"]["children"]:
+                            post = child.get("data", {})
+                            # 제목이나 본문에 심볼이 포함된 경우만 추가
+                            title = post.get("title", "").lower()
+                            selftext = post.get("selftext", "").lower()
+                            
+                            if (base_symbol_lower in title or 
+                                base_symbol_lower in selftext or
+                                base_symbol_lower in post.get("subreddit", "").lower()):
+                                all_posts.append({
+                                    "id": f"reddit_{post.get('id', '')}",
+                                    "title": post.get("title", ""),
+                                    "body": post.get("selftext", "")[:300] + "..." if len(post.get("selftext", "")) > 300 else post.get("selftext", ""),
+                                    "url": f"https://www.reddit.com{post.get('permalink', '')}",
+                                    "source": f"r/{post.get('subreddit', 'cryptocurrency')}",
+                                    "author": post.get("author", ""),
+                                    "upvotes": post.get("ups", 0),
+                                    "comments": post.get("num_comments", 0),
+                                    "publishedAt": int(post.get("created_utc", 0)),
+                                    "type": "reddit",
+                                })
+            except Exception as e:
+                print(f"Reddit 서브레딧 {subreddit} 조회 실패: {str(e)}")
+                continue
+        
+        # 중복 제거 및 정렬
+        seen_ids = set()
+        unique_posts = []
+        for post in all_posts:
+            if post["id"] not in seen_ids:
+                seen_ids.add(post["id"])
+                unique_posts.append(post)
+        
+        # 시간순 정렬 (최신순)
+        unique_posts.sort(key=lambda x: x["publishedAt"], reverse=True)
+        
+        return unique_posts[:limit]
+        
+    except Exception as e:
+        print(f"Reddit API 오류: {str(e)}, mock 데이터 반환")
+        return _get_mock_reddit_posts(base_symbol, limit)
 
 
 async def get_twitter_posts(symbol: str, limit: int = 10) -> List[Dict[str, Any]]:
@@ -0,0 +1,514 @@
+"""
+전략 규칙 언어(DSL) 서비스
+"buy when ema(12) crosses_above ema(26) and rsi(14) < 60" 같은 규칙 문자열을
+한 번 파싱한 뒤, 지표/연산 노드로 이루어진 DAG로 컴파일해 벡터 연산으로 평가합니다.
+
+규칙 문법 (줄바꿈 또는 ';'로 규칙 구분, 키워드는 대소문자 무시)
+    rule       := ("buy" | "sell") "when" condition
+    condition  := and_expr ("or" and_expr)*
+    and_expr   := not_expr ("and" not_expr)*
+    not_expr   := "not" not_expr | comparison
+    comparison := arith [("<" | "<=" | ">" | ">=" | "==" | "!=" | "crosses_above" | "crosses_below") arith]
+    arith      := term (("+" | "-") term)*
+    term       := factor (("*" | "/") factor)*
+    factor     := 숫자 | 가격 필드 | 파라미터 이름 | 함수 호출 | "-" factor | "(" condition ")"
+
+- 가격 필드: open, high, low, close, volume
+- 지표 함수: sma(기간[, 필드]), ema(기간[, 필드]), rsi(기간[, 필드]),
+  macd / macd_signal / macd_hist(fast, slow, signal), bb_upper / bb_middle / bb_lower(기간, 표준편차 배수), atr(기간)
+- 일반 함수: prev(식[, n]) (n봉 전 값), abs(식), min(식, 식), max(식, 식)
+- 그 밖의 이름은 전략 파라미터 값으로 치환됩니다 (예: "ema(fast) crosses_above ema(slow)").
+
+같은 노드(예: 매수/매도 규칙에 모두 등장하는 ema(26))는 DAG에서 하나로 합쳐져 한 번만 계산되고,
+지표 계산은 IndicatorSet 캐시를 통해 기존 전략과 같은 배열 함수를 사용합니다.
+"""
+import math
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.indicators import IndicatorSet
+
+PRICE_FIELDS = ("open", "high", "low", "close", "volume")
+
+COMPARISON_OPS = ("<", "<=", ">", ">=", "==", "!=")
+CROSS_OPS = ("crosses_above", "crosses_below")
+KEYWORDS = {"buy", "sell", "when", "and", "or", "not"} | set(CROSS_OPS)
+
+MAX_RULES_LENGTH = 10000
+
+# 지표 함수: (기본 인자 목록, 필드 인자 허용 여부)
+INDICATOR_FUNCTIONS: Dict[str, Tuple[Tuple[Optional[float], ...], bool]] = {
+    "sma": ((None,), True),
+    "ema": ((None,), True),
+    "rsi": ((14,), True),
+    "macd": ((12, 26, 9), False),
+    "macd_signal": ((12, 26, 9), False),
+    "macd_hist": ((12, 26, 9), False),
+    "bb_upper": ((20, 2.0), False),
+    "bb_middle": ((20, 2.0), False),
+    "bb_lower": ((20, 2.0), False),
+    "atr": ((14,), False),
+}
+
+_TOKEN_PATTERN = re.compile(
+    r"\s*(?:(?P<number>\d+\.\d*|\.\d+|\d+)|(?P<name>[A-Za-z_][A-Za-z_0-9]*)|(?P<op><=|>=|==|!=|[<>()+\-*/,]))"
+)
+
+
+class StrategyRuleError(ValueError):
+    """규칙 문자열의 문법 또는 의미 오류"""
+
+
+# ---------------------------------------------------------------------------
+# 파싱 (규칙 문자열 -> 구문 트리)
+# ---------------------------------------------------------------------------
+
+def _tokenize(text: str) -> List[Tuple[str, Any]]:
+    tokens = []
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = _TOKEN_PATTERN.match(text, position)
+        if match is None:
+            raise StrategyRuleError(f"해석할 수 없는 문자가 있습니다: '{text[position:].strip()[:20]}'")
+        position = match.end()
+        if match.group("number") is not None:
+            tokens.append(("number", float(match.group("number"))))
+        elif match.group("name") is not None:
+            name = match.group("name").lower()
+            tokens.append(("keyword" if name in KEYWORDS else "name", name))
+        else:
+            tokens.append(("op", match.group("op")))
+    return tokens
+
+
+class _Parser:
+    """재귀 하강 파서. 구문 트리는 불변 튜플이므로 캐시해서 공유할 수 있습니다."""
+
+    def __init__(self, tokens: List[Tuple[str, Any]]):
+        self.tokens = tokens
+        self.position = 0
+
+    def peek(self) -> Tuple[Optional[str], Any]:
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return None, None
+
+    def accept(self, kind: str, value: Any = None) -> bool:
+        token_kind, token_value = self.peek()
+        if token_kind == kind and (value is None or token_value == value):
+            self.position += 1
+            return True
+        return False
+
+    def expect(self, kind: str, value: Any) -> None:
+        if not self.accept(kind, value):
+            found = self.peek()[1]
+            raise StrategyRuleError(f"'{value}'이(가) 필요하지만 '{found if found is not None else '끝'}'이(가) 있습니다.")
+
+    def rule(self) -> Tuple[str, Any]:
+        kind, action = self.peek()
+        if kind != "keyword" or action not in ("buy", "sell"):
+            raise StrategyRuleError("규칙은 'buy when ...' 또는 'sell when ...' 형식이어야 합니다.")
+        self.position += 1
+        self.expect("keyword", "when")
+        condition = self.condition()
+        if self.position < len(self.tokens):
+            raise StrategyRuleError(f"규칙 끝에 해석할 수 없는 내용이 있습니다: '{self.peek()[1]}'")
+        return action, condition
+
+    def condition(self) -> Any:
+        node = self.and_expr()
+        while self.accept("keyword", "or"):
+            node = ("or", node, self.and_expr())
+        return node
+
+    def and_expr(self) -> Any:
+        node = self.not_expr()
+        while self.accept("keyword", "and"):
+            node = ("and", node, self.not_expr())
+        return node
+
+    def not_expr(self) -> Any:
+        if self.accept("keyword", "not"):
+            return ("not", self.not_expr())
+        return self.comparison()
+
+    def comparison(self) -> Any:
+        left = self.arith()
+        kind, value = self.peek()
+        if kind == "op" and value in COMPARISON_OPS:
+            self.position += 1
+            return ("cmp", value, left, self.arith())
+        if kind == "keyword" and value in CROSS_OPS:
+            self.position += 1
+            return ("cross", value, left, self.arith())
+        return left
+
+    def arith(self) -> Any:
+        node = self.term()
+        while True:
+            kind, value = self.peek()
+            if kind == "op" and value in ("+", "-"):
+                self.position += 1
+                node = ("arith", value, node, self.term())
+            else:
+                return node
+
+    def term(self) -> Any:
+        node = self.factor()
+        while True:
+            kind, value = self.peek()
+            if kind == "op" and value in ("*", "/"):
+                self.position += 1
+                node = ("arith", value, node, self.factor())
+            else:
+                return node
+
+    def factor(self) -> Any:
+        kind, value = self.peek()
+        if kind == "number":
+            self.position += 1
+            return ("num", value)
+        if self.accept("op", "-"):
+            return ("neg", self.factor())
+        if self.accept("op", "("):
+            node = self.condition()
+            self.expect("op", ")")
+            return node
+        if kind == "name":
+            self.position += 1
+            if not self.accept("op", "("):
+                return ("name", value)
+            args = []
+            if not self.accept("op", ")"):
+                args.append(self.condition())
+                while self.accept("op", ","):
+                    args.append(self.condition())
+                self.expect("op", ")")
+            return ("call", value, tuple(args))
+        raise StrategyRuleError(f"식이 필요하지만 '{value if value is not None else '끝'}'이(가) 있습니다.")
+
+
+@lru_cache(maxsize=256)
+def parse_rules(text: str) -> Tuple[Tuple[str, Any], ...]:
+    """규칙 문자열 파싱 -> ((action, 조건 구문 트리), ...) (같은 문자열은 한 번만 파싱)"""
+    if len(text) > MAX_RULES_LENGTH:
+        raise StrategyRuleError(f"규칙은 {MAX_RULES_LENGTH}자 이하여야 합니다.")
+    rules = []
+    for line in re.split(r"[;\n]", text):
+        try:
+            tokens = _tokenize(line)
+            if tokens:
+                rules.append(_Parser(tokens).rule())
+        except StrategyRuleError as e:
+            raise StrategyRuleError(f"{e} (규칙: {line.strip()})")
+    if not rules:
+        raise StrategyRuleError("규칙이 비어 있습니다.")
+    return tuple(rules)
+
+
+# ---------------------------------------------------------------------------
+# 컴파일 (구문 트리 -> 공유 노드 DAG)
+# ---------------------------------------------------------------------------
+
+class CompiledStrategy:
+    """
+    컴파일된 규칙
+    nodes는 위상 순서(자식이 항상 먼저)로 정렬된 (연산, 인자...) 튜플 목록이며,
+    같은 튜플은 한 번만 등록되므로 공통 부분식은 하나의 노드를 공유합니다.
+    buy/sell은 매수/매도 조건 노드 번호 (규칙이 없으면 None)
+    """
+
+    def __init__(self):
+        self.nodes: List[Tuple[Any, ...]] = []
+        self.kinds: List[str] = []  # 노드 값 종류: "num" 또는 "bool"
+        self._index: Dict[Tuple[Any, ...], int] = {}
+        self.buy: Optional[int] = None
+        self.sell: Optional[int] = None
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def _add(self, node: Tuple[Any, ...], kind: str) -> int:
+        if node not in self._index:
+            self._index[node] = len(self.nodes)
+            self.nodes.append(node)
+            self.kinds.append(kind)
+        return self._index[node]
+
+    def evaluate(self, indicators: IndicatorSet) -> Tuple[np.ndarray, np.ndarray]:
+        """모든 노드를 위상 순서대로 한 번씩 계산해 (매수 조건, 매도 조건) 불리언 배열 반환"""
+        values: List[Any] = [None] * len(self.nodes)
+        for i, node in enumerate(self.nodes):
+            values[i] = _evaluate_node(node, values, indicators)
+
+        shape = indicators.price("close").shape
+        masks = []
+        for node_id in (self.buy, self.sell):
+            if node_id is None:
+                masks.append(np.zeros(shape, dtype=bool))
+            else:
+                masks.append(np.broadcast_to(values[node_id], shape))
+        return masks[0], masks[1]
+
+
+class _Compiler:
+    """구문 트리를 CompiledStrategy 노드로 변환 (파라미터 치환, 상수 접기, 종류 검사)"""
+
+    def __init__(self, program: CompiledStrategy, parameters: Dict[str, Any]):
+        self.program = program
+        self.parameters = parameters
+
+    def constant(self, value: float) -> int:
+        return self.program._add(("const", float(value)), "num")
+
+    def constant_value(self, node_id: int) -> Optional[float]:
+        node = self.program.nodes[node_id]
+        return node[1] if node[0] == "const" else None
+
+    def numeric(self, tree: Any) -> int:
+        node_id = self.compile(tree)
+        if self.program.kinds[node_id] != "num":
+            raise StrategyRuleError("숫자 식이 필요한 위치에 조건식이 있습니다.")
+        return node_id
+
+    def boolean(self, tree: Any) -> int:
+        node_id = self.compile(tree)
+        if self.program.kinds[node_id] != "bool":
+            raise StrategyRuleError("조건식(비교, crosses_above 등)이 필요한 위치에 숫자 식이 있습니다.")
+        return node_id
+
+    def integer_argument(self, function: str, tree: Any) -> int:
+        value = self.constant_value(self.numeric(tree))
+        # 상수 접기로 만든 값도 inf/nan일 수 있으므로 정수 변환 전에 확인
+        if value is None or not math.isfinite(value) or value != int(value) or value < 1:
+            raise StrategyRuleError(f"{function}()의 기간은 1 이상의 정수 상수 또는 파라미터여야 합니다.")
+        return int(value)
+
+    def compile(self, tree: Any) -> int:
+        op = tree[0]
+        add = self.program._add
+
+        if op == "num":
+            return self.constant(tree[1])
+
+        if op == "name":
+            name = tree[1]
+            if name in PRICE_FIELDS:
+                return add(("field", name), "num")
+            if name in self.parameters:
+                try:
+                    value = float(self.parameters[name])
+                except (TypeError, ValueError):
+                    raise StrategyRuleError(f"파라미터 '{name}'의 값이 숫자가 아닙니다.")
+                if not math.isfinite(value):
+                    raise StrategyRuleError(f"파라미터 '{name}'의 값은 유한한 숫자여야 합니다.")
+                return self.constant(value)
+            raise StrategyRuleError(f"알 수 없는 이름입니다: '{name}'")
+
+        if op == "neg":
+            operand = self.numeric(tree[1])
+            value = self.constant_value(operand)
+            return self.constant(-value) if value is not None else add(("neg", operand), "num")
+
+        if op == "arith":
+            left, right = self.numeric(tree[2]), self.numeric(tree[3])
+            left_value, right_value = self.constant_value(left), self.constant_value(right)
+            if left_value is not None and right_value is not None and not (tree[1] == "/" and right_value == 0):
+                return self.constant(_ARITHMETIC[tree[1]](left_value, right_value))
+            return add(("arith", tree[1], left, right), "num")
+
+        if op in ("cmp", "cross"):
+            return add((op, tree[1], self.numeric(tree[2]), self.numeric(tree[3])), "bool")
+
+        if op in ("and", "or"):
+            left, right = self.boolean(tree[1]), self.boolean(tree[2])
+            # 교환 법칙으로 피연산자 순서를 고정해 "a and b"와 "b and a"를 같은 노드로 합침
+            return add((op,) + tuple(sorted((left, right))), "bool")
+
+        if op == "not":
+            return add(("not", self.boolean(tree[1])), "bool")
+
+        if op == "call":
+            return self.call(tree[1], tree[2])
+
+        raise StrategyRuleError(f"해석할 수 없는 식입니다: {op}")
+
+    def call(self, function: str, args: Tuple[Any, ...]) -> int:
+        add = self.program._add
+
+        if function in INDICATOR_FUNCTIONS:
+            defaults, accepts_field = INDICATOR_FUNCTIONS[function]
+            source = "close"
+            if accepts_field and len(args) == len(defaults) + 1:
+                field = args[-1]
+                if field[0] != "name" or field[1] not in PRICE_FIELDS:
+                    raise StrategyRuleError(f"{function}()의 마지막 인자는 가격 필드여야 합니다.")
+                source = field[1]
+                args = args[:-1]
+            if len(args) > len(defaults):
+                raise StrategyRuleError(f"{function}()의 인자가 너무 많습니다.")
+            values = []
+            for i, default in enumerate(defaults):
+                if i < len(args):
+                    if function.startswith("bb_") and i == 1:
+                        num_std = self.constant_value(self.numeric(args[i]))
+                        if num_std is None or num_std <= 0:
+                            raise StrategyRuleError(f"{function}()의 표준편차 배수는 0보다 큰 상수여야 합니다.")
+                        values.append(num_std)
+                    else:
+                        values.append(self.integer_argument(function, args[i]))
+                elif default is None:
+                    raise StrategyRuleError(f"{function}()에는 기간 인자가 필요합니다.")
+                else:
+                    values.append(default)
+            if function.startswith("macd") and values[0] >= values[1]:
+                raise StrategyRuleError(f"{function}()의 fast 기간은 slow 기간보다 작아야 합니다.")
+            return add(("indicator", function, tuple(values), source), "num")
+
+        if function == "prev":
+            if not 1 <= len(args) <= 2:
+                raise StrategyRuleError("prev()는 prev(식[, n]) 형식입니다.")
+            shift = self.integer_argument("prev", args[1]) if len(args) == 2 else 1
+            operand = self.compile(args[0])
+            return add(("prev", operand, shift), self.program.kinds[operand])
+
+        if function == "abs":
+            if len(args) != 1:
+                raise StrategyRuleError("abs()의 인자는 하나입니다.")
+            return add(("abs", self.numeric(args[0])), "num")
+
+        if function in ("min", "max"):
+            if len(args) != 2:
+                raise StrategyRuleError(f"{function}()의 인자는 두 개입니다.")
+            left, right = self.numeric(args[0]), self.numeric(args[1])
+            return add((function,) + tuple(sorted((left, right))), "num")
+
+        raise StrategyRuleError(f"알 수 없는 함수입니다: '{function}'")
+
+
+_ARITHMETIC = {
+    "+": lambda a, b: a + b,
+    "-": lambda a, b: a - b,
+    "*": lambda a, b: a * b,
+    "/": lambda a, b: a / b,
+}
+
+_COMPARISON = {
+    "<": np.less,
+    "<=": np.less_equal,
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "==": np.equal,
+    "!=": np.not_equal,
+}
+
+
+def compile_rules(text: str, parameters: Optional[Dict[str, Any]] = None) -> CompiledStrategy:
+    """
+    규칙 문자열을 DAG로 컴파일
+    parameters는 규칙에 쓰인 파라미터 이름의 값이며, 값이 모두 상수로 치환되므로
+    파라미터 스윕의 조합마다 지표 기간이 다른 DAG가 만들어집니다.
+    """
+    if not isinstance(text, str):
+        raise StrategyRuleError("규칙(rules)은 문자열이어야 합니다.")
+    program = CompiledStrategy()
+    compiler = _Compiler(program, parameters or {})
+    conditions: Dict[str, List[int]] = {"buy": [], "sell": []}
+    for action, tree in parse_rules(text):
+        conditions[action].append(compiler.boolean(tree))
+    if not conditions["buy"]:
+        raise StrategyRuleError("매수(buy) 규칙이 하나 이상 필요합니다.")
+
+    # 같은 행동의 규칙이 여러 개면 OR로 합침
+    for action, node_ids in conditions.items():
+        node_id = None
+        for condition in node_ids:
+            node_id = condition if node_id is None else program._add(
+                ("or",) + tuple(sorted((node_id, condition))), "bool"
+            )
+        setattr(program, action, node_id)
+    return program
+
+
+# ---------------------------------------------------------------------------
+# 평가
+# ---------------------------------------------------------------------------
+
+def _shift(values: np.ndarray, periods: int) -> np.ndarray:
+    """시간 축(0번 축)으로 periods봉 뒤로 민 배열 (앞 구간은 NaN / False)"""
+    shifted = np.empty(values.shape, dtype=values.dtype)
+    fill = False if values.dtype == bool else np.nan
+    periods = min(periods, len(values))
+    shifted[:periods] = fill
+    shifted[periods:] = values[: len(values) - periods]
+    return shifted
+
+
+def _indicator(indicators: IndicatorSet, function: str, args: Tuple[Any, ...], source: str) -> np.ndarray:
+    if function == "sma":
+        return indicators.sma(args[0], source=source)
+    if function == "ema":
+        return indicators.ema(args[0], source=source)
+    if function == "rsi":
+        return indicators.rsi(args[0], source=source)
+    if function.startswith("macd"):
+        line, signal, histogram = indicators.macd(*args)
+        return {"macd": line, "macd_signal": signal, "macd_hist": histogram}[function]
+    if function.startswith("bb_"):
+        middle, upper, lower = indicators.bollinger_bands(args[0], args[1])
+        return {"bb_upper": upper, "bb_middle": middle, "bb_lower": lower}[function]
+    return indicators.atr(args[0])
+
+
+def _evaluate_node(node: Tuple[Any, ...], values: List[Any], indicators: IndicatorSet) -> Any:
+    op = node[0]
+    if op == "const":
+        return node[1]
+    if op == "field":
+        return indicators.price(node[1])
+    if op == "indicator":
+        return _indicator(indicators, node[1], node[2], node[3])
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if op == "neg":
+            return -values[node[1]]
+        if op == "arith":
+            return _ARITHMETIC[node[1]](values[node[2]], values[node[3]])
+        if op == "abs":
+            return np.abs(values[node[1]])
+        if op in ("min", "max"):
+            # NaN은 비교 결과를 거짓으로 만들도록 그대로 전파
+            function = np.minimum if op == "min" else np.maximum
+            return function(values[node[1]], values[node[2]])
+        if op == "cmp":
+            return _COMPARISON[node[1]](values[node[2]], values[node[3]])
+
+    if op == "cross":
+        shape = indicators.price("close").shape
+        left = np.broadcast_to(values[node[2]], shape)
+        right = np.broadcast_to(values[node[3]], shape)
+        crossed = np.zeros(shape, dtype=bool)
+        # 기존 교차 전략과 같은 판정: 직전 봉에서는 반대편(또는 같음), 현재 봉에서는 넘어선 상태
+        if node[1] == "crosses_above":
+            crossed[1:] = (left[1:] > right[1:]) & (left[:-1] <= right[:-1])
+        else:
+            crossed[1:] = (left[1:] < right[1:]) & (left[:-1] >= right[:-1])
+        return crossed
+    if op == "and":
+        return values[node[1]] & values[node[2]]
+    if op == "or":
+        return values[node[1]] | values[node[2]]
+    if op == "not":
+        return ~values[node[1]]
+    if op == "prev":
+        shape = indicators.price("close").shape
+        operand = values[node[1]]
+        if np.ndim(operand) == 0:
+            return operand
+        return _shift(np.broadcast_to(operand, shape), node[2])
+    raise StrategyRuleError(f"평가할 수 없는 노드입니다: {op}")
@@ -0,0 +1,214 @@
+"""
+파라미터 스윕 서비스
+하나의 전략에 대해 파라미터 조합 전체를 프로세스 풀에서 병렬로 백테스트하고
+성과 지표 순으로 정렬한 결과표를 만듭니다.
+"""
+import asyncio
+import itertools
+import math
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Dict, Any
+
+from app.services.backtest import BacktestEngine
+from app.services.candles import Candles
+from app.services.workers import (
+    CandleHandle,
+    SharedCandles,
+    attach_candles,
+    get_process_pool,
+    reset_process_pool,
+    worker_count,
+)
+
+MAX_SWEEP_COMBINATIONS = 5000
+
+METRIC_KEYS = (
+    "totalReturn",
+    "totalProfit",
+    "dailyAverageReturn",
+    "cagr",
+    "totalTrades",
+    "winRate",
+    "maxDrawdown",
+    "sharpeRatio",
+    "sortinoRatio",
+    "calmarRatio",
+    "exposureTime",
+)
+
+# 값이 작을수록 좋은 지표
+ASCENDING_METRICS = {"maxDrawdown"}
+
+
+def _is_number(value: Any) -> bool:
+    """유한한 실수 여부 (bool 제외)"""
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def _expand_values(name: str, spec: Any) -> List[Any]:
+    """
+    단일 파라미터 범위 확장
+    - 리스트: 그대로 사용 (예: [5, 10, 20], 원소는 숫자)
+    - dict: {"start", "stop", "step"} 범위 (stop 포함, 값은 숫자)
+    - 그 외: 고정값
+    """
+    if isinstance(spec, list):
+        if not spec:
+            raise ValueError(f"파라미터 '{name}'의 값 목록이 비어 있습니다.")
+        if not all(_is_number(value) for value in spec):
+            raise ValueError(f"파라미터 '{name}'의 값 목록에는 숫자만 쓸 수 있습니다.")
+        return spec
+    if isinstance(spec, dict):
+        try:
+            start = spec["start"]
+            stop = spec["stop"]
+        except KeyError:
+            raise ValueError(f"파라미터 '{name}' 범위에는 start와 stop이 필요합니다.")
+        step = spec.get("step", 1)
+        if not (_is_number(start) and _is_number(stop) and _is_number(step)):
+            raise ValueError(f"파라미터 '{name}' 범위의 start, stop, step은 숫자여야 합니다.")
+        if step <= 0:
+            raise ValueError(f"파라미터 '{name}'의 step은 0보다 커야 합니다.")
+        values = []
+        count = 0
+        while start + step * count <= stop + 1e-9:
+            value = start + step * count
+            values.append(round(value, 10) if isinstance(value, float) else value)
+            count += 1
+            if count > MAX_SWEEP_COMBINATIONS:
+                break
+        if not values:
+            raise ValueError(f"파라미터 '{name}' 범위에 해당하는 값이 없습니다.")
+        return values
+    return [spec]
+
+
+def _is_valid_combination(strategy_type: str, parameters: Dict[str, Any]) -> bool:
+    """의미 없는 조합 제외 (단기 >= 장기 기간, 과매도 >= 과매수 등)"""
+    if strategy_type in ("moving_average", "ema"):
+        short = parameters.get("shortPeriod")
+        long = parameters.get("longPeriod")
+        if short is not None and long is not None and short >= long:
+            return False
+    elif strategy_type == "macd":
+        fast = parameters.get("fastPeriod")
+        slow = parameters.get("slowPeriod")
+        if fast is not None and slow is not None and fast >= slow:
+            return False
+    elif strategy_type == "rsi":
+        oversold = parameters.get("rsiOversold")
+        overbought = parameters.get("rsiOverbought")
+        if oversold is not None and overbought is not None and oversold >= overbought:
+            return False
+    return True
+
+
+def expand_grid(strategy_type: str, parameter_ranges: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """파라미터 범위를 조합 리스트로 확장"""
+    names = list(parameter_ranges.keys())
+    value_lists = [_expand_values(name, parameter_ranges[name]) for name in names]
+
+    total = 1
+    for values in value_lists:
+        total *= len(values)
+    if total > MAX_SWEEP_COMBINATIONS:
+        raise ValueError(
+            f"파라미터 조합이 너무 많습니다 ({total}개). 최대 {MAX_SWEEP_COMBINATIONS}개까지 가능합니다."
+        )
+
+    combinations = []
+    for values in itertools.product(*value_lists):
+        parameters = dict(zip(names, values))
+        if _is_valid_combination(strategy_type, parameters):
+            combinations.append(parameters)
+    return combinations
+
+
+def evaluate_combinations(
+    candles: Candles,
+    strategy_type: str,
+    combinations: List[Dict[str, Any]],
+    initial_capital: float,
+    commission: float,
+) -> List[Dict[str, float]]:
+    """파라미터 조합들을 순서대로 백테스트하여 지표 리스트 반환"""
+    engine = BacktestEngine(initial_capital=initial_capital, commission=commission, use_signal_cache=False)
+    return [
+        engine.evaluate(candles, strategy_type, parameters, initial_capital)
+        for parameters in combinations
+    ]
+
+
+def _evaluate_chunk(
+    handle: CandleHandle,
+    strategy_type: str,
+    combinations: List[Dict[str, Any]],
+    initial_capital: float,
+    commission: float,
+) -> List[Dict[str, float]]:
+    """워커 프로세스 작업: 공유 캔들에 연결해 조합 묶음을 평가"""
+    candles = attach_candles(handle)
+    return evaluate_combinations(candles, strategy_type, combinations, initial_capital, commission)
+
+
+def _chunked(items: List[Any], chunk_count: int) -> List[List[Any]]:
+    """리스트를 chunk_count개 내외의 연속 구간으로 분할"""
+    size = max(1, -(-len(items) // chunk_count))
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+def rank_results(
+    combinations: List[Dict[str, Any]],
+    metrics: List[Dict[str, float]],
+    sort_by: str = "totalReturn",
+    top: int = 50,
+) -> List[Dict[str, Any]]:
+    """조합별 지표를 sort_by 기준으로 정렬해 상위 top개를 순위표로 반환"""
+    if sort_by not in METRIC_KEYS:
+        raise ValueError(f"지원하지 않는 정렬 기준입니다: {sort_by}")
+
+    rows = [
+        {"parameters": parameters, **metric}
+        for parameters, metric in zip(combinations, metrics)
+    ]
+    rows.sort(key=lambda row: row[sort_by], reverse=sort_by not in ASCENDING_METRICS)
+    ranked = rows[:top] if top and top > 0 else rows
+    for rank, row in enumerate(ranked, start=1):
+        row["rank"] = rank
+    return ranked
+
+
+async def run_sweep(
+    candles: Candles,
+    strategy_type: str,
+    combinations: List[Dict[str, Any]],
+    initial_capital: float,
+    commission: float = 0.001,
+) -> List[Dict[str, float]]:
+    """
+    파라미터 조합 전체를 프로세스 풀에서 병렬 평가
+    캔들은 공유 메모리에 한 번만 올리고, 조합은 워커 수의 4배 정도로 나눠 부하를 고르게 분산합니다.
+    """
+    if not combinations:
+        return []
+
+    pool = get_process_pool()
+    chunks = _chunked(combinations, worker_count() * 4)
+    with SharedCandles(candles) as handle:
+        futures = [
+            asyncio.wrap_future(
+                pool.submit(_evaluate_chunk, handle, strategy_type, chunk, initial_capital, commission)
+            )
+            for chunk in chunks
+        ]
+        try:
+            results = await asyncio.gather(*futures)
+        except BrokenProcessPool:
+            reset_process_pool()
+            raise
+        finally:
+            # 하나라도 실패하면 대기 중인 나머지 묶음은 취소
+            for future in futures:
+                future.cancel()
+
+    return [metric for chunk_result in results for metric in chunk_result]
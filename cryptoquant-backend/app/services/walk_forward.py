@@ -0,0 +1,190 @@
+"""
+워크 포워드 최적화 서비스
+기간을 롤링 in-sample / out-of-sample 구간으로 나누어, 각 in-sample 구간에서 최적화한 파라미터를
+바로 다음 out-of-sample 구간에 적용하고 out-of-sample 자산 곡선을 하나로 이어 붙입니다.
+"""
+import asyncio
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Dict, Any, Tuple
+
+import numpy as np
+
+from app.services.backtest import BacktestEngine
+from app.services.candles import Candles, Curve
+from app.services.sweep import evaluate_combinations, rank_results
+from app.services.workers import (
+    CandleHandle,
+    SharedCandles,
+    attach_candles,
+    get_process_pool,
+    reset_process_pool,
+)
+
+MAX_WALK_FORWARD_WINDOWS = 200
+
+
+def build_windows(
+    total_bars: int,
+    in_sample_bars: int,
+    out_of_sample_bars: int,
+    step_bars: int = 0,
+) -> List[Tuple[int, int, int]]:
+    """
+    (in-sample 시작, out-of-sample 시작, out-of-sample 끝) 인덱스 목록
+    step_bars가 0이면 out_of_sample_bars만큼 이동하여 out-of-sample 구간이 겹치지 않게 합니다.
+    마지막 out-of-sample 구간은 남은 캔들 수만큼 짧아질 수 있습니다.
+    """
+    if in_sample_bars <= 0 or out_of_sample_bars <= 0:
+        raise ValueError("in-sample / out-of-sample 캔들 수는 0보다 커야 합니다.")
+    step = step_bars if step_bars > 0 else out_of_sample_bars
+    if step < out_of_sample_bars:
+        raise ValueError("step은 out-of-sample 캔들 수보다 작을 수 없습니다 (구간 중복).")
+
+    windows = []
+    start = 0
+    while start + in_sample_bars < total_bars:
+        oos_start = start + in_sample_bars
+        oos_end = min(oos_start + out_of_sample_bars, total_bars)
+        windows.append((start, oos_start, oos_end))
+        start += step
+
+    if not windows:
+        raise ValueError(
+            f"캔들 수({total_bars})가 in-sample 구간({in_sample_bars})보다 적어 구간을 만들 수 없습니다."
+        )
+    if len(windows) > MAX_WALK_FORWARD_WINDOWS:
+        raise ValueError(
+            f"구간이 너무 많습니다 ({len(windows)}개). 최대 {MAX_WALK_FORWARD_WINDOWS}개까지 가능합니다."
+        )
+    return windows
+
+
+def _run_window(
+    handle: CandleHandle,
+    window: Tuple[int, int, int],
+    strategy_type: str,
+    combinations: List[Dict[str, Any]],
+    objective: str,
+    initial_capital: float,
+    commission: float,
+) -> Dict[str, Any]:
+    """
+    워커 프로세스 작업: 한 구간의 최적화 + out-of-sample 평가
+    out-of-sample 구간은 in-sample 캔들로 지표를 예열한 뒤 무포지션 상태에서 거래를 시작합니다.
+    """
+    candles = attach_candles(handle)
+    is_start, oos_start, oos_end = window
+
+    in_sample = candles[is_start:oos_start]
+    metrics = evaluate_combinations(in_sample, strategy_type, combinations, initial_capital, commission)
+    best = rank_results(combinations, metrics, objective, top=1)[0]
+
+    engine = BacktestEngine(initial_capital=initial_capital, commission=commission, use_signal_cache=False)
+    oos_metrics = engine.evaluate(
+        candles[is_start:oos_end],
+        strategy_type,
+        best["parameters"],
+        initial_capital,
+        warmup=oos_start - is_start,
+    )
+    return {
+        "parameters": best["parameters"],
+        "inSample": {key: value for key, value in best.items() if key not in ("parameters", "rank")},
+        "outOfSample": oos_metrics,
+        "equity": engine.equity_curve.value,
+        "trades": engine.trades,
+        "tradeSignals": engine.trade_signals,
+    }
+
+
+def stitch_windows(
+    candles: Candles,
+    windows: List[Tuple[int, int, int]],
+    window_results: List[Dict[str, Any]],
+    initial_capital: float,
+    commission: float,
+) -> Dict[str, Any]:
+    """
+    구간별 out-of-sample 결과를 자본을 이어서 하나의 백테스트 결과로 합침
+    각 구간은 initial_capital로 독립 실행되므로, 직전 구간의 종료 자산 비율만큼 곡선/수량을 조정합니다.
+    """
+    scale = 1.0
+    values = []
+    trades = []
+    trade_signals = []
+    for result in window_results:
+        values.append(result["equity"] * scale)
+        for trade in result["trades"]:
+            trades.append({**trade, "quantity": trade["quantity"] * scale})
+        trade_signals.extend(result["tradeSignals"])
+        if len(result["equity"]):
+            scale *= result["equity"][-1] / initial_capital
+
+    # step이 out-of-sample 길이보다 크면 구간 사이가 비므로 out-of-sample 캔들만 이어 붙임
+    span = Candles.concat([candles[oos_start:oos_end] for _, oos_start, oos_end in windows])
+    engine = BacktestEngine(initial_capital=initial_capital, commission=commission, use_signal_cache=False)
+    engine.equity_curve = Curve(span.time, np.concatenate(values))
+    engine.trades = trades
+    engine.trade_signals = trade_signals
+    return engine.report(span)
+
+
+async def run_walk_forward(
+    candles: Candles,
+    strategy_type: str,
+    combinations: List[Dict[str, Any]],
+    in_sample_bars: int,
+    out_of_sample_bars: int,
+    step_bars: int = 0,
+    objective: str = "totalReturn",
+    initial_capital: float = 10000000.0,
+    commission: float = 0.001,
+) -> Dict[str, Any]:
+    """
+    워크 포워드 최적화 실행
+    구간들은 서로 독립이므로 프로세스 풀에서 병렬로 처리하며, 캔들은 공유 메모리 한 벌만 사용합니다.
+    """
+    if not combinations:
+        raise ValueError("평가할 파라미터 조합이 없습니다.")
+    windows = build_windows(len(candles), in_sample_bars, out_of_sample_bars, step_bars)
+
+    pool = get_process_pool()
+    with SharedCandles(candles) as handle:
+        futures = [
+            asyncio.wrap_future(
+                pool.submit(
+                    _run_window,
+                    handle,
+                    window,
+                    strategy_type,
+                    combinations,
+                    objective,
+                    initial_capital,
+                    commission,
+                )
+            )
+            for window in windows
+        ]
+        try:
+            window_results = await asyncio.gather(*futures)
+        except BrokenProcessPool:
+            reset_process_pool()
+            raise
+        finally:
+            for future in futures:
+                future.cancel()
+
+    result = stitch_windows(candles, windows, window_results, initial_capital, commission)
+    result["windows"] = [
+        {
+            "inSampleStart": int(candles.time[is_start]),
+            "inSampleEnd": int(candles.time[oos_start - 1]),
+            "outOfSampleStart": int(candles.time[oos_start]),
+            "outOfSampleEnd": int(candles.time[oos_end - 1]),
+            "parameters": window_result["parameters"],
+            "inSample": window_result["inSample"],
+            "outOfSample": window_result["outOfSample"],
+        }
+        for (is_start, oos_start, oos_end), window_result in zip(windows, window_results)
+    ]
+    return result
@@ -6,6 +6,7 @@ import httpx
 from typing import List, Dict, Any, Optional
 from dotenv import load_dotenv
 import os
+from app.services.http_clients import get_http_client
 
 load_dotenv()
 
@@ -37,33 +38,33 @@ async def search_web(
         return []
     
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                GOOGLE_SEARCH_BASE_URL,
-                params={
-                    "key": GOOGLE_SEARCH_API_KEY,
-                    "cx": GOOGLE_SEARCH_ENGINE_ID,
-                    "q": query,
-                    "num": min(num_results, 10),  # 최대 10개
-                    "lr": f"lang_{lang}",  # 언어 설정
-                },
-                timeout=10.0,
-            )
-            response.raise_for_status()
-            data = response.json()
-            
-            results = []
-            items = data.get("items", [])
-            
-            for item in items[:num_results]:
-                results.append({
-                    "title": item.get("title", ""),
-                    "snippet": item.get("snippet", ""),
-                    "link": item.get("link", ""),
-                    "displayLink": item.get("displayLink", ""),
-                })
-            
-            return results
+        client = get_http_client("google_search")
+        response = await client.get(
+            GOOGLE_SEARCH_BASE_URL,
+            params={
+                "key": GOOGLE_SEARCH_API_KEY,
+                "cx": GOOGLE_SEARCH_ENGINE_ID,
+                "q": query,
+                "num": min(num_results, 10),  # 최대 10개
+                "lr": f"lang_{lang}",  # 언어 설정
+            },
+            timeout=10.0,
+        )
+        response.raise_for_status()
+        data = response.json()
+        
+        results = []
+        items = data.get("items", [])
+        
+        for item in items[:num_results]:
+            results.append({
+                "title": item.get("title", ""),
+                "snippet": item.get("snippet", ""),
+                "link": item.get("link", ""),
+                "displayLink": item.get("displayLink", ""),
+            })
+        
+        return results
     except httpx.HTTPStatusError as e:
         # API 오류 시 빈 리스트 반환 (서비스 중단 방지)
         print(f"Google Search API 오류: {e.response.status_code}")
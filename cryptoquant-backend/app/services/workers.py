@@ -0,0 +1,256 @@
+"""
+프로세스 풀 서비스
+파라미터 스윕처럼 CPU를 많이 쓰는 작업을 여러 코어에서 실행하기 위한 공용 프로세스 풀과,
+캔들 배열을 작업마다 pickle하지 않고 워커 프로세스와 공유하기 위한 공유 메모리 유틸리티입니다.
+메모리 맵 캔들 파일(candle_files)에서 읽은 캔들은 공유 메모리로 복사하지 않고 같은 파일을 매핑하게 합니다.
+단건 백테스트는 스윕 등에 밀리지 않도록 작업별 CPU 시간/메모리 제한이 걸린 전용 풀에서 실행합니다.
+"""
+import os
+import multiprocessing
+import signal
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+from typing import Dict, Iterator, Optional, Tuple, Union
+
+import numpy as np
+
+from app.services.candle_files import FileHandle, attach_file_candles, file_handle
+from app.services.candles import Candles, CANDLE_FIELDS
+
+try:
+    import resource
+except ImportError:  # Windows: 작업별 리소스 제한 없이 실행
+    resource = None
+
+# 워커에 넘기는 캔들 핸들: ("shm", 공유 메모리 블록 이름, 캔들 수) 또는 메모리 맵 캔들 파일 핸들
+CandleHandle = Union[Tuple[str, str, int], FileHandle]
+
+_pool: Optional[ProcessPoolExecutor] = None
+_backtest_pool: Optional[ProcessPoolExecutor] = None
+
+# 워커 프로세스 측 공유 메모리 연결 캐시 {블록 이름: (SharedMemory, Candles)}
+_attached: Dict[str, Tuple[shared_memory.SharedMemory, Candles]] = {}
+_MAX_ATTACHED = 4
+
+
+def worker_count() -> int:
+    """프로세스 풀 워커 수 (BACKTEST_WORKERS 환경 변수, 기본값 CPU 코어 수)"""
+    return max(1, int(os.getenv("BACKTEST_WORKERS", os.cpu_count() or 1)))
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """
+    공용 프로세스 풀 조회 (최초 호출 시 생성)
+    워커는 spawn 방식으로 띄워 이벤트 루프/DB 연결 등 부모 프로세스 상태를 물려받지 않습니다.
+    """
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=worker_count(),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+def reset_process_pool() -> None:
+    """워커가 비정상 종료되어 풀이 깨졌을 때 다음 호출에서 새로 만들도록 폐기"""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def shutdown_process_pool() -> None:
+    """애플리케이션 종료 시 프로세스 풀 정리 (단건 백테스트 전용 풀 포함)"""
+    global _pool, _backtest_pool
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+    if _backtest_pool is not None:
+        _backtest_pool.shutdown(wait=True, cancel_futures=True)
+        _backtest_pool = None
+
+
+def backtest_worker_count() -> int:
+    """
+    단건 백테스트 전용 풀 워커 수 (BACKTEST_POOL_WORKERS 환경 변수)
+    기본값은 이벤트 루프가 쓸 코어 하나를 남긴 CPU 코어 수입니다.
+    """
+    default = max(1, (os.cpu_count() or 1) - 1)
+    return max(1, int(os.getenv("BACKTEST_POOL_WORKERS", default)))
+
+
+def get_backtest_pool() -> ProcessPoolExecutor:
+    """단건 백테스트 전용 프로세스 풀 조회 (최초 호출 시 생성, spawn 방식)"""
+    global _backtest_pool
+    if _backtest_pool is None:
+        _backtest_pool = ProcessPoolExecutor(
+            max_workers=backtest_worker_count(),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _backtest_pool
+
+
+def reset_backtest_pool() -> None:
+    """워커가 비정상 종료되어 전용 풀이 깨졌을 때 다음 호출에서 새로 만들도록 폐기"""
+    global _backtest_pool
+    if _backtest_pool is not None:
+        _backtest_pool.shutdown(wait=False, cancel_futures=True)
+        _backtest_pool = None
+
+
+class TaskResourceError(Exception):
+    """작업이 CPU 시간 또는 메모리 제한을 넘어 중단됨"""
+
+
+def task_cpu_limit() -> int:
+    """작업당 CPU 시간 제한 (초, BACKTEST_TASK_CPU_SECONDS 환경 변수, 0이면 제한 없음)"""
+    return max(0, int(os.getenv("BACKTEST_TASK_CPU_SECONDS", "120")))
+
+
+def task_memory_limit() -> int:
+    """작업당 추가 메모리 제한 (MB, BACKTEST_TASK_MEMORY_MB 환경 변수, 0이면 제한 없음)"""
+    return max(0, int(os.getenv("BACKTEST_TASK_MEMORY_MB", "2048")))
+
+
+# 워커 프로세스 측 상태: 실행 중인 작업의 CPU 제한(초), 메모리 제한 적용 여부
+_task_cpu_seconds = 0
+_memory_limited = False
+
+
+def _on_cpu_exceeded(signum, frame) -> None:
+    if _task_cpu_seconds:
+        raise TaskResourceError(f"작업이 CPU 시간 제한({_task_cpu_seconds}초)을 초과했습니다.")
+
+
+def _cpu_used() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _address_space() -> Optional[int]:
+    """현재 프로세스의 가상 메모리 크기 (바이트, /proc가 없으면 None)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+@contextmanager
+def task_limits(cpu_seconds: int, memory_mb: int) -> Iterator[None]:
+    """
+    워커 프로세스에서 작업 한 건에 리소스 제한 적용
+    - CPU: 지금까지 사용한 CPU 시간 + cpu_seconds를 RLIMIT_CPU soft 한도로 두고, SIGXCPU를 받으면
+      TaskResourceError로 작업만 중단합니다 (작업이 끝나면 한도 해제).
+    - 메모리: 워커의 첫 작업 시점 가상 메모리 + memory_mb를 RLIMIT_AS로 고정하며, 할당 실패(MemoryError)는
+      TaskResourceError로 바꿉니다. 워커는 한 번에 작업 하나만 실행하므로 프로세스 한도가 곧 작업 한도입니다.
+    resource 모듈이 없는 플랫폼에서는 제한 없이 실행합니다.
+    """
+    global _task_cpu_seconds, _memory_limited
+    if resource is None:
+        yield
+        return
+
+    if memory_mb and not _memory_limited:
+        baseline = _address_space()
+        if baseline is not None:
+            _, hard = resource.getrlimit(resource.RLIMIT_AS)
+            limit = baseline + memory_mb * 1024 * 1024
+            if hard != resource.RLIM_INFINITY:
+                limit = min(limit, hard)
+            resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+        _memory_limited = True
+
+    _, cpu_hard = resource.getrlimit(resource.RLIMIT_CPU)
+    if cpu_seconds:
+        signal.signal(signal.SIGXCPU, _on_cpu_exceeded)
+        soft = int(_cpu_used()) + cpu_seconds + 1
+        if cpu_hard != resource.RLIM_INFINITY:
+            soft = min(soft, cpu_hard)
+        _task_cpu_seconds = cpu_seconds
+        resource.setrlimit(resource.RLIMIT_CPU, (soft, cpu_hard))
+    try:
+        yield
+    except MemoryError:
+        raise TaskResourceError(f"작업이 메모리 제한({memory_mb}MB)을 초과했습니다.") from None
+    finally:
+        if cpu_seconds:
+            _task_cpu_seconds = 0
+            resource.setrlimit(resource.RLIMIT_CPU, (cpu_hard, cpu_hard))
+
+
+class SharedCandles:
+    """
+    캔들 배열을 공유 메모리 한 블록에 올려 워커들이 복사 없이 읽도록 하는 컨텍스트 매니저
+    작업에는 handle(블록 이름, 캔들 수)만 넘기므로 작업마다 배열을 pickle하지 않습니다.
+
+    사용 예:
+        with SharedCandles(candles) as handle:
+            pool.submit(task, handle, ...)
+    """
+
+    def __init__(self, candles: Candles):
+        self._shm = None
+        # 메모리 맵 캔들 파일의 구간이면 공유 메모리로 복사하지 않고 파일 핸들을 그대로 넘김
+        self.handle = file_handle(candles)
+        if self.handle is not None:
+            return
+        n = len(candles)
+        self._shm = shared_memory.SharedMemory(
+            create=True, size=max(1, n * 8 * len(CANDLE_FIELDS))
+        )
+        for column, field in enumerate(CANDLE_FIELDS):
+            source = getattr(candles, field)
+            target = np.ndarray((n,), dtype=source.dtype, buffer=self._shm.buf, offset=column * n * 8)
+            target[:] = source
+            del target
+        self.handle = ("shm", self._shm.name, n)
+
+    def close(self) -> None:
+        """공유 메모리 해제 (이미 연결한 워커는 자신의 매핑이 닫힐 때까지 계속 읽을 수 있음)"""
+        if self._shm is None:
+            return
+        self._shm.close()
+        self._shm.unlink()
+
+    def __enter__(self) -> CandleHandle:
+        return self.handle
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+def attach_candles(handle: CandleHandle) -> Candles:
+    """
+    워커 프로세스에서 공유 캔들 연결
+    같은 블록은 프로세스당 한 번만 연결하고 이후 작업에서는 캐시된 읽기 전용 뷰를 재사용합니다.
+    ("file", ...) 핸들은 메모리 맵 캔들 파일을 읽기 전용으로 매핑합니다.
+    """
+    if handle[0] == "file":
+        return attach_file_candles(handle)
+    _, name, n = handle
+    cached = _attached.get(name)
+    if cached is not None:
+        return cached[1]
+
+    # 오래된 연결 정리 (부모가 이미 unlink한 블록)
+    while len(_attached) >= _MAX_ATTACHED:
+        old_shm, _ = _attached.pop(next(iter(_attached)))
+        try:
+            old_shm.close()
+        except BufferError:
+            # 아직 배열 뷰를 참조하는 곳이 있으면 GC 시점에 해제됨
+            pass
+
+    shm = shared_memory.SharedMemory(name=name)
+    columns = []
+    for column, field in enumerate(CANDLE_FIELDS):
+        dtype = np.int64 if field == "time" else np.float64
+        array = np.ndarray((n,), dtype=dtype, buffer=shm.buf, offset=column * n * 8)
+        array.flags.writeable = False
+        columns.append(array)
+    candles = Candles(*columns)
+    _attached[name] = (shm, candles)
+    return candles
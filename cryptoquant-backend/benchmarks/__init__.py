@@ -0,0 +1,5 @@
+"""
+오프라인 성능 벤치마크
+합성 캔들 생성기(synthetic)와 백테스트 엔진 처리량 측정(backtest_bench)으로 구성되며,
+네트워크나 데이터베이스 없이 실행됩니다.
+"""
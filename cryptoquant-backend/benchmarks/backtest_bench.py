@@ -0,0 +1,231 @@
+"""
+백테스트 엔진 처리량 벤치마크
+합성 캔들(1천 / 10만 / 100만 개)로 모든 전략 타입을 실행해 초당 캔들 수, 최대 메모리,
+신호 생성 / 성과 분석 단계 시간을 측정하고 JSON으로 저장합니다.
+저장한 JSON을 --compare로 지정하면 커밋 간 성능 변화를 비교합니다.
+
+실행 (cryptoquant-backend 디렉터리에서):
+    python -m benchmarks.backtest_bench
+    python -m benchmarks.backtest_bench --sizes 1000,100000 --repeat 1
+    python -m benchmarks.backtest_bench --compare benchmarks/results/<이전 커밋>.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.services import signal_cache
+from app.services.backtest import BacktestEngine
+from app.services.result_cache import ResultCache
+from benchmarks.synthetic import generate_candles
+
+DEFAULT_SIZES = (1_000, 100_000, 1_000_000)
+DEFAULT_SEED = 42
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+# BacktestEngine._generate_signals가 지원하는 전략 타입별 벤치마크 파라미터
+STRATEGIES: Dict[str, Dict[str, Any]] = {
+    "moving_average": {"shortPeriod": 5, "longPeriod": 20},
+    "rsi": {"rsiPeriod": 14, "rsiOverbought": 70, "rsiOversold": 30},
+    "macd": {"fastPeriod": 12, "slowPeriod": 26, "signalPeriod": 9},
+    "ema": {"shortPeriod": 12, "longPeriod": 26},
+    "volatility_breakout": {"k": 0.5},
+    "custom": {
+        "rules": "buy when ema(12) crosses_above ema(26) and rsi(14) < 60; "
+                 "sell when ema(12) crosses_below ema(26) or rsi(14) > 80",
+    },
+}
+
+INITIAL_CAPITAL = 10000000.0
+COMMISSION = 0.001
+
+
+def _best_of(repeat: int, func) -> float:
+    """func를 repeat번 실행한 시간 중 최솟값 (초)"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def measure(candles, strategy_type: str, parameters: Dict[str, Any], repeat: int) -> Dict[str, Any]:
+    """
+    전략 하나의 벤치마크
+    - seconds: 엔진 전체 실행(run) 시간
+    - signalSeconds: 신호 생성 단계 시간
+    - metricsSeconds: 성과 분석 단계 시간 (완료된 엔진 상태로 같은 분석을 다시 실행해 측정)
+    - replaySeconds: 신호 캐시 적중 시(수수료만 바꾼 재실행) 실행 시간
+    - peakMemoryMB: 실행 중 Python/NumPy 할당 최대치 (tracemalloc, 시간 측정과 별도 실행)
+    """
+    def new_engine() -> BacktestEngine:
+        # 신호 캐시 적중이 측정값을 왜곡하지 않도록 replay 측정 외에는 캐시를 사용하지 않음
+        return BacktestEngine(
+            initial_capital=INITIAL_CAPITAL, commission=COMMISSION, use_signal_cache=False
+        )
+
+    seconds = _best_of(
+        repeat,
+        lambda: new_engine().run(candles, strategy_type, parameters, INITIAL_CAPITAL),
+    )
+    signal_seconds = _best_of(
+        repeat,
+        lambda: new_engine()._generate_signals(candles, strategy_type, parameters),
+    )
+
+    engine = new_engine()
+    result = engine.run(candles, strategy_type, parameters, INITIAL_CAPITAL)
+    metrics_seconds = _best_of(repeat, lambda: engine._analyze(candles, curves=True))
+
+    def replay() -> None:
+        BacktestEngine(initial_capital=INITIAL_CAPITAL, commission=COMMISSION * 2).run(
+            candles, strategy_type, parameters, INITIAL_CAPITAL
+        )
+
+    replay()  # 신호 캐시 채우기
+    replay_seconds = _best_of(repeat, replay)
+
+    tracemalloc.start()
+    try:
+        new_engine().run(candles, strategy_type, parameters, INITIAL_CAPITAL)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    n = len(candles)
+    return {
+        "strategy": strategy_type,
+        "candles": n,
+        "seconds": round(seconds, 6),
+        "candlesPerSec": round(n / seconds, 1) if seconds > 0 else None,
+        "signalSeconds": round(signal_seconds, 6),
+        "metricsSeconds": round(metrics_seconds, 6),
+        "replaySeconds": round(replay_seconds, 6),
+        "peakMemoryMB": round(peak / (1024 * 1024), 3),
+        "totalTrades": result["totalTrades"],
+        "totalReturn": result["totalReturn"],
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        output = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(__file__), capture_output=True, text=True, check=True,
+        )
+        return output.stdout.strip() or None
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(
+    sizes: List[int], strategies: List[str], repeat: int, seed: int
+) -> Dict[str, Any]:
+    """모든 (크기, 전략) 조합 벤치마크. 같은 seed / 크기는 항상 같은 합성 캔들을 사용합니다."""
+    # 디스크 캐시나 이전 실행의 신호가 섞이지 않도록 메모리 전용 신호 캐시 사용
+    signal_cache._cache = ResultCache(directory=None, max_entries=4)
+    results = []
+    for size in sizes:
+        candles = generate_candles(size, seed=seed)
+        for strategy_type in strategies:
+            entry = measure(candles, strategy_type, STRATEGIES[strategy_type], repeat)
+            results.append(entry)
+            print(
+                f"{strategy_type:<20} {size:>9,} candles  {entry['candlesPerSec']:>14,.0f} candles/s  "
+                f"signals {entry['signalSeconds'] * 1000:>9.2f} ms  metrics {entry['metricsSeconds'] * 1000:>8.2f} ms  "
+                f"replay {entry['replaySeconds'] * 1000:>9.2f} ms  "
+                f"peak {entry['peakMemoryMB']:>8.2f} MB",
+                flush=True,
+            )
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "createdAt": int(time.time()),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "seed": seed,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> int:
+    """
+    기준 결과 대비 변화 출력
+    처리량이 threshold 비율 이상 감소했거나 최대 메모리가 threshold 비율 이상 증가한 항목 수를 반환합니다.
+    결과가 달라진 항목(거래 수/수익률)은 성능과 별개로 표시합니다.
+    """
+    previous = {(r["strategy"], r["candles"]): r for r in baseline.get("results", [])}
+    regressions = 0
+    print(f"\n기준: {baseline.get('meta', {}).get('commit')} -> 현재: {current['meta'].get('commit')}")
+    for entry in current["results"]:
+        old = previous.get((entry["strategy"], entry["candles"]))
+        if old is None or not old.get("candlesPerSec") or not entry.get("candlesPerSec"):
+            continue
+        speed = entry["candlesPerSec"] / old["candlesPerSec"] - 1
+        memory = entry["peakMemoryMB"] / old["peakMemoryMB"] - 1 if old["peakMemoryMB"] else 0.0
+        flags = []
+        if speed <= -threshold:
+            flags.append("SLOWER")
+        if memory >= threshold:
+            flags.append("MORE MEMORY")
+        if (old["totalTrades"], old["totalReturn"]) != (entry["totalTrades"], entry["totalReturn"]):
+            flags.append("RESULT CHANGED")
+        regressions += ("SLOWER" in flags) + ("MORE MEMORY" in flags)
+        print(
+            f"{entry['strategy']:<20} {entry['candles']:>9,}  speed {speed * 100:+7.1f}%  "
+            f"memory {memory * 100:+7.1f}%  {' '.join(flags)}"
+        )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="백테스트 엔진 처리량 벤치마크 (오프라인)")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+                        help="캔들 수 목록 (쉼표 구분)")
+    parser.add_argument("--strategies", default=",".join(STRATEGIES),
+                        help="전략 타입 목록 (쉼표 구분)")
+    parser.add_argument("--repeat", type=int, default=3, help="시간 측정 반복 횟수 (최솟값 사용)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="합성 캔들 seed")
+    parser.add_argument("--output", help="결과 JSON 경로 (기본값: benchmarks/results/<커밋>.json)")
+    parser.add_argument("--compare", help="비교할 기준 결과 JSON 경로")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="성능 저하로 판단할 변화 비율 (기본값 0.1 = 10%%)")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    strategies = [s for s in args.strategies.split(",") if s]
+    unknown = [s for s in strategies if s not in STRATEGIES]
+    if unknown:
+        parser.error(f"지원하지 않는 전략 타입입니다: {', '.join(unknown)}")
+
+    report = run_suite(sizes, strategies, max(1, args.repeat), args.seed)
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{report['meta']['commit'] or report['meta']['createdAt']}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n결과 저장: {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(baseline, report, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+"""
+합성 OHLCV 캔들 생성기
+기하 브라운 운동(GBM)에 포아송 점프를 더한 로그 수익률로 종가 경로를 만들고,
+봉 내부 변동성으로 고가/저가를 만듭니다. 같은 seed는 항상 같은 캔들을 생성합니다.
+"""
+import numpy as np
+
+from app.services.candles import Candles
+
+SECONDS_PER_YEAR = 365 * 24 * 60 * 60
+
+
+def generate_candles(
+    n: int,
+    seed: int = 42,
+    interval_seconds: int = 3600,
+    start_time: int = 1_577_836_800,  # 2020-01-01 00:00:00 UTC
+    start_price: float = 10000.0,
+    drift: float = 0.1,
+    volatility: float = 0.8,
+    jump_intensity: float = 12.0,
+    jump_mean: float = -0.01,
+    jump_std: float = 0.05,
+) -> Candles:
+    """
+    GBM + 점프 확산 캔들 n개 생성
+    drift / volatility: 연율 기대 수익률 / 변동성
+    jump_intensity: 연간 평균 점프 횟수, jump_mean / jump_std: 점프 크기(로그 수익률)의 평균 / 표준편차
+    """
+    rng = np.random.default_rng(seed)
+    dt = interval_seconds / SECONDS_PER_YEAR
+
+    # 봉별 로그 수익률 = 확산 항 + (점프 횟수만큼의 정규 점프 합)
+    diffusion = (drift - 0.5 * volatility ** 2) * dt + volatility * np.sqrt(dt) * rng.standard_normal(n)
+    jump_counts = rng.poisson(jump_intensity * dt, n)
+    jumps = jump_counts * jump_mean + np.sqrt(jump_counts) * jump_std * rng.standard_normal(n)
+    close = start_price * np.exp(np.cumsum(diffusion + jumps))
+
+    open_ = np.empty(n)
+    open_[0] = start_price
+    open_[1:] = close[:-1]
+
+    # 고가/저가: 시가/종가 바깥으로 봉 내부 변동성만큼 확장
+    wick = volatility * np.sqrt(dt) * 0.5
+    high = np.maximum(open_, close) * np.exp(np.abs(rng.standard_normal(n)) * wick)
+    low = np.minimum(open_, close) * np.exp(-np.abs(rng.standard_normal(n)) * wick)
+    volume = rng.lognormal(mean=3.0, sigma=0.5, size=n)
+
+    time = start_time + interval_seconds * np.arange(n, dtype=np.int64)
+    return Candles(time, open_, high, low, close, volume)
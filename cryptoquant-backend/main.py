@@ -1,18 +1,16 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api import market, strategy, auth, chat
 from app.database import engine, init_db
+from app.services.http_clients import close_http_clients, get_http_registry
+from app.services.workers import shutdown_process_pool
 
-app = FastAPI(
-    title="CryptoQuant API",
-    description="AI 기반 암호화폐 차트 & 자동매매 데모 플랫폼 API",
-    version="1.0.0",
-)
 
 # 애플리케이션 시작 시 데이터베이스 테이블 생성 (개발용)
 # 프로덕션에서는 Alembic 마이그레이션 사용 권장
-@app.on_event("startup")
-async def startup_event():
+@asynccontextmanager
+async def lifespan(app: FastAPI):
     # 데이터베이스 연결 확인
     try:
         # 테이블이 없으면 생성 (개발 환경용)
@@ -23,6 +21,23 @@ async def startup_event():
         print(f"⚠️ 데이터베이스 연결 실패: {e}")
         print("💡 PostgreSQL이 실행 중인지 확인하고 DATABASE_URL을 확인하세요.")
 
+    # 외부 API 공유 HTTP 클라이언트 (업스트림별 연결 풀)
+    get_http_registry().open_all()
+
+    yield
+
+    # 외부 API 연결 풀과 백테스트용 프로세스 풀 정리
+    await close_http_clients()
+    shutdown_process_pool()
+
+
+app = FastAPI(
+    title="CryptoQuant API",
+    description="AI 기반 암호화폐 차트 & 자동매매 데모 플랫폼 API",
+    version="1.0.0",
+    lifespan=lifespan,
+)
+
 # CORS 설정
 app.add_middleware(
     CORSMiddleware,
@@ -48,3 +63,9 @@ async def root():
 async def health():
     return {"status": "healthy"}
 
+
+@app.get("/health/upstreams")
+async def upstream_health():
+    """외부 API 업스트림별 요청 통계와 연결 풀 상태"""
+    return get_http_registry().metrics()
+